@@ -0,0 +1,95 @@
+"""
+Crisis detector microbenchmark.
+
+Compares the precompiled Aho-Corasick detector with the previous
+per-keyword substring loop on a labeled corpus: accuracy (precision /
+recall) and scan time per message.
+
+Usage: python benchmarks/crisis_detector_bench.py [--repeat 2000]
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.crisis_detector import CrisisDetector  # noqa: E402
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "data", "crisis_corpus.json")
+
+LEGACY_KEYWORDS = {
+    "uk": [
+        "самогубство", "покінчити з життям", "не хочу жити", "краще б помер",
+        "немає сенсу", "все безнадійно", "нікому не потрібен", "хочу померти"
+    ],
+    "en": [
+        "suicide", "kill myself", "don't want to live", "better off dead",
+        "no point", "hopeless", "nobody cares", "want to die"
+    ]
+}
+
+
+def legacy_detect(text: str) -> bool:
+    """Previous implementation: substring search for every keyword"""
+    text_lower = text.lower()
+    detected = False
+    for keywords in LEGACY_KEYWORDS.values():
+        for keyword in keywords:
+            if keyword in text_lower:
+                detected = True
+    return detected
+
+
+def score(predictions, labels):
+    tp = sum(1 for p, l in zip(predictions, labels) if p and l)
+    fp = sum(1 for p, l in zip(predictions, labels) if p and not l)
+    fn = sum(1 for p, l in zip(predictions, labels) if not p and l)
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    return precision, recall, fp, fn
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        corpus = json.load(f)
+    texts = [item["text"] for item in corpus]
+    labels = [item["crisis"] for item in corpus]
+
+    build_time = timeit.timeit(CrisisDetector, number=10) / 10
+    detector = CrisisDetector()
+
+    candidates = {
+        "legacy substring": legacy_detect,
+        "aho-corasick": lambda text: detector.scan(text)["crisis_detected"],
+    }
+
+    print(f"Corpus: {len(texts)} messages ({sum(labels)} crisis)")
+    print(f"Automaton build: {build_time * 1000:.2f} ms\n")
+    print(f"{'detector':<18} {'precision':>9} {'recall':>7} {'FP':>4} {'FN':>4} {'us/msg':>8}")
+
+    for name, detect in candidates.items():
+        predictions = [detect(text) for text in texts]
+        precision, recall, fp, fn = score(predictions, labels)
+
+        elapsed = timeit.timeit(
+            lambda: [detect(text) for text in texts], number=args.repeat
+        )
+        per_message = elapsed / (args.repeat * len(texts)) * 1e6
+        print(f"{name:<18} {precision:>9.2f} {recall:>7.2f} {fp:>4} {fn:>4} {per_message:>8.1f}")
+
+    misses = [text for text, label in zip(texts, labels)
+              if label != detector.scan(text)["crisis_detected"]]
+    if misses:
+        print("\nMisclassified by aho-corasick:")
+        for text in misses:
+            print(f"  - {text}")
+
+
+if __name__ == "__main__":
+    main()
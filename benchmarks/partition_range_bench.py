@@ -0,0 +1,148 @@
+"""
+Partitioned range query benchmark.
+
+Compares time-range queries on mood_checkins stored as one plain table with
+the same data in monthly range partitions: the user's mood history for the
+last 7/30 days, a weekly aggregate over all users, and the cost of expiring
+a month of data (DELETE vs DROP of the partition). EXPLAIN output
+shows how many partitions the planner kept after pruning.
+
+Runs against PostgreSQL given by --dsn / DATABASE_URL on TEMP tables only,
+so real data is never touched.
+
+Usage: python benchmarks/partition_range_bench.py [--users 20000] [--months 24] [--dsn postgres://...]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.partitions import add_months, month_start, partition_name  # noqa: E402
+
+COLUMNS = '''
+    id UUID DEFAULT gen_random_uuid(),
+    user_id BIGINT,
+    mood_level INTEGER,
+    note TEXT,
+    timestamp TIMESTAMP NOT NULL
+'''
+
+QUERIES = {
+    "user history 7d": (
+        "SELECT mood_level, timestamp FROM {table} "
+        "WHERE user_id = $1 AND timestamp >= $2 ORDER BY timestamp DESC",
+        7,
+    ),
+    "user history 30d": (
+        "SELECT mood_level, timestamp FROM {table} "
+        "WHERE user_id = $1 AND timestamp >= $2 ORDER BY timestamp DESC",
+        30,
+    ),
+    "weekly aggregate": (
+        "SELECT user_id, AVG(mood_level), COUNT(*) FROM {table} "
+        "WHERE timestamp >= $2 AND $1::bigint IS NOT NULL GROUP BY user_id",
+        7,
+    ),
+}
+
+
+async def seed(conn, users: int, months: int, per_user_month: int):
+    now = datetime.now()
+    first = add_months(month_start(now), -months + 1)
+
+    await conn.execute(f'CREATE TEMP TABLE plain_checkins ({COLUMNS}, PRIMARY KEY (id))')
+    await conn.execute(f'CREATE TEMP TABLE part_checkins ({COLUMNS}, PRIMARY KEY (id, timestamp)) '
+                       'PARTITION BY RANGE (timestamp)')
+    month = first
+    while month <= add_months(month_start(now), 1):
+        await conn.execute(f'''
+            CREATE TEMP TABLE {partition_name("part_checkins", month)} PARTITION OF part_checkins
+            FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')
+        ''')
+        month = add_months(month, 1)
+
+    await conn.execute('''
+        INSERT INTO plain_checkins (user_id, mood_level, note, timestamp)
+        SELECT u, 1 + (random() * 9)::int, 'note',
+               $2::timestamp + random() * (NOW()::timestamp - $2::timestamp)
+        FROM generate_series(1, $1) u, generate_series(1, $3) c
+    ''', users, first, per_user_month * months)
+    await conn.execute('INSERT INTO part_checkins SELECT * FROM plain_checkins')
+
+    for table in ("plain_checkins", "part_checkins"):
+        await conn.execute(f'CREATE INDEX ON {table}(user_id, timestamp DESC)')
+        await conn.execute(f'CREATE INDEX ON {table}(timestamp DESC)')
+        await conn.execute(f'ANALYZE {table}')
+    return first
+
+
+async def time_query(conn, sql: str, args, repeat: int) -> float:
+    start = time.perf_counter()
+    for i in range(repeat):
+        await conn.fetch(sql, args[0] + i, args[1])
+    return (time.perf_counter() - start) / repeat
+
+
+async def scanned_partitions(conn, sql: str, args) -> int:
+    # ANALYZE so partitions pruned at execution time are left out as well
+    plan = await conn.fetchval(f'EXPLAIN (ANALYZE, FORMAT JSON) {sql}', *args)
+    return plan.count('"part_checkins_p')
+
+
+async def bench(dsn: str, users: int, months: int, per_user_month: int, repeat: int):
+    import asyncpg
+
+    conn = await asyncpg.connect(dsn)
+    try:
+        start = time.perf_counter()
+        first = await seed(conn, users, months, per_user_month)
+        rows = await conn.fetchval('SELECT COUNT(*) FROM plain_checkins')
+        print(f"seeded {rows} check-ins over {months} months in {time.perf_counter() - start:.1f}s")
+
+        now = datetime.now()
+        for label, (sql, days) in QUERIES.items():
+            args = (1, now - timedelta(days=days))
+            count = repeat if "user" in label else max(1, repeat // 50)
+            plain = await time_query(conn, sql.format(table="plain_checkins"), args, count)
+            part = await time_query(conn, sql.format(table="part_checkins"), args, count)
+            partitions = await scanned_partitions(conn, sql.format(table="part_checkins"), args)
+            print(f"{label:18} plain {plain * 1000:8.2f} ms | partitioned {part * 1000:8.2f} ms "
+                  f"({partitions}/{months + 1} partitions scanned)")
+
+        # Expiring the oldest month: row deletes vs dropping the partition
+        upper = add_months(first, 1)
+        start = time.perf_counter()
+        deleted = await conn.execute('DELETE FROM plain_checkins WHERE timestamp < $1', upper)
+        delete_time = time.perf_counter() - start
+        start = time.perf_counter()
+        oldest = partition_name("part_checkins", first)
+        await conn.execute(f'ALTER TABLE part_checkins DETACH PARTITION {oldest}')
+        await conn.execute(f'DROP TABLE {oldest}')
+        drop_time = time.perf_counter() - start
+        print(f"expire one month:  DELETE {delete_time * 1000:.0f} ms ({deleted}) | "
+              f"DROP PARTITION {drop_time * 1000:.0f} ms")
+    finally:
+        await conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("--per-user-month", type=int, default=4, help="check-ins per user per month")
+    parser.add_argument("--repeat", type=int, default=500, help="queries timed per case")
+    parser.add_argument("--dsn", default=os.getenv("DATABASE_URL"))
+    args = parser.parse_args()
+
+    if not args.dsn:
+        print("No --dsn / DATABASE_URL given, skipping partition benchmark")
+        return
+    asyncio.run(bench(args.dsn, args.users, args.months, args.per_user_month, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Sentiment scorer throughput benchmark, in messages per second.
+
+Scores a synthetic corpus of Ukrainian and English chat messages:
+- one message per call (score), as on the save path;
+- NumPy batches (score_batch), as in the nightly backfill;
+- NumPy with a batch of one, for comparison.
+Normalization (tokenizing and stemming) is timed separately, because it
+is shared by all of them and dominates the cost.
+
+Usage: python benchmarks/sentiment_bench.py [--messages 20000] [--batch-size 2000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.crisis_detector import normalize  # noqa: E402
+from services.sentiment import SentimentScorer  # noqa: E402
+
+FRAGMENTS = [
+    "Сьогодні був важкий день на роботі",
+    "мені не спалося через кошмари",
+    "дякую, після розмови стало трохи легше",
+    "я не відчуваю радості від звичних речей",
+    "зранку гуляв з собакою і це було приємно",
+    "знову тривога і паніка в транспорті",
+    "родина підтримує, я вдячний їм",
+    "нормальний день, нічого особливого",
+    "I feel tired and stressed after the night shift",
+    "thanks, the breathing exercise really helped",
+    "I don't feel happy about anything lately",
+    "had a good walk with my kids today",
+    "the flashbacks are getting worse",
+    "not bad, just an ordinary day",
+]
+
+
+def corpus(count: int):
+    rng = random.Random(42)
+    return [". ".join(rng.sample(FRAGMENTS, rng.randint(1, 4))) for _ in range(count)]
+
+
+def rate(label: str, count: int, elapsed: float):
+    print(f"{label:<28} {count / elapsed:>12,.0f} msg/s  ({elapsed / count * 1e6:7.1f} us/msg)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    scorer = SentimentScorer()
+    messages = corpus(args.messages)
+    tokens = sum(len(normalize(message)) for message in messages)
+    print(f"{len(messages)} messages, {tokens / len(messages):.1f} stems per message, "
+          f"{len(scorer.vocabulary)} lexicon stems")
+
+    start = time.perf_counter()
+    for message in messages:
+        normalize(message)
+    rate("normalization only", len(messages), time.perf_counter() - start)
+
+    start = time.perf_counter()
+    single_scores = [scorer.score(message) for message in messages]
+    rate("score, one per call", len(messages), time.perf_counter() - start)
+
+    start = time.perf_counter()
+    unbatched_scores = [float(scorer.score_batch([message])[0]) for message in messages]
+    rate("score_batch, batches of 1", len(messages), time.perf_counter() - start)
+
+    start = time.perf_counter()
+    batch_scores = []
+    for offset in range(0, len(messages), args.batch_size):
+        batch_scores.extend(scorer.score_batch(messages[offset:offset + args.batch_size]).tolist())
+    rate(f"score_batch, batches of {args.batch_size}", len(messages), time.perf_counter() - start)
+
+    mismatches = sum(
+        abs(a - b) > 1e-9 or abs(a - c) > 1e-9
+        for a, b, c in zip(single_scores, unbatched_scores, batch_scores)
+    )
+    print(f"score mismatches between implementations: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Speech-to-text backend benchmark: real-time factor (processing time / audio
+duration, lower is faster; below 1.0 is faster than real time) and word
+error rate where reference transcripts exist.
+
+Clips are read from --audio-dir (any ffmpeg-readable format); a reference
+transcript for clip.ogg is clip.txt. Without --audio-dir, synthetic tone
+clips are generated, which measures decoding cost only.
+
+Backends:
+  recorded  replays --recorded (or the reference transcripts) with
+            --recorded-latency per clip; the offline stand-in
+  vosk      local CPU models from --vosk-model-uk / --vosk-model-en
+  whisper   OpenAI API, needs OPENAI_API_KEY and network
+
+--record saves the transcripts of the first real backend to --recorded, so
+later runs and tests can replay them without a model or network.
+
+Usage: python benchmarks/stt_bench.py --audio-dir clips --language uk \\
+           --backends recorded,vosk --vosk-model-uk models/vosk-model-small-uk
+"""
+import argparse
+import asyncio
+import io
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydub import AudioSegment  # noqa: E402
+from pydub.generators import Sine  # noqa: E402
+
+from services.stt_backends import (  # noqa: E402
+    RecordedBackend, VoskBackend, WhisperBackend, audio_fingerprint
+)
+
+
+def load_clips(audio_dir: str):
+    """(name, audio bytes, duration seconds, reference text or None) per clip"""
+    clips = []
+    for name in sorted(os.listdir(audio_dir)):
+        path = os.path.join(audio_dir, name)
+        if name.endswith(".txt") or not os.path.isfile(path):
+            continue
+        with open(path, "rb") as f:
+            audio = f.read()
+        duration = AudioSegment.from_file(io.BytesIO(audio)).duration_seconds
+        reference_path = os.path.splitext(path)[0] + ".txt"
+        reference = None
+        if os.path.exists(reference_path):
+            with open(reference_path, encoding="utf-8") as f:
+                reference = f.read().strip()
+        clips.append((name, audio, duration, reference))
+    return clips
+
+
+def synthetic_clips():
+    clips = []
+    for seconds in (5, 10, 20, 40):
+        segment = Sine(220).to_audio_segment(duration=seconds * 1000).apply_gain(-12)
+        buffer = io.BytesIO()
+        segment.set_frame_rate(16000).export(buffer, format="wav")
+        clips.append((f"tone_{seconds}s.wav", buffer.getvalue(), float(seconds), None))
+    return clips
+
+
+def word_errors(reference: str, hypothesis: str):
+    """Word-level edit distance and reference length"""
+    ref = reference.lower().split()
+    hyp = hypothesis.lower().split()
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word)
+            ))
+        previous = current
+    return previous[-1], len(ref)
+
+
+async def bench(backend, clips, language):
+    timings = []
+    transcripts = {}
+    failures = 0
+    errors = words = 0
+    for name, audio, duration, reference in clips:
+        start = time.perf_counter()
+        result = await backend.transcribe(audio, language, name)
+        elapsed = time.perf_counter() - start
+        timings.append((elapsed, duration))
+        if not result["success"]:
+            failures += 1
+            continue
+        transcripts[audio_fingerprint(audio)] = result["text"]
+        if reference is not None:
+            clip_errors, clip_words = word_errors(reference, result["text"])
+            errors += clip_errors
+            words += clip_words
+
+    total_time = sum(elapsed for elapsed, _ in timings)
+    total_audio = sum(duration for _, duration in timings)
+    per_clip = [elapsed / duration for elapsed, duration in timings if duration]
+    wer = f"{errors / words:6.1%}" if words else "     -"
+    print(f"{backend.name:<9} audio {total_audio:7.1f}s  processing {total_time:7.2f}s  "
+          f"RTF {total_time / total_audio:6.3f}  (clip median {statistics.median(per_clip):6.3f}, "
+          f"max {max(per_clip):6.3f})  WER {wer}  failures {failures}/{len(clips)}")
+    return transcripts
+
+
+async def run(args):
+    clips = load_clips(args.audio_dir) if args.audio_dir else synthetic_clips()
+    print(f"{len(clips)} clips, {sum(clip[2] for clip in clips):.1f}s of audio, language {args.language}")
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    session = None
+    recorded_transcripts = None
+    for name in args.backends.split(","):
+        if name == "recorded":
+            if args.recorded and os.path.exists(args.recorded) and not args.record:
+                backend = RecordedBackend.load(args.recorded, args.recorded_latency)
+            else:
+                backend = RecordedBackend(latency=args.recorded_latency)
+                for _, audio, _, reference in clips:
+                    backend.record(audio, reference or "")
+        elif name == "vosk":
+            backend = VoskBackend({"uk": args.vosk_model_uk, "en": args.vosk_model_en}, executor)
+        elif name == "whisper":
+            if session is None:
+                session = aiohttp.ClientSession()
+            backend = WhisperBackend(os.getenv("OPENAI_API_KEY", ""), lambda: session)
+        else:
+            print(f"unknown backend: {name}")
+            continue
+
+        if not backend.available():
+            print(f"{name:<9} not available (missing package, model or API key)")
+            continue
+        transcripts = await bench(backend, clips, args.language)
+        if name != "recorded" and recorded_transcripts is None:
+            recorded_transcripts = transcripts
+
+    if args.record and args.recorded and recorded_transcripts is not None:
+        RecordedBackend(recorded_transcripts).save(args.recorded)
+        print(f"recorded {len(recorded_transcripts)} transcripts to {args.recorded}")
+
+    if session is not None:
+        await session.close()
+    executor.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--audio-dir")
+    parser.add_argument("--language", default="uk")
+    parser.add_argument("--backends", default="recorded,vosk")
+    parser.add_argument("--vosk-model-uk", default=os.getenv("VOSK_MODEL_UK", ""))
+    parser.add_argument("--vosk-model-en", default=os.getenv("VOSK_MODEL_EN", ""))
+    parser.add_argument("--recorded", help="JSON file of recorded transcripts")
+    parser.add_argument("--recorded-latency", type=float, default=0.0,
+                        help="seconds the stand-in waits per clip")
+    parser.add_argument("--record", action="store_true",
+                        help="save the first real backend's transcripts to --recorded")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+gTTS latency benchmark for a long AI reply (~500 tokens).
+
+Compares the previous path (one gTTS call inside the event loop) with
+sentence chunks synthesized in parallel on a thread pool. Reports total
+latency and the longest event loop stall seen by a 10 ms ticker, which is
+how long every other update would have waited.
+
+By default gTTS is replaced by a stand-in that sleeps --request-latency per
+100-character request (gTTS sends one request per ~100 characters), so the
+benchmark runs offline. Use --live to call Google.
+
+Usage: python benchmarks/tts_bench.py [--workers 4] [--chunk-chars 200] [--live]
+"""
+import argparse
+import asyncio
+import io
+import math
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import speech_synthesis  # noqa: E402
+
+SENTENCES = [
+    "Дякую, що поділилися тим, що відчуваєте.",
+    "Те, що ви описуєте, є природною реакцією на пережиті події, і ви не самі в цьому.",
+    "Спробуйте сьогодні кілька хвилин дихальної вправи: вдих на чотири рахунки, затримка на чотири, видих на шість.",
+    "Якщо думки повертаються до травматичних спогадів, допомагає техніка заземлення: назвіть п'ять речей, які бачите, чотири, які чуєте, і три, яких торкаєтесь.",
+    "Регулярний сон, фізична активність і спілкування з людьми, яким ви довіряєте, поступово зменшують напругу.",
+    "Пам'ятайте, що звернутися по допомогу до психолога — це прояв сили, а не слабкості.",
+]
+# ~500 tokens: about 2000 characters of Ukrainian text
+REPLY = " ".join(SENTENCES * 4)
+
+
+class SimulatedTTS:
+    """Stand-in for gTTS: sleeps per 100-character request and returns fake MP3 frames"""
+    latency = 0.25
+
+    def __init__(self, text, lang="en", slow=False):
+        self.text = text
+
+    def write_to_fp(self, fp):
+        requests = math.ceil(len(self.text) / 100)
+        for _ in range(requests):
+            time.sleep(self.latency)
+            fp.write(b"\xff\xfb" + b"\x00" * 416)
+
+
+async def measure(coro_factory):
+    """Run a coroutine while a ticker records the longest event loop stall"""
+    stall = 0.0
+    running = True
+
+    async def ticker():
+        nonlocal stall
+        last = time.perf_counter()
+        while running:
+            await asyncio.sleep(0.01)
+            now = time.perf_counter()
+            stall = max(stall, now - last - 0.01)
+            last = now
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0.02)
+    start = time.perf_counter()
+    audio = await coro_factory()
+    elapsed = time.perf_counter() - start
+    running = False
+    await task
+    return elapsed, stall, len(audio)
+
+
+async def legacy(language: str):
+    buffer = io.BytesIO()
+    speech_synthesis.gTTS(text=REPLY, lang=language, slow=False).write_to_fp(buffer)
+    return buffer.getvalue()
+
+
+async def run(args):
+    executor = ThreadPoolExecutor(max_workers=args.workers)
+    chunks = speech_synthesis.split_sentences(REPLY, args.chunk_chars)
+    print(f"reply: {len(REPLY)} chars, {len(chunks)} chunks of <= {args.chunk_chars} chars, "
+          f"{args.workers} workers")
+
+    elapsed, stall, size = await measure(lambda: legacy("uk"))
+    print(f"blocking single call: {elapsed:6.2f}s total, event loop stalled {stall:6.2f}s ({size} bytes)")
+
+    elapsed, stall, size = await measure(
+        lambda: speech_synthesis.synthesize_chunked(REPLY, "uk", executor, args.chunk_chars)
+    )
+    print(f"parallel chunks:      {elapsed:6.2f}s total, event loop stalled {stall:6.2f}s ({size} bytes)")
+    executor.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--chunk-chars", type=int, default=200)
+    parser.add_argument("--request-latency", type=float, default=0.25,
+                        help="simulated seconds per gTTS request")
+    parser.add_argument("--live", action="store_true", help="call Google instead of the stand-in")
+    args = parser.parse_args()
+
+    if not args.live:
+        SimulatedTTS.latency = args.request_latency
+        speech_synthesis.gTTS = SimulatedTTS
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
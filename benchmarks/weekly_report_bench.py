@@ -0,0 +1,163 @@
+"""
+Weekly report benchmark.
+
+Compares the previous per-user report generation (one mood_checkins query
+per user) with the grouped weekly_report audience query streamed through a
+cursor and rendered in batches.
+
+The database part runs against PostgreSQL given by --dsn / DATABASE_URL on
+TEMP tables that shadow users and mood_checkins for the benchmark session
+only, so real data is never touched. Without a DSN only rendering is timed.
+
+Usage: python benchmarks/weekly_report_bench.py [--users 100000] [--dsn postgres://...]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.audiences import build_audience_query  # noqa: E402
+from services.weekly_reports import render_weekly_reports  # noqa: E402
+
+LEGACY_REPORT_QUERY = '''
+    SELECT mood_level, timestamp
+    FROM mood_checkins
+    WHERE user_id = $1 AND timestamp >= NOW() - INTERVAL '7 days'
+    ORDER BY timestamp
+'''
+
+LEGACY_AUDIENCE_QUERY = '''
+    SELECT DISTINCT u.user_id, u.first_name, u.language
+    FROM users u
+    JOIN mood_checkins m ON u.user_id = m.user_id
+    WHERE m.timestamp >= NOW() - INTERVAL '7 days'
+    AND u.subscription_status != 'inactive'
+'''
+
+BATCH_SIZE = 500
+
+
+def synthetic_rows(count: int):
+    rng = random.Random(42)
+    return [
+        {
+            "user_id": user_id,
+            "language": "uk" if user_id % 5 else "en",
+            "first_name": "user",
+            "avg_mood": rng.uniform(1, 10),
+            "check_ins": rng.randint(1, 7),
+            "first_mood": rng.randint(1, 10),
+            "last_mood": rng.randint(1, 10),
+        }
+        for user_id in range(1, count + 1)
+    ]
+
+
+def bench_render(users: int):
+    rows = synthetic_rows(users)
+    start = time.perf_counter()
+    rendered = 0
+    for offset in range(0, len(rows), BATCH_SIZE):
+        rendered += sum(1 for text in render_weekly_reports(rows[offset:offset + BATCH_SIZE]) if text)
+    elapsed = time.perf_counter() - start
+    print(f"render only:      {rendered} reports in {elapsed:.2f}s ({rendered / elapsed:,.0f}/s)")
+
+
+async def seed(conn, users: int, checkins_per_user: int):
+    await conn.execute('''
+        CREATE TEMP TABLE users (
+            user_id BIGINT PRIMARY KEY,
+            first_name VARCHAR(64),
+            language VARCHAR(10) DEFAULT 'uk',
+            subscription_status VARCHAR(20) DEFAULT 'free',
+            bot_blocked BOOLEAN DEFAULT false
+        )
+    ''')
+    await conn.execute('''
+        CREATE TEMP TABLE mood_checkins (
+            user_id BIGINT,
+            mood_level INTEGER,
+            timestamp TIMESTAMP
+        )
+    ''')
+    await conn.execute('''
+        INSERT INTO users (user_id, first_name, language)
+        SELECT g, 'user', CASE WHEN g % 5 = 0 THEN 'en' ELSE 'uk' END
+        FROM generate_series(1, $1) g
+    ''', users)
+    # Two weeks of history so the 7-day filter has something to skip
+    await conn.execute('''
+        INSERT INTO mood_checkins (user_id, mood_level, timestamp)
+        SELECT u, 1 + (random() * 9)::int, NOW() - random() * INTERVAL '14 days'
+        FROM generate_series(1, $1) u, generate_series(1, $2) c
+    ''', users, checkins_per_user)
+    await conn.execute('CREATE INDEX ON mood_checkins(user_id)')
+    await conn.execute('CREATE INDEX ON mood_checkins(timestamp DESC)')
+    await conn.execute('ANALYZE users')
+    await conn.execute('ANALYZE mood_checkins')
+
+
+async def bench_database(dsn: str, users: int, checkins_per_user: int, sample: int):
+    import asyncpg
+
+    conn = await asyncpg.connect(dsn)
+    try:
+        start = time.perf_counter()
+        await seed(conn, users, checkins_per_user)
+        print(f"seeded {users} users x {checkins_per_user} check-ins in {time.perf_counter() - start:.1f}s")
+
+        # Legacy: audience fetch, then one query per user (sampled and extrapolated)
+        start = time.perf_counter()
+        audience = await conn.fetch(LEGACY_AUDIENCE_QUERY)
+        audience_time = time.perf_counter() - start
+        sampled = audience[:sample]
+        start = time.perf_counter()
+        for user in sampled:
+            await conn.fetch(LEGACY_REPORT_QUERY, user['user_id'])
+        per_user = (time.perf_counter() - start) / max(1, len(sampled))
+        legacy_total = audience_time + per_user * len(audience)
+        print(f"per-user queries: {len(audience)} users, {per_user * 1000:.2f} ms/user, "
+              f"~{legacy_total:.1f}s total (extrapolated from {len(sampled)})")
+
+        # Set-based: one grouped query streamed through a cursor, rendered per batch
+        start = time.perf_counter()
+        first_batch = None
+        reports = 0
+        batch = []
+        async with conn.transaction(readonly=True):
+            async for row in conn.cursor(build_audience_query("weekly_report"), 0, prefetch=BATCH_SIZE):
+                batch.append(dict(row))
+                if len(batch) == BATCH_SIZE:
+                    reports += sum(1 for text in render_weekly_reports(batch) if text)
+                    first_batch = first_batch or time.perf_counter() - start
+                    batch = []
+        reports += sum(1 for text in render_weekly_reports(batch) if text)
+        total = time.perf_counter() - start
+        print(f"grouped query:    {reports} reports in {total:.2f}s "
+              f"(first batch after {(first_batch or total) * 1000:.0f} ms), "
+              f"{legacy_total / total:.0f}x faster")
+    finally:
+        await conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--checkins", type=int, default=6, help="check-ins per user over two weeks")
+    parser.add_argument("--sample", type=int, default=2000, help="users timed for the per-user path")
+    parser.add_argument("--dsn", default=os.getenv("DATABASE_URL"))
+    args = parser.parse_args()
+
+    bench_render(args.users)
+    if args.dsn:
+        asyncio.run(bench_database(args.dsn, args.users, args.checkins, args.sample))
+    else:
+        print("No --dsn / DATABASE_URL given, skipping database comparison")
+
+
+if __name__ == "__main__":
+    main()
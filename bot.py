@@ -11,7 +11,7 @@ from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_applicati
 from aiohttp import web
 
 from config import config
-from database.db_manager import DatabaseManager
+from database.db_manager import db_manager
 from handlers import (
     start_handler,
     mood_handler,
@@ -26,14 +26,23 @@ from handlers import (
     hotlines_handler,
     admin_handler
 )
-from services.scheduler import start_scheduler
+from services.activity_tracker import activity_tracker
+from services.broadcast import broadcast_engine
+from services.crisis_alerts import crisis_alert_queue
+from services.scheduler import start_scheduler, stop_scheduler
+from services.voice_service import prewarm_tts_cache
+from services.audio_transcoder import audio_transcoder
+from services.spool import audio_spool
 from services.legal_updater import LegalUpdater
 from services.marketing import MarketingManager
+from utils.http_client import http_client
+from utils.metrics import metrics
 from utils.middleware import (
     DatabaseMiddleware,
     ThrottlingMiddleware,
     LoggingMiddleware,
-    LanguageMiddleware
+    LanguageMiddleware,
+    SecurityMiddleware
 )
 
 # Налаштування логування
@@ -67,18 +76,36 @@ except Exception as e:
 
 dp = Dispatcher(storage=MemoryStorage())
 
+# Фонові задачі запуску (посилання тримаємо, щоб їх не прибрав збирач сміття)
+startup_tasks = set()
+
 async def on_startup(bot: Bot):
     """Ініціалізація бота при старті"""
     try:
         # Ініціалізація бази даних
         if config.get('DATABASE_URL'):
-            db_manager = DatabaseManager()
+            # Ініціалізуємо глобальний екземпляр, який вже імпортовано обробниками
             await db_manager.init_database()
-            # Make db_manager globally available
-            import database.db_manager
-            database.db_manager.db_manager = db_manager
             logger.info("База даних успішно ініціалізована")
 
+        # Спільна HTTP-сесія для зовнішніх API
+        await http_client.start()
+        # Каталог тимчасових аудіофайлів з періодичним очищенням
+        audio_spool.start()
+        # Процеси для перекодування аудіофайлів
+        await audio_transcoder.start()
+
+        # Черга кризових сповіщень адміністратору
+        await crisis_alert_queue.start(bot, admin_handler.notify_admin_crisis)
+        # Розсилки (незавершені після перезапуску продовжуються)
+        await broadcast_engine.start(bot)
+        # Пакетний запис last_activity
+        activity_tracker.start()
+        # Озвучування фіксованих фраз наперед, у фоні
+        task = asyncio.create_task(prewarm_tts_cache())
+        startup_tasks.add(task)
+        task.add_done_callback(startup_tasks.discard)
+
         marketing_manager = MarketingManager()
         start_scheduler()
 
@@ -100,6 +127,13 @@ async def on_shutdown(bot: Bot):
     """Очищення при завершенні роботи"""
     try:
         await bot.delete_webhook()
+        await crisis_alert_queue.stop()
+        await broadcast_engine.stop()
+        await stop_scheduler()
+        await activity_tracker.stop()
+        await http_client.close()
+        await audio_transcoder.stop()
+        await audio_spool.stop()
         
         await bot.session.close()
         logger.info("Завершення роботи бота виконано!")
@@ -111,8 +145,15 @@ def setup_handlers():
     """Реєстрація всіх обробників"""
     dp.message.middleware(DatabaseMiddleware())
     dp.callback_query.middleware(DatabaseMiddleware())
-    dp.message.middleware(ThrottlingMiddleware())
-    dp.callback_query.middleware(ThrottlingMiddleware())
+    # Один екземпляр на повідомлення і колбеки, щоб ліміти користувача були спільні.
+    # SecurityMiddleware блокує флуд на SECURITY_BLOCK_SECONDS (кризові повідомлення
+    # проходять завжди) і записує last_activity
+    security_middleware = SecurityMiddleware()
+    dp.message.middleware(security_middleware)
+    dp.callback_query.middleware(security_middleware)
+    throttling_middleware = ThrottlingMiddleware()
+    dp.message.middleware(throttling_middleware)
+    dp.callback_query.middleware(throttling_middleware)
     dp.message.middleware(LoggingMiddleware())
     dp.callback_query.middleware(LoggingMiddleware())
     dp.message.middleware(LanguageMiddleware())
@@ -160,9 +201,13 @@ def create_app() -> web.Application:
         status = "not_configured"
         if config.get('DATABASE_URL'):
             try:
-                db_manager = DatabaseManager()
-                await db_manager.init_database()
-                status = "connected"
+                # Перевіряємо пул глобального менеджера, а не створюємо новий на кожен запит
+                if db_manager.pool:
+                    async with db_manager.pool.acquire() as conn:
+                        await conn.fetchval('SELECT 1')
+                    status = "connected"
+                else:
+                    status = "not_initialized"
             except Exception as e:
                 status = f"error: {str(e)}"
         return web.json_response({
@@ -174,6 +219,11 @@ def create_app() -> web.Application:
     app.router.add_get("/status", status)
     app.router.add_get("/db-status", db_status)
     
+    async def metrics_view(request):
+        return web.json_response(metrics.snapshot())
+    
+    app.router.add_get("/metrics", metrics_view)
+    
     # Додаємо головну сторінку
     async def index(request):
         return web.json_response({
@@ -15,6 +15,8 @@ config = {
     "WEBHOOK_PATH": os.getenv("WEBHOOK_PATH", "/webhook"),
     "WEBHOOK_SECRET": os.getenv("WEBHOOK_SECRET", "vetsupport_webhook_secret"),
     "DATABASE_URL": os.getenv("DATABASE_URL", ""),
+    "DB_POOL_MIN_SIZE": int(os.getenv("DB_POOL_MIN_SIZE", "1")),
+    "DB_POOL_MAX_SIZE": int(os.getenv("DB_POOL_MAX_SIZE", "20")),
     "GEMINI_API_KEY": os.getenv("GEMINI_API_KEY", ""),
     "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", ""),
     "GROK_API_KEY": os.getenv("GROK_API_KEY", ""),
@@ -30,7 +32,112 @@ config = {
     "SUPPORT_CHAT_ID": os.getenv("SUPPORT_CHAT_ID", ""),
     "SECRET_KEY": os.getenv("SECRET_KEY", ""),
     "HOST": "0.0.0.0",
-    "PORT": "10000"
+    "PORT": "10000",
+    # Пам'ять діалогу ШІ
+    "AI_CONTEXT_TOKEN_BUDGET": int(os.getenv("AI_CONTEXT_TOKEN_BUDGET", "1200")),
+    "AI_MEMORY_TURNS": int(os.getenv("AI_MEMORY_TURNS", "12")),
+    "AI_MEMORY_MAX_USERS": int(os.getenv("AI_MEMORY_MAX_USERS", "5000")),
+    # Кеш відповідей ШІ
+    "AI_CACHE_TTL": int(os.getenv("AI_CACHE_TTL", "21600")),
+    "AI_CACHE_MAX_KEYS": int(os.getenv("AI_CACHE_MAX_KEYS", "512")),
+    "AI_CACHE_VARIANTS": int(os.getenv("AI_CACHE_VARIANTS", "3")),
+    "AI_SINGLEFLIGHT_TIMEOUT": float(os.getenv("AI_SINGLEFLIGHT_TIMEOUT", "45")),
+
+    # Кризові сповіщення адміністратору
+    "CRISIS_ALERT_DEDUP_SECONDS": int(os.getenv("CRISIS_ALERT_DEDUP_SECONDS", "900")),
+    "CRISIS_ALERTS_PER_MINUTE": int(os.getenv("CRISIS_ALERTS_PER_MINUTE", "20")),
+    "CRISIS_ALERT_LEASE_SECONDS": int(os.getenv("CRISIS_ALERT_LEASE_SECONDS", "120")),
+    "CRISIS_ALERT_POLL_SECONDS": int(os.getenv("CRISIS_ALERT_POLL_SECONDS", "10")),
+
+    # Розсилки
+    "BROADCAST_RATE": float(os.getenv("BROADCAST_RATE", "30")),
+    "BROADCAST_CONCURRENCY": int(os.getenv("BROADCAST_CONCURRENCY", "8")),
+    "BROADCAST_BATCH_SIZE": int(os.getenv("BROADCAST_BATCH_SIZE", "500")),
+    "BROADCAST_PER_CHAT_INTERVAL": float(os.getenv("BROADCAST_PER_CHAT_INTERVAL", "1.0")),
+    "BROADCAST_PROGRESS_INTERVAL": int(os.getenv("BROADCAST_PROGRESS_INTERVAL", "15")),
+    "AUDIENCE_PREFETCH": int(os.getenv("AUDIENCE_PREFETCH", "500")),
+
+    # Планувальник (час у розкладі задач рахується в цьому часовому поясі)
+    "SCHEDULER_TIMEZONE": os.getenv("SCHEDULER_TIMEZONE", "UTC"),
+    "SCHEDULER_LOCK_POLL_INTERVAL": int(os.getenv("SCHEDULER_LOCK_POLL_INTERVAL", "15")),
+    "JOB_LEASE_SECONDS": int(os.getenv("JOB_LEASE_SECONDS", "60")),
+    "BROADCAST_RESUME_INTERVAL": int(os.getenv("BROADCAST_RESUME_INTERVAL", "60")),
+
+    # Очищення старих даних
+    "RETENTION_AI_CHATS_DAYS": int(os.getenv("RETENTION_AI_CHATS_DAYS", "90")),
+    "RETENTION_MOOD_CHECKINS_DAYS": int(os.getenv("RETENTION_MOOD_CHECKINS_DAYS", "730")),
+    "RETENTION_BATCH_SIZE": int(os.getenv("RETENTION_BATCH_SIZE", "5000")),
+    "RETENTION_BATCH_PAUSE": float(os.getenv("RETENTION_BATCH_PAUSE", "0.5")),
+    "RETENTION_ARCHIVE_DIR": os.getenv("RETENTION_ARCHIVE_DIR", ""),
+
+    # Партиціонування таблиць
+    "DB_PARTITION_MONTHS_AHEAD": int(os.getenv("DB_PARTITION_MONTHS_AHEAD", "3")),
+    "DB_PARTITION_MIGRATE": os.getenv("DB_PARTITION_MIGRATE", "true").lower() == "true",
+
+    # Перерахунок статистики користувачів
+    "USER_STATS_BATCH_SIZE": int(os.getenv("USER_STATS_BATCH_SIZE", "1000")),
+    "USER_STATS_BATCH_PAUSE": float(os.getenv("USER_STATS_BATCH_PAUSE", "0.2")),
+    # Оцінка тональності старих повідомлень ШІ-чату (нові оцінюються при збереженні)
+    "SENTIMENT_BATCH_SIZE": int(os.getenv("SENTIMENT_BATCH_SIZE", "2000")),
+    "SENTIMENT_BATCH_PAUSE": float(os.getenv("SENTIMENT_BATCH_PAUSE", "0.1")),
+
+    # Активність користувачів (last_activity записується пакетами)
+    "ACTIVITY_FLUSH_INTERVAL": float(os.getenv("ACTIVITY_FLUSH_INTERVAL", "5")),
+
+    # Обмеження частоти запитів (токенів за секунду та розмір пакета)
+    "THROTTLE_MESSAGE_RATE": float(os.getenv("THROTTLE_MESSAGE_RATE", "1.0")),
+    "THROTTLE_MESSAGE_BURST": int(os.getenv("THROTTLE_MESSAGE_BURST", "5")),
+    "THROTTLE_CALLBACK_RATE": float(os.getenv("THROTTLE_CALLBACK_RATE", "2.0")),
+    "THROTTLE_CALLBACK_BURST": int(os.getenv("THROTTLE_CALLBACK_BURST", "8")),
+    "THROTTLE_AI_RATE": float(os.getenv("THROTTLE_AI_RATE", "0.1")),
+    "THROTTLE_AI_BURST": int(os.getenv("THROTTLE_AI_BURST", "3")),
+    "THROTTLE_WARNING_INTERVAL": float(os.getenv("THROTTLE_WARNING_INTERVAL", "10")),
+    "SECURITY_EVENT_RATE": float(os.getenv("SECURITY_EVENT_RATE", "2.0")),
+    "SECURITY_EVENT_BURST": int(os.getenv("SECURITY_EVENT_BURST", "40")),
+    "SECURITY_BLOCK_SECONDS": int(os.getenv("SECURITY_BLOCK_SECONDS", "300")),
+
+    # Голосові повідомлення (аудіо тримається в пам'яті, великі файли — у тимчасовому файлі)
+    "VOICE_MAX_BYTES": int(os.getenv("VOICE_MAX_BYTES", str(20 * 1024 * 1024))),
+    "VOICE_SPILL_BYTES": int(os.getenv("VOICE_SPILL_BYTES", str(2 * 1024 * 1024))),
+    # Аудіофайли перекодовуються в пулі процесів у моно 16 кГц Opus, тиша обрізається
+    "VOICE_MAX_SECONDS": int(os.getenv("VOICE_MAX_SECONDS", "600")),
+    "TRANSCODE_WORKERS": int(os.getenv("TRANSCODE_WORKERS", "2")),
+    "VOICE_MIN_SILENCE_MS": int(os.getenv("VOICE_MIN_SILENCE_MS", "700")),
+    "VOICE_SILENCE_OFFSET_DB": float(os.getenv("VOICE_SILENCE_OFFSET_DB", "-16")),
+    "VOICE_KEEP_SILENCE_MS": int(os.getenv("VOICE_KEEP_SILENCE_MS", "200")),
+    # Тимчасові аудіофайли: окремий каталог, старі та надлишкові файли видаляються
+    "SPOOL_DIR": os.getenv("SPOOL_DIR", ""),
+    "SPOOL_MAX_AGE": int(os.getenv("SPOOL_MAX_AGE", "3600")),
+    "SPOOL_MAX_MB": int(os.getenv("SPOOL_MAX_MB", "256")),
+    "SPOOL_SWEEP_INTERVAL": int(os.getenv("SPOOL_SWEEP_INTERVAL", "300")),
+
+    # Розпізнавання мовлення: whisper, vosk (локально, без мережі), recorded або auto
+    "STT_BACKEND": os.getenv("STT_BACKEND", "auto"),
+    "STT_MAX_WORKERS": int(os.getenv("STT_MAX_WORKERS", "2")),
+    "VOSK_MODEL_UK": os.getenv("VOSK_MODEL_UK", ""),
+    "VOSK_MODEL_EN": os.getenv("VOSK_MODEL_EN", ""),
+    "STT_RECORDED_PATH": os.getenv("STT_RECORDED_PATH", "stt_recorded.json"),
+
+    # Допуск до дорогих запитів (голос, ШІ-чат): кризові та преміум — першими
+    "ADMISSION_MAX_ACTIVE": int(os.getenv("ADMISSION_MAX_ACTIVE", "16")),
+    "ADMISSION_MAX_QUEUE": int(os.getenv("ADMISSION_MAX_QUEUE", "64")),
+    "ADMISSION_MAX_WAIT": float(os.getenv("ADMISSION_MAX_WAIT", "20")),
+
+    # Вихідні HTTP-запити (спільний пул з'єднань)
+    "HTTP_POOL_LIMIT": int(os.getenv("HTTP_POOL_LIMIT", "100")),
+    "HTTP_POOL_LIMIT_PER_HOST": int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "10")),
+    "HTTP_KEEPALIVE_TIMEOUT": float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "30")),
+    "HTTP_DNS_CACHE_TTL": int(os.getenv("HTTP_DNS_CACHE_TTL", "300")),
+    "HTTP_TIMEOUT": float(os.getenv("HTTP_TIMEOUT", "60")),
+    "HTTP_CONNECT_TIMEOUT": float(os.getenv("HTTP_CONNECT_TIMEOUT", "10")),
+
+    # Синтез мовлення (gTTS у пулі потоків, довгі відповіді діляться на речення)
+    "TTS_MAX_WORKERS": int(os.getenv("TTS_MAX_WORKERS", "4")),
+    "TTS_CHUNK_CHARS": int(os.getenv("TTS_CHUNK_CHARS", "200")),
+    "TTS_CACHE_DIR": os.getenv("TTS_CACHE_DIR", "tts_cache"),
+    "TTS_CACHE_MEMORY_MB": int(os.getenv("TTS_CACHE_MEMORY_MB", "16")),
+    "TTS_CACHE_DISK_MB": int(os.getenv("TTS_CACHE_DISK_MB", "200")),
+    "TTS_CACHE_MAX_TEXT": int(os.getenv("TTS_CACHE_MAX_TEXT", "600"))
 }
 
 # Логування значень змінних для дебагу
@@ -0,0 +1,8 @@
+import os
+
+# config.py refuses to load without a bot token; tests never talk to Telegram
+os.environ.setdefault("BOT_TOKEN", "123456:test-token")
+
+# config.py also imports the handlers, which import most services; loading it
+# first gives the same import order as bot.py and avoids circular imports
+import config  # noqa: E402,F401
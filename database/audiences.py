@@ -0,0 +1,52 @@
+# Broadcast audiences over users u: WHERE clause, plus optional extra
+# columns and joins for audiences that carry per-user data
+BROADCAST_AUDIENCES = {
+    "active_30d": {
+        "where": "u.last_activity >= NOW() - INTERVAL '30 days'"
+    },
+    "active_7d": {
+        "where": "u.last_activity >= NOW() - INTERVAL '7 days' AND u.subscription_status != 'inactive'"
+    },
+    "no_checkin_today": {
+        "where": '''
+            u.last_activity >= NOW() - INTERVAL '3 days'
+            AND u.subscription_status != 'inactive'
+            AND NOT EXISTS (
+                SELECT 1 FROM mood_checkins m
+                WHERE m.user_id = u.user_id AND m.timestamp >= CURRENT_DATE
+            )
+        '''
+    },
+    # Weekly mood aggregates per user, read through the (user_id, timestamp)
+    # index, so each page of recipients only touches its own users' check-ins
+    "weekly_report": {
+        "columns": "w.avg_mood, w.check_ins, w.first_mood, w.last_mood",
+        "join": '''
+            JOIN LATERAL (
+                SELECT
+                    AVG(m.mood_level) AS avg_mood,
+                    COUNT(*) AS check_ins,
+                    (ARRAY_AGG(m.mood_level ORDER BY m.timestamp))[1] AS first_mood,
+                    (ARRAY_AGG(m.mood_level ORDER BY m.timestamp DESC))[1] AS last_mood
+                FROM mood_checkins m
+                WHERE m.user_id = u.user_id AND m.timestamp >= NOW() - INTERVAL '7 days'
+            ) w ON w.check_ins > 0
+        ''',
+        "where": "u.subscription_status != 'inactive'"
+    }
+}
+
+
+def build_audience_query(audience: str) -> str:
+    """Build the recipients query for an audience; $1 is the user_id to start after"""
+    spec = BROADCAST_AUDIENCES[audience]
+    columns = f", {spec['columns']}" if spec.get("columns") else ""
+    return f'''
+        SELECT u.user_id, u.language, u.first_name{columns}
+        FROM users u
+        {spec.get("join", "")}
+        WHERE u.user_id > $1
+        AND NOT COALESCE(u.bot_blocked, false)
+        AND {spec["where"]}
+        ORDER BY u.user_id
+    '''
@@ -2,14 +2,105 @@ import asyncio
 import asyncpg
 import json
 import logging
+import uuid
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, AsyncIterator, Awaitable, Callable, Tuple
 
 from config import config
 from database.models import *
+from database.audiences import build_audience_query
+from database.partitions import (
+    PARTITIONED_TABLES, month_start, add_months, partition_name, legacy_name,
+    parse_partition_bounds
+)
+from services.sentiment import sentiment_scorer
 
 logger = logging.getLogger(__name__)
 
+# First key of all advisory locks taken by the bot ("VS")
+ADVISORY_LOCK_NAMESPACE = 0x5653
+
+# A job lease is renewed this many times per lease period while it is held
+LEASE_RENEWALS_PER_PERIOD = 3
+
+
+class LeaseLost(Exception):
+    """A job lease expired or was taken over while its holder was still working"""
+
+
+class JobLease:
+    """
+    Result of DatabaseManager.job_lease: true if the lease was acquired.
+    `lost` is set once the lease can no longer be renewed; run the guarded
+    work through guard() so it stops instead of overlapping with the next
+    holder.
+    """
+
+    def __init__(self, name: str, acquired: bool):
+        self.name = name
+        self.acquired = acquired
+        self.lost = asyncio.Event()
+
+    def __bool__(self) -> bool:
+        return self.acquired
+
+    async def guard(self, awaitable: Awaitable[Any]) -> Any:
+        """Await `awaitable`; cancel it and raise LeaseLost if the lease is lost first"""
+        task = asyncio.ensure_future(awaitable)
+        lost = asyncio.ensure_future(self.lost.wait())
+        try:
+            await asyncio.wait((task, lost), return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            raise
+        finally:
+            lost.cancel()
+        
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            raise LeaseLost(self.name)
+        return task.result()
+
+# Tables cleaned up by retention, all with id UUID and timestamp columns
+RETENTION_TABLES = ("ai_chats", "mood_checkins")
+
+# Recomputed user_stats counters and the drift below which averages count as equal
+USER_STATS_FIELDS = ("total_check_ins", "average_mood", "ai_chats_count")
+AVERAGE_MOOD_TOLERANCE = 0.005
+
+# Fresh counters for the users in $1, one grouped pass over each source table
+USER_STATS_FRESH_CTE = '''
+    WITH fresh AS (
+        SELECT ids.user_id,
+               COALESCE(m.total_check_ins, 0) AS total_check_ins,
+               COALESCE(m.average_mood, 0) AS average_mood,
+               COALESCE(c.ai_chats_count, 0) AS ai_chats_count
+        FROM unnest($1::bigint[]) AS ids(user_id)
+        LEFT JOIN (
+            SELECT user_id, COUNT(*) AS total_check_ins, AVG(mood_level)::float AS average_mood
+            FROM mood_checkins
+            WHERE user_id = ANY($1::bigint[])
+            GROUP BY user_id
+        ) m ON m.user_id = ids.user_id
+        LEFT JOIN (
+            SELECT user_id, COUNT(*) AS ai_chats_count
+            FROM ai_chats
+            WHERE user_id = ANY($1::bigint[])
+            GROUP BY user_id
+        ) c ON c.user_id = ids.user_id
+    )
+'''
+
+USER_STATS_DRIFT_CONDITION = f'''(
+    s.total_check_ins IS DISTINCT FROM f.total_check_ins
+    OR s.ai_chats_count IS DISTINCT FROM f.ai_chats_count
+    OR s.average_mood IS NULL
+    OR ABS(s.average_mood - f.average_mood) > {AVERAGE_MOOD_TOLERANCE}
+)'''
+
 class DatabaseManager:
     def __init__(self):
         self.pool = None
@@ -23,14 +114,15 @@ class DatabaseManager:
                 
             self.pool = await asyncpg.create_pool(
                 config['DATABASE_URL'],
-                min_size=1,
-                max_size=10,
+                min_size=config.get('DB_POOL_MIN_SIZE', 1),
+                max_size=config.get('DB_POOL_MAX_SIZE', 20),
                 server_settings={
                     'application_name': 'VetSupport AI Bot',
                 }
             )
             
             await self.create_tables()
+            await self.prepare_partitions()
             logger.info("Database initialized successfully")
             
         except Exception as e:
@@ -63,35 +155,21 @@ class DatabaseManager:
                     emergency_contact VARCHAR(100)
                 )
             ''')
-            
-            # Mood check-ins table
             await conn.execute('''
-                CREATE TABLE IF NOT EXISTS mood_checkins (
-                    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-                    user_id BIGINT REFERENCES users(user_id),
-                    mood_level INTEGER CHECK (mood_level >= 1 AND mood_level <= 10),
-                    note TEXT,
-                    timestamp TIMESTAMP DEFAULT NOW(),
-                    ai_analysis JSONB,
-                    recommended_actions TEXT[]
-                )
+                ALTER TABLE users ADD COLUMN IF NOT EXISTS bot_blocked BOOLEAN DEFAULT false
             ''')
-            
-            # AI Chats table
             await conn.execute('''
-                CREATE TABLE IF NOT EXISTS ai_chats (
-                    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-                    user_id BIGINT REFERENCES users(user_id),
-                    message TEXT NOT NULL,
-                    response TEXT NOT NULL,
-                    model_used VARCHAR(20) DEFAULT 'gemini',
-                    is_voice BOOLEAN DEFAULT false,
-                    timestamp TIMESTAMP DEFAULT NOW(),
-                    sentiment_score FLOAT,
-                    crisis_flag BOOLEAN DEFAULT false
-                )
+                ALTER TABLE users ADD COLUMN IF NOT EXISTS ai_context_reset_at TIMESTAMP
             ''')
             
+            # Mood check-ins and AI chats tables, partitioned by month
+            # (existing unpartitioned tables are migrated in prepare_partitions)
+            for table, columns in PARTITIONED_TABLES.items():
+                await conn.execute(f'''
+                    CREATE TABLE IF NOT EXISTS {table} ({columns})
+                    PARTITION BY RANGE (timestamp)
+                ''')
+            
             # Recommendations table
             await conn.execute('''
                 CREATE TABLE IF NOT EXISTS recommendations (
@@ -199,6 +277,103 @@ class DatabaseManager:
                 )
             ''')
             
+            # Crisis alert outbox (pending admin notifications)
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS crisis_alert_outbox (
+                    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+                    user_id BIGINT NOT NULL,
+                    source VARCHAR(20) NOT NULL,
+                    priority SMALLINT NOT NULL,
+                    message TEXT,
+                    indicators TEXT[],
+                    confidence FLOAT DEFAULT 0,
+                    created_at TIMESTAMPTZ DEFAULT NOW(),
+                    delivered_at TIMESTAMPTZ,
+                    attempts INTEGER DEFAULT 0,
+                    last_error TEXT,
+                    claimed_by TEXT,
+                    claimed_until TIMESTAMPTZ
+                )
+            ''')
+            await conn.execute('''
+                ALTER TABLE crisis_alert_outbox ADD COLUMN IF NOT EXISTS claimed_by TEXT,
+                ADD COLUMN IF NOT EXISTS claimed_until TIMESTAMPTZ
+            ''')
+            # Outboxes created before claims stored naive local timestamps
+            await conn.execute('''
+                DO $$
+                BEGIN
+                    IF (SELECT data_type FROM information_schema.columns
+                        WHERE table_name = 'crisis_alert_outbox' AND column_name = 'created_at'
+                    ) = 'timestamp without time zone' THEN
+                        ALTER TABLE crisis_alert_outbox
+                            ALTER COLUMN created_at TYPE TIMESTAMPTZ,
+                            ALTER COLUMN delivered_at TYPE TIMESTAMPTZ;
+                    END IF;
+                END $$
+            ''')
+            
+            # Broadcast jobs (progress is saved so a restart resumes the job)
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS broadcast_jobs (
+                    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+                    kind VARCHAR(30) NOT NULL,
+                    audience VARCHAR(30) NOT NULL,
+                    messages JSONB NOT NULL,
+                    status VARCHAR(20) DEFAULT 'running',
+                    last_user_id BIGINT DEFAULT 0,
+                    sent INTEGER DEFAULT 0,
+                    failed INTEGER DEFAULT 0,
+                    blocked INTEGER DEFAULT 0,
+                    created_by BIGINT,
+                    created_at TIMESTAMP DEFAULT NOW(),
+                    updated_at TIMESTAMP DEFAULT NOW(),
+                    finished_at TIMESTAMP
+                )
+            ''')
+            
+            # Scheduled job state (last run of each job, used for catch-up)
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS scheduler_jobs (
+                    name VARCHAR(50) PRIMARY KEY,
+                    last_scheduled_at TIMESTAMP,
+                    last_started_at TIMESTAMP,
+                    last_finished_at TIMESTAMP,
+                    last_status VARCHAR(20),
+                    last_error TEXT,
+                    last_duration FLOAT
+                )
+            ''')
+            
+            # Leases electing the instance that runs a scheduled job or broadcast
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS job_leases (
+                    name VARCHAR(100) PRIMARY KEY,
+                    holder TEXT NOT NULL,
+                    lease_until TIMESTAMPTZ NOT NULL
+                )
+            ''')
+            
+            # Retention cleanup progress per table
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS retention_progress (
+                    table_name VARCHAR(50) PRIMARY KEY,
+                    watermark TIMESTAMP,
+                    deleted_total BIGINT DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT NOW()
+                )
+            ''')
+            
+            # Watermarks of incremental maintenance jobs
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS maintenance_progress (
+                    name VARCHAR(50) PRIMARY KEY,
+                    watermark TIMESTAMP,
+                    processed_total BIGINT DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT NOW()
+                )
+            ''')
+            
             # Create indexes for better performance
             await self.create_indexes(conn)
     
@@ -208,12 +383,15 @@ class DatabaseManager:
             'CREATE INDEX IF NOT EXISTS idx_users_referral_code ON users(referral_code)',
             'CREATE INDEX IF NOT EXISTS idx_mood_checkins_user_id ON mood_checkins(user_id)',
             'CREATE INDEX IF NOT EXISTS idx_mood_checkins_timestamp ON mood_checkins(timestamp DESC)',
+            'CREATE INDEX IF NOT EXISTS idx_mood_checkins_user_timestamp ON mood_checkins(user_id, timestamp DESC)',
             'CREATE INDEX IF NOT EXISTS idx_ai_chats_user_id ON ai_chats(user_id)',
             'CREATE INDEX IF NOT EXISTS idx_ai_chats_timestamp ON ai_chats(timestamp DESC)',
+            'CREATE INDEX IF NOT EXISTS idx_ai_chats_unscored ON ai_chats(timestamp, id) WHERE sentiment_score IS NULL',
             'CREATE INDEX IF NOT EXISTS idx_consultations_user_id ON consultations(user_id)',
             'CREATE INDEX IF NOT EXISTS idx_telemedicine_user_id ON telemedicine_appointments(user_id)',
             'CREATE INDEX IF NOT EXISTS idx_legal_category ON legal_documents(category)',
-            'CREATE INDEX IF NOT EXISTS idx_legal_language ON legal_documents(language)'
+            'CREATE INDEX IF NOT EXISTS idx_legal_language ON legal_documents(language)',
+            'CREATE INDEX IF NOT EXISTS idx_crisis_alert_pending ON crisis_alert_outbox(priority, created_at) WHERE delivered_at IS NULL'
         ]
         
         for index_sql in indexes:
@@ -222,6 +400,241 @@ class DatabaseManager:
             except Exception as e:
                 logger.warning(f"Index creation failed: {e}")
     
+    # Partitioning methods
+    async def _is_partitioned(self, conn, table: str) -> bool:
+        relkind = await conn.fetchval('SELECT relkind FROM pg_class WHERE oid = to_regclass($1)', table)
+        return relkind == 'p'
+    
+    async def _get_partitions(self, conn, table: str) -> List[Dict]:
+        """List partitions of a table with their range bounds (None for MINVALUE)"""
+        rows = await conn.fetch('''
+            SELECT c.relname AS name, pg_get_expr(c.relpartbound, c.oid) AS bound
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass($1)
+        ''', table)
+        
+        partitions = []
+        for row in rows:
+            bounds = parse_partition_bounds(row['bound'])
+            partitions.append({
+                'name': row['name'],
+                'default': bounds is None,
+                'lower': bounds[0] if bounds else None,
+                'upper': bounds[1] if bounds else None
+            })
+        return sorted(partitions, key=lambda p: (p['default'], p['upper'] or datetime.max))
+    
+    async def prepare_partitions(self):
+        """Migrate unpartitioned tables if enabled and create upcoming partitions"""
+        if config.get('DB_PARTITION_MIGRATE', True):
+            migrated = False
+            for table in PARTITIONED_TABLES:
+                try:
+                    migrated |= await self.migrate_to_partitioned(table)
+                except Exception as e:
+                    # The unpartitioned table keeps working; retention falls back to row deletes
+                    logger.error(f"Error migrating {table} to partitions: {e}")
+            if migrated:
+                async with self.pool.acquire() as conn:
+                    await self.create_indexes(conn)
+        
+        await self.ensure_partitions()
+    
+    async def migrate_to_partitioned(self, table: str) -> bool:
+        """
+        Convert an existing unpartitioned table without copying its rows: the
+        old table is renamed to <table>_legacy and attached as the partition
+        for everything before next month; new monthly partitions follow it.
+        Retention deletes legacy rows in batches until the whole legacy
+        partition has expired and can be dropped.
+        """
+        async with self.pool.acquire() as conn:
+            # Only one instance migrates; the others wait and then find it done
+            await conn.execute(
+                'SELECT pg_advisory_lock($1, hashtext($2))', ADVISORY_LOCK_NAMESPACE, f"partition:{table}"
+            )
+            try:
+                relkind = await conn.fetchval('SELECT relkind FROM pg_class WHERE oid = to_regclass($1)', table)
+                if relkind != 'r':
+                    return False
+                
+                legacy = legacy_name(table)
+                boundary = add_months(month_start(datetime.now()), 1)
+                logger.info(f"Migrating {table} to monthly partitions (legacy rows before {boundary:%Y-%m-%d})")
+                
+                # Prepare the old table so attaching it needs no long locks:
+                # a unique index matching the new primary key and a validated
+                # range check (VALIDATE only takes a SHARE UPDATE EXCLUSIVE lock).
+                # Each step checks what an interrupted earlier run left behind.
+                await conn.execute(f"UPDATE {table} SET timestamp = 'epoch' WHERE timestamp IS NULL")
+                
+                index_valid = await conn.fetchval(
+                    'SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass($1)', f"{legacy}_id_timestamp"
+                )
+                if index_valid is False:
+                    # A failed concurrent build leaves an invalid index that IF NOT EXISTS would keep
+                    logger.warning(f"Rebuilding invalid index {legacy}_id_timestamp")
+                    await conn.execute(f'DROP INDEX CONCURRENTLY {legacy}_id_timestamp')
+                if not index_valid:
+                    await conn.execute(f'''
+                        CREATE UNIQUE INDEX CONCURRENTLY {legacy}_id_timestamp
+                        ON {table} (id, timestamp)
+                    ''')
+                
+                constraint = await conn.fetchrow('''
+                    SELECT convalidated, pg_get_constraintdef(oid) AS definition
+                    FROM pg_constraint
+                    WHERE conrelid = to_regclass($1) AND conname = $2
+                ''', table, f"{legacy}_range")
+                if constraint and f"'{boundary}'" not in constraint['definition']:
+                    # Left by a run in an earlier month; its bound no longer matches
+                    await conn.execute(f'ALTER TABLE {table} DROP CONSTRAINT {legacy}_range')
+                    constraint = None
+                if constraint is None:
+                    await conn.execute(f'''
+                        ALTER TABLE {table} ADD CONSTRAINT {legacy}_range
+                        CHECK (timestamp IS NOT NULL AND timestamp < '{boundary.isoformat()}') NOT VALID
+                    ''')
+                if not (constraint and constraint['convalidated']):
+                    await conn.execute(f'ALTER TABLE {table} VALIDATE CONSTRAINT {legacy}_range')
+                await conn.execute(f'ALTER TABLE {table} ALTER COLUMN timestamp SET NOT NULL')
+                
+                index_names = await conn.fetch('''
+                    SELECT indexname FROM pg_indexes
+                    WHERE tablename = $1 AND indexname NOT LIKE $2
+                ''', table, f"{legacy}%")
+                
+                async with conn.transaction():
+                    await conn.execute(f'ALTER TABLE {table} RENAME TO {legacy}')
+                    # Index names are schema-wide; free them for the new parent table
+                    for row in index_names:
+                        old_name = row['indexname']
+                        new_name = old_name.replace(table, legacy, 1) if table in old_name else f"{legacy}_{old_name}"
+                        await conn.execute(f'ALTER INDEX {old_name} RENAME TO {new_name}')
+                    
+                    await conn.execute(f'''
+                        CREATE TABLE {table} ({PARTITIONED_TABLES[table]})
+                        PARTITION BY RANGE (timestamp)
+                    ''')
+                    await conn.execute(f'''
+                        ALTER TABLE {table} ATTACH PARTITION {legacy}
+                        FOR VALUES FROM (MINVALUE) TO ('{boundary.isoformat()}')
+                    ''')
+                
+                logger.info(f"{table} migrated to monthly partitions")
+                return True
+            finally:
+                await conn.execute(
+                    'SELECT pg_advisory_unlock($1, hashtext($2))', ADVISORY_LOCK_NAMESPACE, f"partition:{table}"
+                )
+    
+    async def ensure_partitions(self, months_ahead: int = None) -> int:
+        """Create monthly partitions up to `months_ahead` months from now; returns number created"""
+        try:
+            if not self.pool:
+                logger.warning("Database pool not initialized")
+                return 0
+            
+            months_ahead = months_ahead if months_ahead is not None else config.get('DB_PARTITION_MONTHS_AHEAD', 3)
+            current = month_start(datetime.now())
+            created = 0
+            
+            async with self.pool.acquire() as conn:
+                for table in PARTITIONED_TABLES:
+                    if not await self._is_partitioned(conn, table):
+                        continue
+                    
+                    partitions = await self._get_partitions(conn, table)
+                    uppers = [p['upper'] for p in partitions if not p['default'] and p['upper']]
+                    month = max([current] + uppers)
+                    
+                    while month <= add_months(current, months_ahead):
+                        next_month = add_months(month, 1)
+                        await conn.execute(f'''
+                            CREATE TABLE IF NOT EXISTS {partition_name(table, month)}
+                            PARTITION OF {table}
+                            FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month.isoformat()}')
+                        ''')
+                        created += 1
+                        month = next_month
+                    
+                    # Catches rows outside every range instead of failing the insert
+                    await conn.execute(f'''
+                        CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT
+                    ''')
+            
+            if created:
+                logger.info(f"Created {created} table partitions")
+            return created
+        except Exception as e:
+            logger.error(f"Error creating partitions: {e}")
+            return 0
+    
+    async def drop_expired_partitions(
+        self, table: str, cutoff: datetime,
+        archive: Optional[Callable[[str, List[Dict]], Awaitable[None]]] = None
+    ) -> List[str]:
+        """
+        Drop partitions whose whole range is older than cutoff. With an archive
+        hook their rows are passed to it in batches before the drop.
+        """
+        if table not in PARTITIONED_TABLES:
+            raise ValueError(f"Table {table} is not partitioned")
+        if not self.pool:
+            return []
+        
+        dropped = []
+        async with self.pool.acquire() as conn:
+            if not await self._is_partitioned(conn, table):
+                return []
+            
+            for partition in await self._get_partitions(conn, table):
+                if partition['default'] or not partition['upper'] or partition['upper'] > cutoff:
+                    continue
+                
+                async with conn.transaction():
+                    if archive:
+                        batch = []
+                        async for row in conn.cursor(f'SELECT * FROM {partition["name"]}', prefetch=5000):
+                            batch.append(dict(row))
+                            if len(batch) >= 5000:
+                                await archive(table, batch)
+                                batch = []
+                        if batch:
+                            await archive(table, batch)
+                    
+                    await conn.execute(f'ALTER TABLE {table} DETACH PARTITION {partition["name"]}')
+                    await conn.execute(f'DROP TABLE {partition["name"]}')
+                
+                logger.info(f"Dropped expired partition {partition['name']}")
+                dropped.append(partition['name'])
+        
+        return dropped
+    
+    async def get_partition_floor(self, table: str) -> Optional[datetime]:
+        """
+        Lower bound of the oldest monthly partition of a table. Older rows live
+        in the legacy or default partition and still need row-level deletes.
+        Returns None if the table is not partitioned.
+        """
+        try:
+            if not self.pool:
+                return None
+            
+            async with self.pool.acquire() as conn:
+                if not await self._is_partitioned(conn, table):
+                    return None
+                
+                lowers = [
+                    p['lower'] for p in await self._get_partitions(conn, table)
+                    if p['name'].startswith(f"{table}_p") and p['lower']
+                ]
+                return min(lowers) if lowers else add_months(month_start(datetime.now()), 1)
+        except Exception as e:
+            logger.error(f"Error getting partition floor: {e}")
+            return None
+    
     # User management methods
     async def create_user(self, user: User) -> bool:
         """Create a new user"""
@@ -241,7 +654,7 @@ class DatabaseManager:
                         username = EXCLUDED.username,
                         first_name = EXCLUDED.first_name,
                         last_name = EXCLUDED.last_name,
-                        last_activity = NOW()
+                        bot_blocked = false
                 ''', user.user_id, user.username, user.first_name, user.last_name,
                 user.language, user.role.value, user.subscription_status.value,
                 user.referral_code, user.referred_by, user.is_veteran,
@@ -258,6 +671,25 @@ class DatabaseManager:
             logger.error(f"Error creating user: {e}")
             return False
     
+    async def update_last_activity(self, user_ids: List[int], timestamps: List[datetime]):
+        """
+        Set last_activity of many users in one statement; never moves it backwards.
+        A user who sends anything has unblocked the bot, so bot_blocked is cleared too.
+        """
+        if not self.pool:
+            logger.warning("Database pool not initialized")
+            return
+        
+        async with self.pool.acquire() as conn:
+            await conn.execute('''
+                UPDATE users u SET
+                    last_activity = GREATEST(u.last_activity, a.last_activity),
+                    bot_blocked = false
+                FROM unnest($1::bigint[], $2::timestamp[]) AS a(user_id, last_activity)
+                WHERE u.user_id = a.user_id
+                AND (u.last_activity IS NULL OR u.last_activity < a.last_activity OR u.bot_blocked)
+            ''', user_ids, timestamps)
+    
     async def get_user(self, user_id: int) -> Optional[User]:
         """Get user by ID"""
         try:
@@ -387,11 +819,14 @@ class DatabaseManager:
     
     # AI Chat methods
     async def save_ai_chat(self, chat: AIChat) -> bool:
-        """Save AI chat interaction"""
+        """Save AI chat interaction; the user's message is scored for sentiment if not yet"""
         try:
             if not self.pool:
                 logger.warning("Database pool not initialized")
                 return False
+            
+            if chat.sentiment_score is None:
+                chat.sentiment_score = sentiment_scorer.score(chat.message)
                 
             async with self.pool.acquire() as conn:
                 await conn.execute('''
@@ -410,6 +845,665 @@ class DatabaseManager:
         except Exception as e:
             logger.error(f"Error saving AI chat: {e}")
             return False
+
+    async def get_recent_ai_chats(self, user_id: int, limit: int = 12) -> List[Dict]:
+        """Get user's most recent AI chat turns since the last context reset, oldest first"""
+        try:
+            if not self.pool:
+                logger.warning("Database pool not initialized")
+                return []
+
+            async with self.pool.acquire() as conn:
+                rows = await conn.fetch('''
+                    SELECT message, response, timestamp
+                    FROM ai_chats
+                    WHERE user_id = $1
+                    AND timestamp > COALESCE(
+                        (SELECT ai_context_reset_at FROM users WHERE user_id = $1),
+                        '-infinity'::timestamp
+                    )
+                    ORDER BY timestamp DESC
+                    LIMIT $2
+                ''', user_id, limit)
+
+                return [dict(row) for row in reversed(rows)]
+        except Exception as e:
+            logger.error(f"Error getting recent AI chats: {e}")
+            return []
+
+    async def reset_ai_context(self, user_id: int) -> bool:
+        """Hide earlier AI chat turns from the conversation context"""
+        try:
+            if not self.pool:
+                logger.warning("Database pool not initialized")
+                return False
+
+            async with self.pool.acquire() as conn:
+                await conn.execute('''
+                    UPDATE users SET ai_context_reset_at = NOW()
+                    WHERE user_id = $1
+                ''', user_id)
+
+                return True
+        except Exception as e:
+            logger.error(f"Error resetting AI context: {e}")
+            return False
+
+    # Crisis alert outbox methods
+    async def create_crisis_alert(self, user_id: int, source: str, priority: int,
+                                  message: str, indicators: List[str], confidence: float,
+                                  owner: str = None, lease_seconds: float = 0) -> Optional[str]:
+        """Persist a crisis alert before it is delivered, claimed by the instance that raised it"""
+        try:
+            if not self.pool:
+                logger.warning("Database pool not initialized")
+                return None
+                
+            async with self.pool.acquire() as conn:
+                alert_id = await conn.fetchval('''
+                    INSERT INTO crisis_alert_outbox
+                        (user_id, source, priority, message, indicators, confidence, claimed_by, claimed_until)
+                    VALUES ($1, $2, $3, $4, $5, $6, $7, NOW() + make_interval(secs => $8))
+                    RETURNING id
+                ''', user_id, source, priority, message, indicators, confidence, owner, lease_seconds)
+                
+                return str(alert_id)
+        except Exception as e:
+            logger.error(f"Error creating crisis alert: {e}")
+            return None
+    
+    async def claim_crisis_alerts(self, owner: str, lease_seconds: float, limit: int = 100) -> List[Dict]:
+        """
+        Claim undelivered crisis alerts that nobody holds, and extend the lease
+        on the ones the owner already holds. Each alert is claimed by one
+        instance at a time; an instance that stops renewing loses its claims
+        when the lease runs out.
+        """
+        try:
+            if not self.pool:
+                logger.warning("Database pool not initialized")
+                return []
+                
+            async with self.pool.acquire() as conn:
+                await conn.execute('''
+                    UPDATE crisis_alert_outbox
+                    SET claimed_until = NOW() + make_interval(secs => $2)
+                    WHERE claimed_by = $1 AND delivered_at IS NULL
+                ''', owner, lease_seconds)
+                
+                rows = await conn.fetch('''
+                    UPDATE crisis_alert_outbox o
+                    SET claimed_by = $1, claimed_until = NOW() + make_interval(secs => $2)
+                    FROM (
+                        SELECT id FROM crisis_alert_outbox
+                        WHERE delivered_at IS NULL
+                        AND (claimed_until IS NULL OR claimed_until < NOW())
+                        ORDER BY priority, created_at
+                        LIMIT $3
+                        FOR UPDATE SKIP LOCKED
+                    ) c
+                    WHERE o.id = c.id
+                    RETURNING o.id, o.user_id, o.source, o.priority, o.message,
+                              o.indicators, o.confidence, o.created_at, o.attempts
+                ''', owner, lease_seconds, limit)
+                
+                return [dict(row) for row in rows]
+        except Exception as e:
+            logger.error(f"Error claiming crisis alerts: {e}")
+            return []
+    
+    async def mark_crisis_alert_delivered(self, alert_id: str) -> bool:
+        """Mark crisis alert as delivered"""
+        try:
+            if not self.pool:
+                return False
+                
+            async with self.pool.acquire() as conn:
+                await conn.execute('''
+                    UPDATE crisis_alert_outbox
+                    SET delivered_at = NOW(), attempts = attempts + 1
+                    WHERE id = $1
+                ''', alert_id)
+                
+                return True
+        except Exception as e:
+            logger.error(f"Error marking crisis alert delivered: {e}")
+            return False
+    
+    async def release_crisis_alert(self, alert_id: str, error: str, retry_in: float) -> bool:
+        """Record a failed delivery attempt and let any instance retry the alert after retry_in seconds"""
+        try:
+            if not self.pool:
+                return False
+                
+            async with self.pool.acquire() as conn:
+                await conn.execute('''
+                    UPDATE crisis_alert_outbox
+                    SET attempts = attempts + 1, last_error = $2,
+                        claimed_by = NULL, claimed_until = NOW() + make_interval(secs => $3)
+                    WHERE id = $1
+                ''', alert_id, error[:500], retry_in)
+                
+                return True
+        except Exception as e:
+            logger.error(f"Error recording crisis alert failure: {e}")
+            return False
+    
+    async def release_crisis_alert_claims(self, owner: str) -> bool:
+        """Hand the owner's undelivered alerts back at once (on shutdown)"""
+        try:
+            if not self.pool:
+                return False
+                
+            async with self.pool.acquire() as conn:
+                await conn.execute('''
+                    UPDATE crisis_alert_outbox
+                    SET claimed_by = NULL, claimed_until = NULL
+                    WHERE claimed_by = $1 AND delivered_at IS NULL
+                ''', owner)
+                
+                return True
+        except Exception as e:
+            logger.error(f"Error releasing crisis alert claims: {e}")
+            return False
+    
+    # Broadcast methods
+    async def create_broadcast_job(self, kind: str, audience: str, messages: Dict[str, str],
+                                   created_by: int = None) -> Optional[str]:
+        """Create a broadcast job; messages maps language to text"""
+        try:
+            if not self.pool:
+                logger.warning("Database pool not initialized")
+                return None
+                
+            async with self.pool.acquire() as conn:
+                job_id = await conn.fetchval('''
+                    INSERT INTO broadcast_jobs (kind, audience, messages, created_by)
+                    VALUES ($1, $2, $3, $4)
+                    RETURNING id
+                ''', kind, audience, json.dumps(messages), created_by)
+                
+                return str(job_id)
+        except Exception as e:
+            logger.error(f"Error creating broadcast job: {e}")
+            return None
+    
+    async def get_running_broadcast_jobs(self) -> List[Dict]:
+        """Get broadcast jobs interrupted before completion"""
+        try:
+            if not self.pool:
+                logger.warning("Database pool not initialized")
+                return []
+                
+            async with self.pool.acquire() as conn:
+                rows = await conn.fetch('''
+                    SELECT * FROM broadcast_jobs
+                    WHERE status = 'running'
+                    ORDER BY created_at
+                ''')
+                
+                jobs = []
+                for row in rows:
+                    job = dict(row)
+                    job['id'] = str(job['id'])
+                    job['messages'] = json.loads(job['messages'])
+                    jobs.append(job)
+                return jobs
+        except Exception as e:
+            logger.error(f"Error getting running broadcast jobs: {e}")
+            return []
+    
+    async def get_broadcast_job(self, job_id: str) -> Optional[Dict]:
+        """Get broadcast job by id"""
+        try:
+            if not self.pool:
+                return None
+                
+            async with self.pool.acquire() as conn:
+                row = await conn.fetchrow('SELECT * FROM broadcast_jobs WHERE id = $1', job_id)
+                if not row:
+                    return None
+                
+                job = dict(row)
+                job['id'] = str(job['id'])
+                job['messages'] = json.loads(job['messages'])
+                return job
+        except Exception as e:
+            logger.error(f"Error getting broadcast job: {e}")
+            return None
+    
+    async def iter_audience(self, audience: str, after_user_id: int = 0,
+                            page_size: int = None) -> AsyncIterator[Dict]:
+        """
+        Stream broadcast recipients ordered by user_id, `page_size` rows at a
+        time. Each page is its own short query after the last user_id seen
+        (keyset pagination), so a broadcast running for an hour holds neither
+        a connection nor a snapshot between pages.
+        """
+        if not self.pool:
+            logger.warning("Database pool not initialized")
+            return
+        
+        page_size = page_size or config.get('AUDIENCE_PREFETCH', 500)
+        query = build_audience_query(audience) + "\nLIMIT $2"
+        while True:
+            try:
+                async with self.pool.acquire() as conn:
+                    rows = await conn.fetch(query, after_user_id, page_size)
+            except Exception as e:
+                # Re-raise so a broken stream is not mistaken for the end of the audience
+                logger.error(f"Error streaming audience {audience}: {e}")
+                raise
+            
+            for row in rows:
+                yield dict(row)
+            if len(rows) < page_size:
+                return
+            after_user_id = rows[-1]['user_id']
+    
+    async def update_broadcast_job(self, job_id: str, last_user_id: int, sent: int,
+                                   failed: int, blocked: int, status: str = 'running') -> bool:
+        """
+        Save broadcast job progress. Progress of a running job only moves
+        forward, so an instance that lost the job's lease cannot overwrite
+        the progress of the instance that took it over.
+        """
+        try:
+            if not self.pool:
+                return False
+                
+            async with self.pool.acquire() as conn:
+                await conn.execute('''
+                    UPDATE broadcast_jobs SET
+                        last_user_id = $2, sent = $3, failed = $4, blocked = $5,
+                        status = $6, updated_at = NOW(),
+                        finished_at = CASE WHEN $6 = 'running' THEN NULL ELSE NOW() END
+                    WHERE id = $1 AND status = 'running' AND last_user_id <= $2
+                ''', job_id, last_user_id, sent, failed, blocked, status)
+                
+                return True
+        except Exception as e:
+            logger.error(f"Error updating broadcast job: {e}")
+            return False
+    
+    async def mark_users_blocked(self, user_ids: List[int]) -> bool:
+        """Exclude users who blocked the bot from future broadcasts"""
+        try:
+            if not self.pool or not user_ids:
+                return False
+                
+            async with self.pool.acquire() as conn:
+                await conn.execute('''
+                    UPDATE users SET bot_blocked = true
+                    WHERE user_id = ANY($1::bigint[])
+                ''', user_ids)
+                
+                return True
+        except Exception as e:
+            logger.error(f"Error marking users blocked: {e}")
+            return False
+    
+    # Scheduler methods
+    async def get_scheduler_state(self) -> Dict[str, Dict]:
+        """Get last run of every scheduled job by name"""
+        try:
+            if not self.pool:
+                logger.warning("Database pool not initialized")
+                return {}
+                
+            async with self.pool.acquire() as conn:
+                rows = await conn.fetch('SELECT * FROM scheduler_jobs')
+                return {row['name']: dict(row) for row in rows}
+        except Exception as e:
+            logger.error(f"Error getting scheduler state: {e}")
+            return {}
+    
+    async def get_job_state(self, name: str) -> Optional[Dict]:
+        """
+        Get last run of a scheduled job. Errors are raised rather than read
+        as "never ran", which would run the job a second time.
+        """
+        if not self.pool:
+            return None
+        
+        try:
+            async with self.pool.acquire() as conn:
+                row = await conn.fetchrow('SELECT * FROM scheduler_jobs WHERE name = $1', name)
+                return dict(row) if row else None
+        except Exception as e:
+            logger.error(f"Error getting job state: {e}")
+            raise
+    
+    async def _try_lease(self, name: str, holder: str, seconds: float) -> bool:
+        """Take the named lease if it is free or expired"""
+        async with self.pool.acquire() as conn:
+            row = await conn.fetchrow('''
+                INSERT INTO job_leases (name, holder, lease_until)
+                VALUES ($1, $2, NOW() + make_interval(secs => $3))
+                ON CONFLICT (name) DO UPDATE
+                SET holder = EXCLUDED.holder, lease_until = EXCLUDED.lease_until
+                WHERE job_leases.lease_until < NOW()
+                RETURNING holder
+            ''', name, holder, seconds)
+            return row is not None
+    
+    async def _renew_lease(self, name: str, holder: str, seconds: float) -> bool:
+        """Extend a held lease; False if it has been lost"""
+        async with self.pool.acquire() as conn:
+            result = await conn.execute('''
+                UPDATE job_leases SET lease_until = NOW() + make_interval(secs => $3)
+                WHERE name = $1 AND holder = $2
+            ''', name, holder, seconds)
+            return result != 'UPDATE 0'
+    
+    async def _keep_lease(self, lease: JobLease, holder: str, seconds: float):
+        """Renew the lease until cancelled; sets lease.lost once it cannot be kept"""
+        renewed = asyncio.get_running_loop().time()
+        while True:
+            await asyncio.sleep(seconds / LEASE_RENEWALS_PER_PERIOD)
+            try:
+                if not await self._renew_lease(lease.name, holder, seconds):
+                    logger.error(f"Lease {lease.name} was lost to another instance")
+                    lease.lost.set()
+                    return
+                renewed = asyncio.get_running_loop().time()
+            except Exception as e:
+                logger.error(f"Error renewing lease {lease.name}: {e}")
+                if asyncio.get_running_loop().time() - renewed >= seconds:
+                    logger.error(f"Lease {lease.name} expired: not renewed for {seconds}s")
+                    lease.lost.set()
+                    return
+    
+    @asynccontextmanager
+    async def job_lease(self, name: str):
+        """
+        Try to take the named lease (a row in job_leases with an expiry) and
+        yield a JobLease that is true if it was acquired. While the block runs
+        the lease is renewed in the background; if that fails for a whole
+        JOB_LEASE_SECONDS, or another instance has taken the lease over,
+        JobLease.lost is set and work run through JobLease.guard() is
+        cancelled. The lease is released on exit. No connection is held in
+        between, so long jobs do not take connections away from handlers.
+        Without a database there is nobody to coordinate with, so the lease
+        is always acquired.
+        """
+        if not self.pool:
+            yield JobLease(name, True)
+            return
+        
+        seconds = config.get('JOB_LEASE_SECONDS', 60)
+        holder = uuid.uuid4().hex
+        acquired = False
+        try:
+            acquired = await self._try_lease(name, holder, seconds)
+        except Exception as e:
+            logger.error(f"Error taking lease {name}: {e}")
+        
+        lease = JobLease(name, acquired)
+        if not acquired:
+            yield lease
+            return
+        
+        keeper = asyncio.create_task(self._keep_lease(lease, holder, seconds))
+        try:
+            yield lease
+        finally:
+            keeper.cancel()
+            try:
+                async with self.pool.acquire() as conn:
+                    await conn.execute(
+                        'DELETE FROM job_leases WHERE name = $1 AND holder = $2', name, holder
+                    )
+            except Exception as e:
+                # The lease simply expires
+                logger.error(f"Error releasing lease {name}: {e}")
+    
+    async def record_job_run(self, name: str, scheduled_at: datetime, started_at: datetime,
+                             duration: float, status: str, error: str = None) -> bool:
+        """Save the result of a scheduled job run"""
+        try:
+            if not self.pool:
+                return False
+                
+            async with self.pool.acquire() as conn:
+                await conn.execute('''
+                    INSERT INTO scheduler_jobs (
+                        name, last_scheduled_at, last_started_at, last_finished_at,
+                        last_status, last_error, last_duration
+                    ) VALUES ($1, $2, $3, NOW(), $4, $5, $6)
+                    ON CONFLICT (name) DO UPDATE SET
+                        last_scheduled_at = EXCLUDED.last_scheduled_at,
+                        last_started_at = EXCLUDED.last_started_at,
+                        last_finished_at = EXCLUDED.last_finished_at,
+                        last_status = EXCLUDED.last_status,
+                        last_error = EXCLUDED.last_error,
+                        last_duration = EXCLUDED.last_duration
+                ''', name, scheduled_at, started_at, status, error, duration)
+                
+                return True
+        except Exception as e:
+            logger.error(f"Error recording job run: {e}")
+            return False
+    
+    # Retention methods
+    async def get_retention_watermark(self, table: str) -> Optional[datetime]:
+        """Get timestamp up to which old rows of a table were already deleted"""
+        try:
+            if not self.pool:
+                return None
+                
+            async with self.pool.acquire() as conn:
+                return await conn.fetchval(
+                    'SELECT watermark FROM retention_progress WHERE table_name = $1', table
+                )
+        except Exception as e:
+            logger.error(f"Error getting retention watermark: {e}")
+            return None
+    
+    async def save_retention_watermark(self, table: str, watermark: datetime, deleted: int) -> bool:
+        """Save retention progress for a table"""
+        try:
+            if not self.pool:
+                return False
+                
+            async with self.pool.acquire() as conn:
+                await conn.execute('''
+                    INSERT INTO retention_progress (table_name, watermark, deleted_total, updated_at)
+                    VALUES ($1, $2, $3, NOW())
+                    ON CONFLICT (table_name) DO UPDATE SET
+                        watermark = EXCLUDED.watermark,
+                        deleted_total = retention_progress.deleted_total + EXCLUDED.deleted_total,
+                        updated_at = NOW()
+                ''', table, watermark, deleted)
+                
+                return True
+        except Exception as e:
+            logger.error(f"Error saving retention watermark: {e}")
+            return False
+    
+    async def delete_old_rows_batch(
+        self, table: str, after: Optional[datetime], cutoff: datetime, limit: int,
+        archive: Optional[Callable[[str, List[Dict]], Awaitable[None]]] = None
+    ) -> Tuple[int, Optional[datetime]]:
+        """
+        Delete up to `limit` of the oldest rows with timestamp before cutoff,
+        starting at the `after` watermark, in one short transaction. Locked
+        rows are waited for rather than skipped: the watermark moves past
+        every row of the batch, so a skipped row would never be revisited. If an
+        archive hook is given it receives the rows before they are deleted and
+        an exception from it rolls the batch back.
+        Returns the number of deleted rows and the newest deleted timestamp.
+        """
+        if table not in RETENTION_TABLES:
+            raise ValueError(f"Retention is not enabled for table {table}")
+        if not self.pool:
+            logger.warning("Database pool not initialized")
+            return 0, None
+        
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                rows = await conn.fetch(f'''
+                    SELECT * FROM {table}
+                    WHERE timestamp >= $1 AND timestamp < $2
+                    ORDER BY timestamp
+                    LIMIT $3
+                    FOR UPDATE
+                ''', after or datetime.min, cutoff, limit)
+                if not rows:
+                    return 0, None
+                
+                if archive:
+                    await archive(table, [dict(row) for row in rows])
+                
+                # The timestamp range lets the planner prune partitions
+                await conn.execute(f'''
+                    DELETE FROM {table}
+                    WHERE id = ANY($1::uuid[])
+                    AND timestamp >= $2 AND timestamp <= $3
+                ''', [row['id'] for row in rows], rows[0]['timestamp'], rows[-1]['timestamp'])
+                return len(rows), rows[-1]['timestamp']
+    
+    # Sentiment backfill methods
+    async def get_unscored_ai_chats(self, after: Optional[Tuple[datetime, Any]], limit: int) -> List[Dict]:
+        """
+        Next batch of AI chats without a sentiment score in (timestamp, id)
+        order, after the given key (from the start if None)
+        """
+        if not self.pool:
+            logger.warning("Database pool not initialized")
+            return []
+        
+        async with self.pool.acquire() as conn:
+            if after is None:
+                rows = await conn.fetch('''
+                    SELECT id, timestamp, message FROM ai_chats
+                    WHERE sentiment_score IS NULL
+                    ORDER BY timestamp, id
+                    LIMIT $1
+                ''', limit)
+            else:
+                rows = await conn.fetch('''
+                    SELECT id, timestamp, message FROM ai_chats
+                    WHERE sentiment_score IS NULL AND (timestamp, id) > ($1, $2)
+                    ORDER BY timestamp, id
+                    LIMIT $3
+                ''', after[0], after[1], limit)
+            return [dict(row) for row in rows]
+    
+    async def update_sentiment_scores(self, ids: List[Any], timestamps: List[datetime],
+                                      scores: List[float]) -> int:
+        """Set sentiment_score of many AI chats in one statement; returns rows updated"""
+        if not self.pool:
+            logger.warning("Database pool not initialized")
+            return 0
+        
+        async with self.pool.acquire() as conn:
+            # The timestamp lets the planner go straight to each row's partition
+            result = await conn.execute('''
+                UPDATE ai_chats c SET sentiment_score = s.score
+                FROM unnest($1::uuid[], $2::timestamp[], $3::float8[]) AS s(id, timestamp, score)
+                WHERE c.id = s.id AND c.timestamp = s.timestamp
+                AND c.sentiment_score IS NULL
+            ''', ids, timestamps, scores)
+            return int(result.split()[-1])
+    
+    # User stats maintenance methods
+    async def get_maintenance_watermark(self, name: str) -> Optional[datetime]:
+        """Get the watermark saved by the last run of a maintenance job"""
+        try:
+            if not self.pool:
+                logger.warning("Database pool not initialized")
+                return None
+                
+            async with self.pool.acquire() as conn:
+                return await conn.fetchval(
+                    'SELECT watermark FROM maintenance_progress WHERE name = $1', name
+                )
+        except Exception as e:
+            logger.error(f"Error getting maintenance watermark: {e}")
+            return None
+    
+    async def save_maintenance_watermark(self, name: str, watermark: datetime, processed: int) -> bool:
+        """Save the watermark of a maintenance job"""
+        try:
+            if not self.pool:
+                logger.warning("Database pool not initialized")
+                return False
+                
+            async with self.pool.acquire() as conn:
+                await conn.execute('''
+                    INSERT INTO maintenance_progress (name, watermark, processed_total, updated_at)
+                    VALUES ($1, $2, $3, NOW())
+                    ON CONFLICT (name) DO UPDATE SET
+                        watermark = EXCLUDED.watermark,
+                        processed_total = maintenance_progress.processed_total + EXCLUDED.processed_total,
+                        updated_at = NOW()
+                ''', name, watermark, processed)
+                
+                return True
+        except Exception as e:
+            logger.error(f"Error saving maintenance watermark: {e}")
+            return False
+    
+    async def get_users_active_since(self, since: Optional[datetime]) -> Tuple[List[int], datetime]:
+        """
+        Users with check-ins or AI chats since the watermark (every user with
+        stats if there is none), plus the database time the list was taken at
+        to be used as the next watermark
+        """
+        if not self.pool:
+            logger.warning("Database pool not initialized")
+            return [], datetime.now()
+        
+        async with self.pool.acquire() as conn:
+            taken_at = await conn.fetchval('SELECT LOCALTIMESTAMP')
+            if since is None:
+                rows = await conn.fetch('SELECT user_id FROM user_stats ORDER BY user_id')
+            else:
+                rows = await conn.fetch('''
+                    SELECT user_id FROM mood_checkins WHERE timestamp >= $1
+                    UNION
+                    SELECT user_id FROM ai_chats WHERE timestamp >= $1
+                    ORDER BY user_id
+                ''', since)
+            return [row['user_id'] for row in rows if row['user_id'] is not None], taken_at
+    
+    async def recompute_user_stats_batch(self, user_ids: List[int], dry_run: bool = False) -> List[Dict]:
+        """
+        Recompute total_check_ins, average_mood and ai_chats_count of a batch
+        of users from the source tables. Only rows that drifted are written.
+        Returns the drifted users with old_<field> and <field> values; with
+        dry_run nothing is written.
+        """
+        if not self.pool:
+            logger.warning("Database pool not initialized")
+            return []
+        
+        old = "s" if dry_run else "o"
+        columns = ", ".join(f"{old}.{field} AS old_{field}, f.{field}" for field in USER_STATS_FIELDS)
+        if dry_run:
+            query = f'''{USER_STATS_FRESH_CTE}
+                SELECT s.user_id, {columns}
+                FROM fresh f
+                JOIN user_stats s ON s.user_id = f.user_id
+                WHERE {USER_STATS_DRIFT_CONDITION}
+            '''
+        else:
+            # The second user_stats reference (o) reads the pre-update row for the report
+            query = f'''{USER_STATS_FRESH_CTE}
+                UPDATE user_stats s SET
+                    total_check_ins = f.total_check_ins,
+                    average_mood = f.average_mood,
+                    ai_chats_count = f.ai_chats_count
+                FROM fresh f, user_stats o
+                WHERE s.user_id = f.user_id AND o.user_id = f.user_id
+                AND {USER_STATS_DRIFT_CONDITION}
+                RETURNING s.user_id, {columns}
+            '''
+        
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(query, user_ids)
+            return [dict(row) for row in rows]
     
     # Recommendations methods
     async def get_recommendations(self, category: str = None, language: str = "uk", 
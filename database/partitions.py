@@ -0,0 +1,69 @@
+import re
+from datetime import datetime
+from typing import Optional
+
+# Append-heavy tables partitioned by month on their timestamp column.
+# The partition key has to be part of the primary key.
+PARTITIONED_TABLES = {
+    "mood_checkins": '''
+        id UUID DEFAULT gen_random_uuid(),
+        user_id BIGINT REFERENCES users(user_id),
+        mood_level INTEGER CHECK (mood_level >= 1 AND mood_level <= 10),
+        note TEXT,
+        timestamp TIMESTAMP NOT NULL DEFAULT NOW(),
+        ai_analysis JSONB,
+        recommended_actions TEXT[],
+        PRIMARY KEY (id, timestamp)
+    ''',
+    "ai_chats": '''
+        id UUID DEFAULT gen_random_uuid(),
+        user_id BIGINT REFERENCES users(user_id),
+        message TEXT NOT NULL,
+        response TEXT NOT NULL,
+        model_used VARCHAR(20) DEFAULT 'gemini',
+        is_voice BOOLEAN DEFAULT false,
+        timestamp TIMESTAMP NOT NULL DEFAULT NOW(),
+        sentiment_score FLOAT,
+        crisis_flag BOOLEAN DEFAULT false,
+        PRIMARY KEY (id, timestamp)
+    ''',
+}
+
+BOUND_RE = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+
+
+def month_start(moment: datetime) -> datetime:
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(moment: datetime, months: int) -> datetime:
+    """Shift the first day of a month by a number of months"""
+    index = moment.year * 12 + moment.month - 1 + months
+    return moment.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def legacy_name(table: str) -> str:
+    """Name of the pre-partitioning table once attached as a partition"""
+    return f"{table}_legacy"
+
+
+def _parse_bound(value: str) -> Optional[datetime]:
+    value = value.strip()
+    if value in ("MINVALUE", "MAXVALUE"):
+        return None
+    return datetime.fromisoformat(value.strip("'"))
+
+
+def parse_partition_bounds(expression: str):
+    """
+    Parse pg_get_expr(relpartbound) of a range partition into (lower, upper);
+    MINVALUE/MAXVALUE become None. Returns None for the DEFAULT partition.
+    """
+    match = BOUND_RE.search(expression)
+    if not match:
+        return None
+    return _parse_bound(match.group(1)), _parse_bound(match.group(2))
@@ -2,9 +2,14 @@ from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
 from aiogram.filters import Command
 from datetime import datetime, timedelta
+import html
+import json
 
 from database.db_manager import db_manager
 from config import config
+from services.broadcast import JOB_ID_PREFIX_LENGTH, broadcast_engine
+from services.user_stats import user_stats_recomputer
+from utils.metrics import metrics
 
 router = Router()
 
@@ -21,7 +26,10 @@ async def admin_panel(message: Message):
     admin_text += "/stats - Bot statistics\n"
     admin_text += "/users - User management\n"
     admin_text += "/broadcast - Send broadcast message\n"
+    admin_text += "/broadcast_cancel - Cancel running broadcast\n"
     admin_text += "/maintenance - Toggle maintenance mode\n"
+    admin_text += "/metrics - Performance metrics\n"
+    admin_text += "/stats_drift - Check user stats drift (dry run)\n"
     admin_text += "/logs - View recent logs"
     
     await message.answer(admin_text, parse_mode="Markdown")
@@ -137,37 +145,84 @@ async def broadcast_message(message: Message):
     broadcast_text = text_parts[1]
     
     try:
-        async with db_manager.pool.acquire() as conn:
-            # Get all active users
-            users = await conn.fetch('''
-                SELECT user_id FROM users 
-                WHERE last_activity >= NOW() - INTERVAL '30 days'
-            ''')
+        job_id = await broadcast_engine.submit(
+            "admin",
+            "active_30d",
+            {"uk": f"📢 <b>Повідомлення від адміністрації:</b>\n\n{html.escape(broadcast_text)}"},
+            created_by=message.from_user.id
+        )
+        if not job_id:
+            await message.answer("❌ Broadcast could not be started")
+            return
         
-        sent_count = 0
-        failed_count = 0
+        await message.answer(f"📢 Broadcast <code>{job_id[:JOB_ID_PREFIX_LENGTH]}</code> started, progress will be posted here")
+        
+    except Exception as e:
+        await message.answer(f"❌ Broadcast error: {e}")
+
+@router.message(Command("broadcast_cancel"))
+async def cancel_broadcast(message: Message):
+    """Cancel a running broadcast job"""
+    if str(message.from_user.id) != config.get('ADMIN_CHAT_ID'):
+        return
+    
+    text_parts = message.text.split(' ', 1)
+    if len(text_parts) < 2:
+        await message.answer("Usage: /broadcast_cancel <job id>")
+        return
+    
+    result = broadcast_engine.cancel(text_parts[1].strip())
+    if result == "cancelled":
+        await message.answer("🛑 Broadcast will stop after messages in flight")
+    elif result == "ambiguous":
+        await message.answer("❌ Several running broadcasts match this id, give more characters")
+    else:
+        await message.answer(f"❌ No running broadcast with this id (give at least {JOB_ID_PREFIX_LENGTH} characters)")
+
+@router.message(Command("metrics"))
+async def performance_metrics(message: Message):
+    """Show in-process performance metrics"""
+    if str(message.from_user.id) != config.get('ADMIN_CHAT_ID'):
+        return
+    
+    try:
+        snapshot = metrics.snapshot()
+        metrics_text = "📈 <b>Performance Metrics</b>\n\n"
+        metrics_text += f"⏱ Uptime: {snapshot['uptime_seconds'] / 3600:.1f}h\n\n"
+        services_json = json.dumps(snapshot['services'], indent=1, ensure_ascii=False)
+        metrics_text += f"<pre>{html.escape(services_json[:3500])}</pre>"
         
-        await message.answer(f"📢 Starting broadcast to {len(users)} users...")
+        await message.answer(metrics_text, parse_mode="HTML")
         
-        for user in users:
-            try:
-                await message.bot.send_message(
-                    user['user_id'], 
-                    f"📢 **Повідомлення від адміністрації:**\n\n{broadcast_text}",
-                    parse_mode="Markdown"
-                )
-                sent_count += 1
-            except Exception:
-                failed_count += 1
+    except Exception as e:
+        await message.answer(f"❌ Error getting metrics: {e}")
+
+@router.message(Command("stats_drift"))
+async def user_stats_drift(message: Message):
+    """Dry-run the user stats recompute and report counter drift"""
+    if str(message.from_user.id) != config.get('ADMIN_CHAT_ID'):
+        return
+    
+    try:
+        # "/stats_drift full" checks every user instead of those active since the last run
+        full = message.text.split()[-1] == "full"
+        await message.answer("⏳ Checking user stats drift...")
+        report = await user_stats_recomputer.run(dry_run=True, full=full)
         
-        result_text = f"✅ Broadcast completed!\n"
-        result_text += f"• Sent: {sent_count}\n"
-        result_text += f"• Failed: {failed_count}"
+        drift_text = "📐 <b>User Stats Drift</b>\n\n"
+        drift_text += f"Users checked: {report['users_checked']}\n"
+        drift_text += f"Users drifted: {report['users_drifted']}\n\n"
+        for field, totals in report['fields'].items():
+            drift_text += (f"• {field}: {totals['drifted']} users, "
+                           f"max {totals['max_abs']:.2f}, total {totals['total_abs']:.2f}\n")
+        if report['worst']:
+            worst_json = json.dumps(report['worst'][:5], indent=1, default=str)
+            drift_text += f"\n<pre>{html.escape(worst_json[:2500])}</pre>"
         
-        await message.answer(result_text)
+        await message.answer(drift_text, parse_mode="HTML")
         
     except Exception as e:
-        await message.answer(f"❌ Broadcast error: {e}")
+        await message.answer(f"❌ Error checking stats drift: {e}")
 
 @router.message(Command("maintenance"))
 async def toggle_maintenance(message: Message):
@@ -198,20 +253,17 @@ async def view_logs(message: Message):
         await message.answer(f"❌ Error getting logs: {e}")
 
 # Crisis detection and admin notifications
-async def notify_admin_crisis(user_id: int, message_text: str, crisis_indicators: dict):
-    """Notify admin about crisis detection"""
+async def notify_admin_crisis(bot, user_id: int, message_text: str, crisis_indicators: dict,
+                              source: str = "ai_chat", priority: int = 1):
+    """Notify admin about crisis detection. Raises on delivery failure so the alert queue can retry"""
     if not config.get('ADMIN_CHAT_ID'):
         return
-    
-    try:
-        notification_text = f"🚨 **Crisis Alert**\n\n"
-        notification_text += f"User ID: `{user_id}`\n"
-        notification_text += f"Confidence: {crisis_indicators.get('confidence', 0):.2f}\n"
-        notification_text += f"Indicators: {', '.join(crisis_indicators.get('indicators', []))}\n\n"
-        notification_text += f"Message: {message_text[:200]}..."
-        
-        # This would be called from the AI service when crisis is detected
-        # await bot.send_message(config.ADMIN_CHAT_ID, notification_text, parse_mode="Markdown")
-        
-    except Exception as e:
-        print(f"Failed to send crisis notification: {e}")
\ No newline at end of file
+
+    notification_text = "🚨 <b>Crisis Alert</b>\n\n"
+    notification_text += f"User ID: <code>{user_id}</code>\n"
+    notification_text += f"Source: {html.escape(source)} (priority {priority})\n"
+    notification_text += f"Confidence: {crisis_indicators.get('confidence', 0):.2f}\n"
+    notification_text += f"Indicators: {html.escape(', '.join(crisis_indicators.get('indicators', [])) or '-')}\n\n"
+    notification_text += f"Message: {html.escape(message_text[:200])}"
+
+    await bot.send_message(config['ADMIN_CHAT_ID'], notification_text, parse_mode="HTML")
\ No newline at end of file
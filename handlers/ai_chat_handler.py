@@ -1,12 +1,17 @@
 from aiogram import Router, F
+from aiogram.filters import Command
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 
 from database.db_manager import db_manager
 from database.models import AIChat
+from services.admission import AdmissionRejected, admission_controller, request_priority
 from services.ai_service import AIService
-from utils.keyboards import get_ai_chat_keyboard, get_main_menu_keyboard
+from services.crisis_detector import crisis_detector
+from services.crisis_alerts import crisis_alert_queue
+from services.conversation_memory import conversation_memory
+from utils.keyboards import get_ai_chat_keyboard, get_ai_chat_session_keyboard, get_main_menu_keyboard
 from utils.texts import get_text
 
 router = Router()
@@ -31,17 +36,49 @@ async def start_new_chat(callback: CallbackQuery, state: FSMContext, language: s
     
     await callback.message.edit_text(
         get_text("ai_chat_welcome", language) + "\n\n" + get_text("type_your_message", language),
-        reply_markup=None
+        reply_markup=get_ai_chat_session_keyboard(language)
     )
     
+    await conversation_memory.reset(callback.from_user.id)
     await state.set_state(AIChatStates.waiting_for_message)
 
-@router.message(AIChatStates.waiting_for_message)
+@router.message(Command("end_chat"))
+async def end_chat_command(message: Message, state: FSMContext, language: str = "uk"):
+    """Leave AI chat mode"""
+    await state.clear()
+    await conversation_memory.reset(message.from_user.id)
+    await message.answer(
+        get_text("ai_chat_ended", language),
+        reply_markup=get_main_menu_keyboard(language)
+    )
+
+@router.callback_query(F.data == "end_ai_chat")
+async def end_chat_callback(callback: CallbackQuery, state: FSMContext, language: str = "uk"):
+    """Leave AI chat mode from the chat keyboard"""
+    await callback.answer()
+    await state.clear()
+    await conversation_memory.reset(callback.from_user.id)
+    await callback.message.edit_text(
+        get_text("ai_chat_ended", language),
+        reply_markup=get_main_menu_keyboard(language)
+    )
+
+# Commands, voice notes and other media fall through to their own handlers
+@router.message(AIChatStates.waiting_for_message, F.text & ~F.text.startswith("/"))
 async def process_ai_chat_message(message: Message, state: FSMContext, language: str = "uk"):
     """Process AI chat message"""
     user_id = message.from_user.id
     user_message = message.text
     
+    # Check for crisis indicators before waiting for the AI
+    crisis_check = crisis_detector.scan(user_message)
+    if crisis_check["crisis_detected"]:
+        crisis_alert_queue.submit(user_id, "ai_chat", user_message, crisis_check)
+        await message.answer(
+            f"🆘 {get_text('crisis_support_notice', language)}"
+            f"\n{get_text('crisis_hotline', language)}: 7333"
+        )
+    
     # Send processing message
     processing_msg = await message.answer(get_text("ai_processing", language))
     
@@ -58,19 +95,23 @@ async def process_ai_chat_message(message: Message, state: FSMContext, language:
         if recent_moods:
             user_context["current_mood"] = recent_moods[0]["mood_level"]
         
-        # Get AI response
-        ai_service = AIService()
-        ai_result = await ai_service.chat_with_ai(
-            message=user_message,
-            user_context=user_context,
-            language=language
-        )
+        # Provider calls are admitted by priority: crisis, premium, then everyone else
+        priority = request_priority(user, crisis_check["crisis_detected"])
+        async with admission_controller.slot("ai_chat", priority):
+            # Get conversation history from memory
+            history = await conversation_memory.build_context(user_id, user_message)
+            
+            # Get AI response
+            ai_service = AIService()
+            ai_result = await ai_service.chat_with_ai(
+                message=user_message,
+                user_context=user_context,
+                language=language,
+                history=history
+            )
         
         ai_response = ai_result["response"]
         
-        # Check for crisis indicators
-        crisis_check = await ai_service.detect_crisis_indicators(user_message)
-        
         # Save chat to database
         chat = AIChat(
             user_id=user_id,
@@ -82,25 +123,26 @@ async def process_ai_chat_message(message: Message, state: FSMContext, language:
         chat.crisis_flag = crisis_check.get("crisis_detected", False)
         
         await db_manager.save_ai_chat(chat)
+        conversation_memory.add_turn(user_id, user_message, ai_response)
         
         # Delete processing message
         await processing_msg.delete()
         
         # Send AI response
-        response_text = ai_response
+        await message.answer(
+            ai_response,
+            reply_markup=get_ai_chat_session_keyboard(language)
+        )
         
-        # Add crisis support if needed
-        if crisis_check.get("crisis_detected"):
-            response_text += f"\n\n🆘 {get_text('crisis_support_notice', language)}"
-            response_text += f"\n📞 {get_text('crisis_hotline', language)}: 7333"
+        # Stay in chat mode so the next message continues the conversation
         
+    except AdmissionRejected:
+        await processing_msg.delete()
         await message.answer(
-            response_text,
-            reply_markup=get_ai_chat_keyboard(language)
+            get_text("service_busy", language),
+            reply_markup=get_ai_chat_session_keyboard(language)
         )
         
-        await state.clear()
-        
     except Exception as e:
         await processing_msg.delete()
         await message.answer(
@@ -188,7 +230,8 @@ async def ai_advice(callback: CallbackQuery, language: str = "uk"):
             user_context["recent_mood"] = avg_mood
         
         ai_service = AIService()
-        ai_result = await ai_service.chat_with_ai(
+        ai_result = await ai_service.get_cached_response(
+            prompt_type="advice",
             message=advice_prompt,
             user_context=user_context,
             language=language
@@ -232,7 +275,8 @@ async def ai_coping_strategies(callback: CallbackQuery, language: str = "uk"):
         }
         
         ai_service = AIService()
-        ai_result = await ai_service.chat_with_ai(
+        ai_result = await ai_service.get_cached_response(
+            prompt_type="coping",
             message=coping_prompt,
             user_context=user_context,
             language=language
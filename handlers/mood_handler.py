@@ -7,6 +7,8 @@ from datetime import datetime, timedelta
 from database.db_manager import db_manager
 from database.models import MoodCheckIn
 from services.ai_service import AIService
+from services.crisis_alerts import crisis_alert_queue, crisis_priority, PRIORITY_LOW_MOOD
+from services.crisis_detector import crisis_detector
 from utils.keyboards import get_mood_keyboard, get_main_menu_keyboard
 from utils.texts import get_text
 
@@ -142,6 +144,13 @@ async def complete_mood_checkin(message_or_callback, mood_level: int, note: str,
     # Create mood check-in
     checkin = MoodCheckIn(user_id=user_id, mood_level=mood_level, note=note)
     
+    # Alert admins about low mood before the slower AI analysis
+    if mood_level <= 3:
+        crisis_check = crisis_detector.scan(note)
+        priority = crisis_priority(crisis_check) if crisis_check["crisis_detected"] else PRIORITY_LOW_MOOD
+        crisis_alert_queue.submit(user_id, "mood_checkin", f"Mood {mood_level}/10. {note or ''}",
+                                  crisis_check, priority=priority)
+    
     # Get AI analysis if note is provided
     if note:
         ai_service = AIService()
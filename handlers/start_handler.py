@@ -6,6 +6,7 @@ from aiogram.fsm.state import State, StatesGroup
 
 from database.db_manager import db_manager
 from database.models import User, UserRole
+from services.activity_tracker import activity_tracker
 from utils.keyboards import get_main_menu_keyboard
 from utils.texts import get_text
 
@@ -19,6 +20,8 @@ class RegistrationStates(StatesGroup):
 @router.message(CommandStart())
 async def start_command(message: Message, state: FSMContext, language: str = "uk"):
     """Handle /start command"""
+    # /start always leaves any flow in progress (e.g. AI chat)
+    await state.clear()
     user_id = message.from_user.id
     existing_user = await db_manager.get_user(user_id)
     
@@ -102,6 +105,7 @@ async def veteran_status_callback(callback: CallbackQuery, state: FSMContext, la
     success = await db_manager.create_user(user)
     
     if success:
+        activity_tracker.touch(user.user_id)
         welcome_message = get_text("registration_complete", language)
         if is_veteran:
             welcome_message += "\n\n" + get_text("veteran_benefits", language)
@@ -148,17 +152,19 @@ async def help_command(message: Message, language: str = "uk"):
     await message.answer(help_text, reply_markup=get_main_menu_keyboard(language))
 
 @router.message(Command("menu"))
-async def menu_command(message: Message, language: str = "uk"):
+async def menu_command(message: Message, state: FSMContext, language: str = "uk"):
     """Handle /menu command"""
+    await state.clear()
     await message.answer(
         get_text("main_menu", language),
         reply_markup=get_main_menu_keyboard(language)
     )
 
 @router.callback_query(F.data == "main_menu")
-async def main_menu_callback(callback: CallbackQuery, language: str = "uk"):
+async def main_menu_callback(callback: CallbackQuery, state: FSMContext, language: str = "uk"):
     """Handle main menu callback"""
     await callback.answer()
+    await state.clear()
     await callback.message.edit_text(
         get_text("main_menu", language),
         reply_markup=get_main_menu_keyboard(language)
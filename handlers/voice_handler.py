@@ -1,15 +1,23 @@
 from aiogram import Router, F
-from aiogram.types import Message, CallbackQuery, Voice, Audio, Document
+from aiogram.types import Message, CallbackQuery, Voice, Audio, Document, BufferedInputFile
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-import tempfile
-import os
+import asyncio
+import io
 import logging
+from typing import Awaitable, BinaryIO, Callable
 
 from database.db_manager import db_manager
 from database.models import AIChat
 from services.voice_service import VoiceAssistant, VoiceService
+from services.audio_buffer import AudioTooLarge, AudioTooLong, download_audio, max_audio_seconds
+from services.audio_transcoder import audio_transcoder
+from services.spool import audio_spool
+from services.admission import AdmissionRejected, admission_controller, request_priority
+from services.conversation_memory import conversation_memory
+from services.crisis_alerts import crisis_alert_queue
 from utils.keyboards import get_voice_keyboard, get_main_menu_keyboard
+from utils.metrics import metrics
 from utils.texts import get_text
 
 router = Router()
@@ -45,65 +53,93 @@ async def start_voice_recording(callback: CallbackQuery, state: FSMContext, lang
     
     await state.set_state(VoiceStates.waiting_for_voice)
 
+async def load_voice_context(user_id: int, user, language: str) -> dict:
+    """User context for the AI reply to a voice message"""
+    user_context = {
+        "is_veteran": user.is_veteran if user else False,
+        "language": language
+    }
+    
+    # Get recent mood if available
+    recent_moods = await db_manager.get_user_mood_history(user_id, 1)
+    if recent_moods:
+        user_context["current_mood"] = recent_moods[0]["mood_level"]
+    return user_context
+
 @router.message(VoiceStates.waiting_for_voice, F.voice)
-async def process_voice_message(message: Message, state: FSMContext, language: str = "uk"):
-    """Process voice message"""
+async def process_voice_message(message: Message, state: FSMContext, language: str = "uk",
+                                load_audio: Callable[[], Awaitable[BinaryIO]] = None):
+    """Process voice message (or an uploaded audio file, see handle_audio_file)"""
+    # Voice-to-text mode shares the state and filter, so it is dispatched from here
+    data = await state.get_data()
+    if data.get("mode") == "transcribe_only":
+        await transcribe_voice_only(message, state, language, load_audio)
+        return
+    
     user_id = message.from_user.id
     
     # Send processing message
     processing_msg = await message.answer(get_text("voice_processing", language))
     
+    transcription_sent = asyncio.Event()
+    
+    async def send_transcription(transcription: str, crisis_check: dict):
+        # The admin alert is queued before any Telegram call that could fail
+        if crisis_check.get("crisis_detected"):
+            crisis_alert_queue.submit(user_id, "voice", transcription, crisis_check)
+        try:
+            try:
+                await processing_msg.delete()
+            except Exception as e:
+                # The status message may already be gone; the transcription still goes out
+                logger.warning(f"Error deleting voice status message: {e}")
+            transcription_text = f"🎤 {get_text('voice_transcribed', language)}:\n\"{transcription}\""
+            await message.answer(transcription_text)
+            
+            if crisis_check.get("crisis_detected"):
+                await message.answer(
+                    f"🆘 {get_text('crisis_support_notice', language)}"
+                    f"\n{get_text('crisis_hotline', language)}: 7333"
+                )
+        finally:
+            transcription_sent.set()
+    
+    async def send_reply(ai_response: str):
+        # Sent after the transcription, while speech is synthesized
+        await transcription_sent.wait()
+        ai_response_text = f"🤖 {get_text('ai_response', language)}:\n{ai_response}"
+        await message.answer(ai_response_text)
+    
     try:
-        # Download voice file
-        voice_file = message.voice
-        file_info = await message.bot.get_file(voice_file.file_id)
-        
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".ogg") as temp_file:
-            await message.bot.download_file(file_info.file_path, temp_file)
-            temp_file_path = temp_file.name
-        
-        # Get user context
+        # Download voice file into memory; user context loads while it is transcribed
         user = await db_manager.get_user(user_id)
-        user_context = {
-            "is_veteran": user.is_veteran if user else False,
-            "language": language
-        }
-        
-        # Get recent mood if available
-        recent_moods = await db_manager.get_user_mood_history(user_id, 1)
-        if recent_moods:
-            user_context["current_mood"] = recent_moods[0]["mood_level"]
-        
-        # Process voice message
-        voice_assistant = VoiceAssistant()
-        result = await voice_assistant.process_voice_message(
-            temp_file_path, user_context, language
-        )
         
-        # Clean up temporary file
-        os.unlink(temp_file_path)
-        
-        # Delete processing message
-        await processing_msg.delete()
+        # Transcoding, STT, AI reply and speech are admitted by priority (premium first)
+        async with admission_controller.slot("voice", request_priority(user)):
+            if load_audio:
+                audio = await load_audio()
+            else:
+                audio = await download_audio(message.bot, message.voice.file_id, message.voice.file_size)
+            user_context = asyncio.create_task(load_voice_context(user_id, user, language))
+            
+            # Process voice message, delivering each stage as it completes
+            voice_assistant = VoiceAssistant()
+            with audio:
+                result = await voice_assistant.process_voice_message(
+                    audio, user_context, language,
+                    on_transcription=send_transcription,
+                    on_reply=send_reply
+                )
         
         if result["success"]:
-            # Send transcription
-            transcription_text = f"🎤 {get_text('voice_transcribed', language)}:\n\"{result['transcription']}\""
-            await message.answer(transcription_text)
-            
-            # Send AI response as text
-            ai_response_text = f"🤖 {get_text('ai_response', language)}:\n{result['ai_response']}"
-            await message.answer(ai_response_text)
+            crisis_check = result.get("crisis") or {}
             
             # Send AI response as voice if available
             if result["audio_response"]:
                 try:
-                    with open(result["audio_response"], "rb") as audio_file:
-                        await message.answer_voice(audio_file)
-                    
-                    # Clean up audio file
-                    voice_assistant.voice_service.cleanup_temp_file(result["audio_response"])
+                    await message.answer_voice(
+                        BufferedInputFile(result["audio_response"], filename="response.mp3")
+                    )
                 except Exception as e:
                     logger.error(f"Error sending voice response: {e}")
             
@@ -115,7 +151,9 @@ async def process_voice_message(message: Message, state: FSMContext, language: s
                 model_used=result.get("model_used", "gemini"),
                 is_voice=True
             )
+            chat.crisis_flag = crisis_check.get("crisis_detected", False)
             await db_manager.save_ai_chat(chat)
+            conversation_memory.add_turn(user_id, result["transcription"], result["ai_response"])
             
             # Show voice menu again
             await message.answer(
@@ -124,6 +162,8 @@ async def process_voice_message(message: Message, state: FSMContext, language: s
             )
             
         else:
+            if not transcription_sent.is_set():
+                await processing_msg.delete()
             await message.answer(
                 get_text("voice_processing_error", language) + f"\n{result.get('error', '')}",
                 reply_markup=get_main_menu_keyboard(language)
@@ -131,24 +171,39 @@ async def process_voice_message(message: Message, state: FSMContext, language: s
         
         await state.clear()
         
-    except Exception as e:
-        logger.error(f"Voice processing error: {e}")
+    except AudioTooLarge as e:
+        await processing_msg.delete()
+        await message.answer(
+            get_text("voice_too_large", language).format(max_mb=e.limit // (1024 * 1024)),
+            reply_markup=get_voice_keyboard(language)
+        )
         
-        # Clean up files
-        try:
-            if 'temp_file_path' in locals():
-                os.unlink(temp_file_path)
-        except:
-            pass
+    except AudioTooLong as e:
+        await processing_msg.delete()
+        await message.answer(
+            get_text("voice_too_long", language).format(max_minutes=int(e.limit // 60)),
+            reply_markup=get_voice_keyboard(language)
+        )
         
+    except AdmissionRejected:
         await processing_msg.delete()
+        await message.answer(
+            get_text("service_busy", language),
+            reply_markup=get_voice_keyboard(language)
+        )
+        
+    except Exception as e:
+        logger.error(f"Voice processing error: {e}")
+        
+        if not transcription_sent.is_set():
+            await processing_msg.delete()
         await message.answer(
             get_text("voice_processing_error", language),
             reply_markup=get_main_menu_keyboard(language)
         )
         await state.clear()
 
-@router.message(VoiceStates.waiting_for_voice)
+@router.message(VoiceStates.waiting_for_voice, ~(F.audio | F.document))
 async def handle_non_voice_in_voice_mode(message: Message, state: FSMContext, language: str = "uk"):
     """Handle non-voice messages when expecting voice"""
     if message.text and message.text.startswith('/'):
@@ -176,34 +231,22 @@ async def voice_to_text_mode(callback: CallbackQuery, state: FSMContext, languag
     await state.set_state(VoiceStates.waiting_for_voice)
     await state.update_data(mode="transcribe_only")
 
-@router.message(VoiceStates.waiting_for_voice, F.voice)
-async def transcribe_voice_only(message: Message, state: FSMContext, language: str = "uk"):
+async def transcribe_voice_only(message: Message, state: FSMContext, language: str = "uk",
+                                load_audio: Callable[[], Awaitable[BinaryIO]] = None):
     """Transcribe voice message without AI response"""
-    # Check if we're in transcribe-only mode
-    data = await state.get_data()
-    if data.get("mode") != "transcribe_only":
-        # Regular voice processing
-        await process_voice_message(message, state, language)
-        return
-    
     processing_msg = await message.answer(get_text("transcribing_voice", language))
     
     try:
-        # Download voice file
-        voice_file = message.voice
-        file_info = await message.bot.get_file(voice_file.file_id)
-        
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".ogg") as temp_file:
-            await message.bot.download_file(file_info.file_path, temp_file)
-            temp_file_path = temp_file.name
-        
-        # Transcribe voice
+        # Download voice file into memory and transcribe it
         voice_service = VoiceService()
-        result = await voice_service.speech_to_text(temp_file_path, language)
-        
-        # Clean up temporary file
-        os.unlink(temp_file_path)
+        user = await db_manager.get_user(message.from_user.id)
+        async with admission_controller.slot("voice", request_priority(user)):
+            if load_audio:
+                audio = await load_audio()
+            else:
+                audio = await download_audio(message.bot, message.voice.file_id, message.voice.file_size)
+            with audio:
+                result = await voice_service.speech_to_text(audio, language)
         
         # Delete processing message
         await processing_msg.delete()
@@ -224,16 +267,30 @@ async def transcribe_voice_only(message: Message, state: FSMContext, language: s
         
         await state.clear()
         
+    except AudioTooLarge as e:
+        await processing_msg.delete()
+        await message.answer(
+            get_text("voice_too_large", language).format(max_mb=e.limit // (1024 * 1024)),
+            reply_markup=get_voice_keyboard(language)
+        )
+        
+    except AudioTooLong as e:
+        await processing_msg.delete()
+        await message.answer(
+            get_text("voice_too_long", language).format(max_minutes=int(e.limit // 60)),
+            reply_markup=get_voice_keyboard(language)
+        )
+        
+    except AdmissionRejected:
+        await processing_msg.delete()
+        await message.answer(
+            get_text("service_busy", language),
+            reply_markup=get_voice_keyboard(language)
+        )
+        
     except Exception as e:
         logger.error(f"Voice transcription error: {e}")
         
-        # Clean up files
-        try:
-            if 'temp_file_path' in locals():
-                os.unlink(temp_file_path)
-        except:
-            pass
-        
         await processing_msg.delete()
         await message.answer(
             get_text("transcription_error", language),
@@ -278,12 +335,8 @@ async def convert_text_to_speech(message: Message, state: FSMContext, language:
         await processing_msg.delete()
         
         if result["success"]:
-            # Send audio file
-            with open(result["audio_file"], "rb") as audio_file:
-                await message.answer_voice(audio_file)
-            
-            # Clean up audio file
-            voice_service.cleanup_temp_file(result["audio_file"])
+            # Send audio from memory
+            await message.answer_voice(BufferedInputFile(result["audio"], filename="speech.mp3"))
             
             await message.answer(get_text("speech_generated", language))
         else:
@@ -310,53 +363,26 @@ async def convert_text_to_speech(message: Message, state: FSMContext, language:
         await state.clear()
 
 # Handle audio files and documents as voice messages
-@router.message(F.audio | F.document.as_("audio_doc"))
+@router.message(VoiceStates.waiting_for_voice, F.audio | F.document)
 async def handle_audio_file(message: Message, state: FSMContext, language: str = "uk"):
     """Handle audio files and documents as voice messages"""
-    current_state = await state.get_state()
+    media = message.audio or message.document
     
-    if current_state != VoiceStates.waiting_for_voice:
-        return
+    async def load_audio_file() -> BinaryIO:
+        # Audio files report their duration, so long ones are refused before downloading
+        duration = getattr(media, "duration", None)
+        if duration and duration > max_audio_seconds():
+            metrics.inc("voice.rejected_too_long")
+            raise AudioTooLong(duration, max_audio_seconds())
+        
+        # Any ffmpeg-readable format is converted to mono 16 kHz Opus/OGG off the event loop;
+        # the upload goes to a spool file that is removed however this ends
+        with audio_spool.file(suffix=".upload") as upload:
+            await download_audio(message.bot, media.file_id, media.file_size, buffer=upload)
+            upload.flush()
+            return io.BytesIO(await audio_transcoder.transcode(upload.name))
     
-    processing_msg = await message.answer(get_text("processing_audio_file", language))
-    
-    try:
-        # Determine file type and get file info
-        if message.audio:
-            file_info = await message.bot.get_file(message.audio.file_id)
-            file_extension = ".mp3"
-        else:  # document
-            audio_doc = message.document
-            file_info = await message.bot.get_file(audio_doc.file_id)
-            file_extension = os.path.splitext(audio_doc.file_name)[1] or ".mp3"
-        
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as temp_file:
-            await message.bot.download_file(file_info.file_path, temp_file)
-            temp_file_path = temp_file.name
-        
-        # Process as voice message (reuse the voice processing logic)
-        # This would require adapting the voice processing to handle different audio formats
-        await message.answer(get_text("audio_file_received", language))
-        
-        # For now, suggest using voice messages instead
-        await processing_msg.delete()
-        await message.answer(
-            get_text("use_voice_message", language),
-            reply_markup=get_voice_keyboard(language)
-        )
-        
-        # Clean up
-        os.unlink(temp_file_path)
-        
-    except Exception as e:
-        logger.error(f"Audio file processing error: {e}")
-        
-        await processing_msg.delete()
-        await message.answer(
-            get_text("audio_processing_error", language),
-            reply_markup=get_main_menu_keyboard(language)
-        )
+    await process_voice_message(message, state, language, load_audio=load_audio_file)
 
 # Cancel voice operations
 @router.callback_query(F.data == "cancel_voice")
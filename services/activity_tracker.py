@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from config import config
+from database.db_manager import db_manager
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityTracker:
+    """
+    Coalesces users.last_activity writes.
+
+    Events only record the latest activity time per user in memory; a
+    background task writes everything recorded since the previous flush in
+    one statement every ACTIVITY_FLUSH_INTERVAL seconds, so the write load
+    follows the number of active users per interval instead of the number
+    of updates. last_activity lags by at most one interval.
+    """
+
+    def __init__(self, interval: float = None):
+        self.interval = interval or config.get('ACTIVITY_FLUSH_INTERVAL', 5)
+        self._pending: Dict[int, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"touched": 0, "flushed": 0, "flushes": 0, "failed_flushes": 0}
+
+    def touch(self, user_id: int, when: datetime = None):
+        """Record activity of a user"""
+        when = when or datetime.now()
+        last = self._pending.get(user_id)
+        if last is None or when > last:
+            self._pending[user_id] = when
+        self.stats["touched"] += 1
+
+    async def flush(self) -> int:
+        """Write recorded activity to the database; returns number of users written"""
+        if not self._pending:
+            return 0
+
+        pending, self._pending = self._pending, {}
+        start = time.monotonic()
+        try:
+            # Sorted so concurrent flushes from several instances lock rows in the same order
+            user_ids = sorted(pending)
+            await db_manager.update_last_activity(user_ids, [pending[user_id] for user_id in user_ids])
+        except Exception as e:
+            logger.error(f"Error flushing user activity: {e}")
+            self.stats["failed_flushes"] += 1
+            # Keep the data for the next attempt, merged with what arrived meanwhile
+            for user_id, when in pending.items():
+                last = self._pending.get(user_id)
+                if last is None or when > last:
+                    self._pending[user_id] = when
+            return 0
+
+        self.stats["flushed"] += len(pending)
+        self.stats["flushes"] += 1
+        metrics.observe("activity.flush", time.monotonic() - start)
+        return len(pending)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    def start(self):
+        """Start periodic flushing"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop periodic flushing and write what is left"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get tracker statistics"""
+        return {**self.stats, "pending": len(self._pending), "interval": self.interval}
+
+
+# Global activity tracker
+activity_tracker = ActivityTracker()
+metrics.register_collector("activity", activity_tracker.get_stats)
@@ -0,0 +1,155 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Any, Dict, List
+
+from config import config
+from database.models import SubscriptionStatus
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Admission lanes; lower values are served first"""
+    CRISIS = 0
+    PREMIUM = 1
+    NORMAL = 2
+
+
+def request_priority(user=None, crisis: bool = False) -> Priority:
+    """Lane for a request from this user"""
+    if crisis:
+        return Priority.CRISIS
+    if user and user.subscription_status in (SubscriptionStatus.PREMIUM, SubscriptionStatus.TRIAL):
+        return Priority.PREMIUM
+    return Priority.NORMAL
+
+
+class AdmissionRejected(Exception):
+    """The request was not admitted: the queue is full or the wait ran out"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class AdmissionController:
+    """
+    Bounded admission for expensive work (voice pipeline, AI chat).
+
+    At most max_active jobs run at once. Further requests wait in a priority
+    queue: crisis first, then premium, then everyone else, first come first
+    served within a lane. When max_queue requests are already waiting, a new
+    request is rejected at once, unless it outranks the lowest waiting one,
+    which is shed instead. A request that waits longer than max_wait is
+    rejected too, so users get a fast "busy" reply rather than a timeout.
+    """
+
+    def __init__(self, max_active: int = None, max_queue: int = None, max_wait: float = None):
+        self.max_active = max_active or config.get('ADMISSION_MAX_ACTIVE', 16)
+        self.max_queue = max_queue if max_queue is not None else config.get('ADMISSION_MAX_QUEUE', 64)
+        self.max_wait = max_wait or config.get('ADMISSION_MAX_WAIT', 20.0)
+        self.active = 0
+        self.queued = 0
+        # (priority, sequence, future); futures of requests that gave up stay until popped
+        self._queue: List[tuple] = []
+        self._sequence = itertools.count()
+        self.stats = {
+            lane.name.lower(): {"admitted": 0, "rejected": 0, "shed": 0, "timed_out": 0}
+            for lane in Priority
+        }
+
+    def _shed_lowest(self, priority: Priority) -> bool:
+        """Reject the lowest priority waiting request if it ranks below priority"""
+        waiting = [entry for entry in self._queue if not entry[2].done()]
+        if not waiting:
+            return False
+        lowest = max(waiting, key=lambda entry: (entry[0], entry[1]))
+        if lowest[0] <= priority:
+            return False
+        lowest[2].set_exception(AdmissionRejected("shed"))
+        self.queued -= 1
+        self.stats[Priority(lowest[0]).name.lower()]["shed"] += 1
+        metrics.inc("admission.shed")
+        return True
+
+    async def acquire(self, priority: Priority = Priority.NORMAL):
+        """Wait for a slot; raises AdmissionRejected"""
+        lane = self.stats[priority.name.lower()]
+        if self.active < self.max_active and not self.queued:
+            self.active += 1
+            lane["admitted"] += 1
+            return
+
+        if self.queued >= self.max_queue and not self._shed_lowest(priority):
+            lane["rejected"] += 1
+            metrics.inc("admission.rejected")
+            raise AdmissionRejected("queue_full")
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._sequence), future))
+        self.queued += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.max_wait)
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                # The slot was handed over just as the wait ran out; take it
+                lane["admitted"] += 1
+                return
+            if not future.done():
+                future.cancel()
+                self.queued -= 1
+            lane["timed_out"] += 1
+            metrics.inc("admission.timed_out")
+            raise AdmissionRejected("timeout")
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                self.release()
+            elif not future.done():
+                future.cancel()
+                self.queued -= 1
+            raise
+        lane["admitted"] += 1
+
+    def release(self):
+        """Free a slot, handing it to the highest priority waiting request"""
+        while self._queue:
+            _, _, future = heapq.heappop(self._queue)
+            if not future.done():
+                self.queued -= 1
+                future.set_result(True)
+                return
+        self.active -= 1
+
+    @asynccontextmanager
+    async def slot(self, kind: str, priority: Priority = Priority.NORMAL):
+        """Hold a slot for the duration of the block; queue wait is recorded as admission.<kind>.wait"""
+        start = time.monotonic()
+        try:
+            await self.acquire(priority)
+        finally:
+            metrics.observe(f"admission.{kind}.wait", time.monotonic() - start)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get admission statistics"""
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "max_active": self.max_active,
+            "max_queue": self.max_queue,
+            "lanes": self.stats
+        }
+
+
+# Global admission controller shared by voice and AI chat
+admission_controller = AdmissionController()
+metrics.register_collector("admission", admission_controller.get_stats)
@@ -1,4 +1,5 @@
 import asyncio
+import hashlib
 import logging
 import json
 from typing import Dict, List, Optional, Any
@@ -7,9 +8,17 @@ import openai
 from datetime import datetime
 
 from config import config
+from services.crisis_detector import crisis_detector
+from services.response_cache import response_cache
+from utils.metrics import metrics
+from utils.singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# Shared across AIService instances, which handlers create per request
+ai_singleflight = SingleFlight("ai_chat")
+metrics.register_collector("ai_singleflight", lambda: {"in_flight": ai_singleflight.in_flight()})
+
 class AIService:
     def __init__(self):
         self.setup_models()
@@ -30,27 +39,47 @@ class AIService:
             self.openai_client = None
     
     async def chat_with_ai(self, message: str, user_context: Dict = None, 
-                          language: str = "uk", model: str = "gemini") -> Dict[str, Any]:
+                          language: str = "uk", model: str = "gemini",
+                          history: Dict = None) -> Dict[str, Any]:
         """
-        Chat with AI assistant
+        Chat with AI assistant.
+        history is the conversation context from ConversationMemory.build_context
         """
         try:
             # Prepare system prompt
             system_prompt = self._get_system_prompt(language, user_context)
+            if history and history.get("summary"):
+                system_prompt += self._get_summary_prompt(language, history["summary"])
+            turns = history.get("turns", []) if history else []
+            fallback = False
+            
+            # Identical prompts in flight at the same time share one provider call
+            fingerprint = self._get_prompt_fingerprint(model, system_prompt, turns, message)
+            timeout = config.get('AI_SINGLEFLIGHT_TIMEOUT', 45)
             
             if model == "gemini" and self.gemini_model:
-                response = await self._chat_with_gemini(message, system_prompt)
+                response = await ai_singleflight.do(
+                    fingerprint,
+                    lambda: self._chat_with_gemini(message, system_prompt, turns),
+                    timeout=timeout
+                )
             elif model == "openai" and self.openai_client:
-                response = await self._chat_with_openai(message, system_prompt)
+                response = await ai_singleflight.do(
+                    fingerprint,
+                    lambda: self._chat_with_openai(message, system_prompt, turns),
+                    timeout=timeout
+                )
             else:
                 # Fallback to a simple response
                 response = await self._get_fallback_response(message, language)
+                fallback = True
             
             return {
                 "response": response,
                 "model_used": model,
                 "timestamp": datetime.now().isoformat(),
-                "success": True
+                "success": True,
+                "fallback": fallback
             }
             
         except Exception as e:
@@ -63,9 +92,84 @@ class AIService:
                 "error": str(e)
             }
     
-    async def _chat_with_gemini(self, message: str, system_prompt: str) -> str:
+    async def get_cached_response(self, prompt_type: str, message: str,
+                                  user_context: Dict = None, language: str = "uk",
+                                  model: str = "gemini") -> Dict[str, Any]:
+        """
+        Chat with AI for context-independent prompts (advice, coping strategies),
+        serving from the response cache when possible
+        """
+        key = response_cache.make_key(
+            prompt_type, message, language, self._get_context_bucket(user_context)
+        )
+        
+        cached = response_cache.get(prompt_type, key)
+        if cached:
+            return {
+                "response": cached,
+                "model_used": "cache",
+                "timestamp": datetime.now().isoformat(),
+                "success": True,
+                "cached": True
+            }
+        
+        result = await self.chat_with_ai(
+            message=message,
+            user_context=user_context,
+            language=language,
+            model=model
+        )
+        
+        if result["success"] and not result.get("fallback"):
+            response_cache.put(prompt_type, key, result["response"])
+            return result
+        
+        # Provider failed or is unavailable - serve an older cached answer if we have one
+        stale = response_cache.get_stale(prompt_type, key)
+        if stale:
+            return {
+                "response": stale,
+                "model_used": "cache",
+                "timestamp": datetime.now().isoformat(),
+                "success": True,
+                "cached": True,
+                "stale": True
+            }
+        
+        return result
+    
+    def _get_prompt_fingerprint(self, model: str, system_prompt: str,
+                                turns: List, message: str) -> str:
+        """Hash of everything that is sent to the provider"""
+        digest = hashlib.sha256()
+        for part in [model, system_prompt, message]:
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x00")
+        for turn_message, turn_response in turns:
+            digest.update(turn_message.encode("utf-8"))
+            digest.update(b"\x00")
+            digest.update(turn_response.encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+    
+    def _get_context_bucket(self, user_context: Dict = None) -> tuple:
+        """Reduce user context to the parts that shape the system prompt"""
+        if not user_context:
+            return ()
+        return (
+            bool(user_context.get("is_veteran", False)),
+            user_context.get("current_mood"),
+            user_context.get("mood_trend", "stable")
+        )
+    
+    async def _chat_with_gemini(self, message: str, system_prompt: str,
+                                turns: List = None) -> str:
         """Chat with Gemini model"""
-        full_prompt = f"{system_prompt}\n\nUser: {message}\n\nAssistant:"
+        dialogue = "".join(
+            f"\n\nUser: {turn_message}\n\nAssistant: {turn_response}"
+            for turn_message, turn_response in (turns or [])
+        )
+        full_prompt = f"{system_prompt}{dialogue}\n\nUser: {message}\n\nAssistant:"
         
         response = await asyncio.to_thread(
             self.gemini_model.generate_content,
@@ -74,14 +178,18 @@ class AIService:
         
         return response.text.strip()
     
-    async def _chat_with_openai(self, message: str, system_prompt: str) -> str:
+    async def _chat_with_openai(self, message: str, system_prompt: str,
+                                turns: List = None) -> str:
         """Chat with OpenAI model"""
+        messages = [{"role": "system", "content": system_prompt}]
+        for turn_message, turn_response in (turns or []):
+            messages.append({"role": "user", "content": turn_message})
+            messages.append({"role": "assistant", "content": turn_response})
+        messages.append({"role": "user", "content": message})
+        
         response = await self.openai_client.chat.completions.create(
             model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": message}
-            ],
+            messages=messages,
             max_tokens=500,
             temperature=0.7
         )
@@ -150,6 +258,12 @@ Respond in English, briefly and to the point.
         
         return prompt
     
+    def _get_summary_prompt(self, language: str, summary: str) -> str:
+        """Format summary of earlier conversation for the system prompt"""
+        if language == "uk":
+            return f"\n\nКороткий зміст попередньої розмови з користувачем:\n{summary}"
+        return f"\n\nSummary of the earlier conversation with the user:\n{summary}"
+    
     async def analyze_mood_note(self, note: str, mood_level: int, language: str = "uk") -> Dict[str, Any]:
         """
         Analyze mood note using AI
@@ -428,30 +542,4 @@ Please try again later, or use other bot features."""
         """
         Detect crisis indicators in user text
         """
-        crisis_keywords = {
-            "uk": [
-                "самогубство", "покінчити з життям", "не хочу жити", "краще б помер",
-                "немає сенсу", "все безнадійно", "нікому не потрібен", "хочу померти"
-            ],
-            "en": [
-                "suicide", "kill myself", "don't want to live", "better off dead",
-                "no point", "hopeless", "nobody cares", "want to die"
-            ]
-        }
-        
-        text_lower = text.lower()
-        crisis_detected = False
-        matched_indicators = []
-        
-        for lang, keywords in crisis_keywords.items():
-            for keyword in keywords:
-                if keyword in text_lower:
-                    crisis_detected = True
-                    matched_indicators.append(keyword)
-        
-        return {
-            "crisis_detected": crisis_detected,
-            "confidence": len(matched_indicators) / max(len(text.split()), 1),
-            "indicators": matched_indicators,
-            "requires_immediate_attention": crisis_detected and len(matched_indicators) >= 2
-        }
\ No newline at end of file
+        return crisis_detector.scan(text)
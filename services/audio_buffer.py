@@ -0,0 +1,90 @@
+import logging
+import tempfile
+from typing import BinaryIO
+
+from config import config
+from services.spool import audio_spool
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class AudioTooLarge(Exception):
+    """Audio exceeds VOICE_MAX_BYTES"""
+
+    def __init__(self, size: int, limit: int):
+        super().__init__(f"Audio is {size} bytes, limit is {limit}")
+        self.size = size
+        self.limit = limit
+
+
+class AudioTooLong(Exception):
+    """Audio exceeds VOICE_MAX_SECONDS"""
+
+    def __init__(self, duration: float, limit: float):
+        # Arguments kept in args so the error survives pickling from a worker process
+        super().__init__(duration, limit)
+        self.duration = duration
+        self.limit = limit
+
+    def __str__(self):
+        return f"Audio is {self.duration:.0f} seconds, limit is {self.limit:.0f}"
+
+
+def max_audio_bytes() -> int:
+    return config.get('VOICE_MAX_BYTES', 20 * 1024 * 1024)
+
+
+def max_audio_seconds() -> int:
+    return config.get('VOICE_MAX_SECONDS', 600)
+
+
+def audio_buffer() -> BinaryIO:
+    """
+    Buffer for audio data: kept in memory (a BytesIO) up to VOICE_SPILL_BYTES
+    and moved to an anonymous temporary file in the spool directory beyond that
+    """
+    return tempfile.SpooledTemporaryFile(
+        max_size=config.get('VOICE_SPILL_BYTES', 2 * 1024 * 1024), dir=audio_spool.ensure_path()
+    )
+
+
+def buffer_size(buffer: BinaryIO) -> int:
+    position = buffer.tell()
+    size = buffer.seek(0, 2)
+    buffer.seek(position)
+    return size
+
+
+async def download_audio(bot, file_id: str, file_size: int = None, buffer: BinaryIO = None) -> BinaryIO:
+    """
+    Download a Telegram file into an audio buffer (or the given file)
+    positioned at the start. Raises AudioTooLarge before downloading if the
+    reported size is over the cap. The caller closes the buffer (use it as a
+    context manager).
+    """
+    limit = max_audio_bytes()
+    if file_size and file_size > limit:
+        metrics.inc("voice.rejected_too_large")
+        raise AudioTooLarge(file_size, limit)
+
+    if buffer is None:
+        buffer = audio_buffer()
+    try:
+        file_info = await bot.get_file(file_id)
+        await bot.download_file(file_info.file_path, buffer)
+
+        size = buffer_size(buffer)
+        if size > limit:
+            metrics.inc("voice.rejected_too_large")
+            raise AudioTooLarge(size, limit)
+
+        metrics.inc("voice.downloads")
+        metrics.inc("voice.downloaded_bytes", size)
+        if getattr(buffer, "_rolled", False):
+            metrics.inc("voice.spilled_to_disk")
+        buffer.seek(0)
+        return buffer
+    except BaseException:
+        buffer.close()
+        raise
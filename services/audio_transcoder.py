@@ -0,0 +1,190 @@
+import asyncio
+import io
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional, Tuple
+
+from pydub import AudioSegment
+from pydub.silence import detect_nonsilent
+
+from config import config
+from services.audio_buffer import AudioTooLong, max_audio_seconds
+from services.spool import audio_spool, use_spool_for_temp_files
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Speech recognizers work on 16 kHz mono; Opus keeps speech intelligible at low bitrates
+STT_SAMPLE_RATE = 16000
+STT_BITRATE = "24k"
+
+
+def trim_silence(segment: AudioSegment, min_silence_ms: int, silence_offset_db: float,
+                 keep_silence_ms: int) -> AudioSegment:
+    """
+    Drop leading and trailing silence and shorten pauses longer than
+    min_silence_ms to 2 * keep_silence_ms. The threshold is relative to the
+    clip's average loudness, so quiet recordings are not cut away.
+    """
+    if segment.dBFS == float("-inf"):
+        return segment
+
+    ranges = detect_nonsilent(
+        segment,
+        min_silence_len=min_silence_ms,
+        silence_thresh=segment.dBFS + silence_offset_db,
+        seek_step=10
+    )
+    if not ranges:
+        return segment
+
+    # Padding below half the pause length keeps neighbouring pieces from overlapping
+    keep = min(keep_silence_ms, min_silence_ms // 2)
+    trimmed = None
+    for start, end in ranges:
+        piece = segment[max(0, start - keep):min(len(segment), end + keep)]
+        trimmed = piece if trimmed is None else trimmed + piece
+    return trimmed
+
+
+def transcode_for_stt(path: str, max_seconds: float, min_silence_ms: int,
+                      silence_offset_db: float, keep_silence_ms: int) -> Tuple[bytes, float, float]:
+    """
+    Decode an ffmpeg-readable audio file, enforce the duration limit, convert
+    to mono 16 kHz, trim silence and encode as Opus in OGG. Runs in a worker
+    process; the upload is passed by path so it is not copied through the
+    pool's pipe. Returns (audio, input seconds, output seconds).
+    """
+    # Decoding stops just past the limit, so very long uploads cost no more than allowed ones
+    segment = AudioSegment.from_file(path, duration=max_seconds + 1)
+    duration = segment.duration_seconds
+    if duration > max_seconds:
+        raise AudioTooLong(duration, max_seconds)
+
+    segment = segment.set_channels(1).set_frame_rate(STT_SAMPLE_RATE).set_sample_width(2)
+    if min_silence_ms > 0:
+        segment = trim_silence(segment, min_silence_ms, silence_offset_db, keep_silence_ms)
+
+    output = io.BytesIO()
+    segment.export(output, format="ogg", codec="libopus", bitrate=STT_BITRATE)
+    return output.getvalue(), duration, segment.duration_seconds
+
+
+class AudioTranscoder:
+    """
+    Converts uploaded audio files to speech-recognition input in a process
+    pool, so ffmpeg decoding and silence detection never block the event
+    loop or hold the GIL. A semaphore sized to the pool bounds concurrent
+    jobs; further uploads wait in the event loop rather than queueing their
+    audio in the pool. Workers are started in on_startup.
+    """
+
+    def __init__(self, max_workers: int = None):
+        self.max_workers = max_workers or config.get('TRANSCODE_WORKERS', 2)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._semaphore = asyncio.Semaphore(self.max_workers)
+        self.waiting = 0
+        self.stats = {
+            "transcoded": 0,
+            "failed": 0,
+            "rejected_too_long": 0,
+            "input_bytes": 0,
+            "output_bytes": 0,
+            "input_seconds": 0.0,
+            "output_seconds": 0.0
+        }
+
+    async def start(self):
+        """Start the worker processes"""
+        if self._executor is None:
+            # Scratch files ffmpeg leaves behind in a killed worker land in the swept spool
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=use_spool_for_temp_files,
+                initargs=(audio_spool.path,)
+            )
+            # Forking happens on the first submit; do it now, before the bot gets busy,
+            # without blocking the event loop while the workers come up
+            await asyncio.wrap_future(self._executor.submit(int))
+            logger.info(f"Audio transcoder started with {self.max_workers} workers")
+
+    async def stop(self):
+        """Stop the worker processes"""
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.get_running_loop().run_in_executor(
+                None, lambda: executor.shutdown(wait=True, cancel_futures=True)
+            )
+            logger.info("Audio transcoder stopped")
+
+    async def transcode(self, path: str) -> bytes:
+        """
+        Convert an audio file (e.g. a spool file) to mono 16 kHz Opus/OGG
+        with silence trimmed. Raises AudioTooLong if it is over VOICE_MAX_SECONDS.
+        """
+        self.waiting += 1
+        wait_start = time.monotonic()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        metrics.observe("audio.transcode_wait", time.monotonic() - wait_start)
+
+        executor = None
+        try:
+            if self._executor is None:
+                await self.start()
+            executor = self._executor
+
+            start = time.monotonic()
+            audio, input_seconds, output_seconds = await asyncio.get_running_loop().run_in_executor(
+                executor,
+                transcode_for_stt,
+                path,
+                max_audio_seconds(),
+                config.get('VOICE_MIN_SILENCE_MS', 700),
+                config.get('VOICE_SILENCE_OFFSET_DB', -16.0),
+                config.get('VOICE_KEEP_SILENCE_MS', 200)
+            )
+            metrics.observe("audio.transcode", time.monotonic() - start)
+        except AudioTooLong:
+            self.stats["rejected_too_long"] += 1
+            metrics.inc("voice.rejected_too_long")
+            raise
+        except BrokenProcessPool:
+            # A worker died (e.g. ffmpeg was killed); replace the pool for later jobs
+            self.stats["failed"] += 1
+            if executor is not None and self._executor is executor:
+                self._executor = None
+                executor.shutdown(wait=False)
+            raise
+        except Exception:
+            self.stats["failed"] += 1
+            raise
+        finally:
+            self._semaphore.release()
+
+        self.stats["transcoded"] += 1
+        self.stats["input_bytes"] += os.path.getsize(path)
+        self.stats["output_bytes"] += len(audio)
+        self.stats["input_seconds"] += input_seconds
+        self.stats["output_seconds"] += output_seconds
+        return audio
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get transcoder statistics"""
+        return {
+            **self.stats,
+            "workers": self.max_workers,
+            "running": self._executor is not None,
+            "active": self.max_workers - self._semaphore._value,
+            "waiting": self.waiting
+        }
+
+
+# Global audio transcoder
+audio_transcoder = AudioTranscoder()
+metrics.register_collector("audio_transcoder", audio_transcoder.get_stats)
@@ -0,0 +1,348 @@
+import asyncio
+import logging
+import time
+from contextlib import aclosing
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramRetryAfter
+
+from config import config
+from database.audiences import BROADCAST_AUDIENCES
+from database.db_manager import LeaseLost, db_manager
+from utils.metrics import metrics
+from services.weekly_reports import render_weekly_reports
+from utils.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+MAX_SEND_ATTEMPTS = 3
+
+# Job ids are shown (and may be given to cancel) by this many leading characters
+JOB_ID_PREFIX_LENGTH = 8
+
+# Bad request errors meaning the chat can never receive messages
+UNREACHABLE_ERRORS = ("chat not found", "user is deactivated", "bot was blocked")
+
+# Job kinds whose texts are rendered per recipient from the audience row.
+# A renderer gets a batch of rows and the job messages and returns one text
+# (or None to skip the recipient) per row.
+RENDERERS: Dict[str, Callable[[List[Dict[str, Any]], Dict[str, str]], List[Optional[str]]]] = {
+    "weekly_report": render_weekly_reports,
+}
+
+
+class _Job:
+    """In-memory state of a running broadcast job"""
+
+    def __init__(self, row: Dict[str, Any]):
+        self.id: str = row["id"]
+        self.kind: str = row["kind"]
+        self.audience: str = row["audience"]
+        self.messages: Dict[str, str] = row["messages"]
+        self.last_user_id: int = row.get("last_user_id") or 0
+        self.sent: int = row.get("sent") or 0
+        self.failed: int = row.get("failed") or 0
+        self.blocked: int = row.get("blocked") or 0
+        self.cancelled = False
+        self.started = time.monotonic()
+        self.sent_at_start = self.sent
+        self.report_message_id: Optional[int] = None
+
+    def text_for(self, language: str) -> str:
+        return self.messages.get(language) or self.messages.get("uk") or next(iter(self.messages.values()))
+
+    def render(self, batch: List[Dict[str, Any]]) -> List[Optional[str]]:
+        renderer = RENDERERS.get(self.kind)
+        if renderer:
+            return renderer(batch, self.messages)
+        return [self.text_for(recipient["language"]) for recipient in batch]
+
+    def rate(self) -> float:
+        elapsed = time.monotonic() - self.started
+        return (self.sent - self.sent_at_start) / elapsed if elapsed > 0 else 0.0
+
+
+class BroadcastEngine:
+    """
+    Sends messages to an audience of users within Telegram limits.
+
+    A global token bucket caps the overall send rate and each chat gets at most
+    one message per BROADCAST_PER_CHAT_INTERVAL. Recipients are read in user_id
+    order, a page at a time, and sent in batches by concurrent workers;
+    the highest user_id below which everything was sent is saved as the job's
+    resume point.
+    Users who blocked the bot are flagged and skipped by later broadcasts.
+
+    With several bot instances each job is sent by the instance holding its
+    lease; the others periodically look for running jobs whose owner has
+    died (its lease expired) and resume them.
+    """
+
+    def __init__(self):
+        self.bucket = TokenBucket(config.get('BROADCAST_RATE', 30))
+        self.concurrency = config.get('BROADCAST_CONCURRENCY', 8)
+        self.batch_size = config.get('BROADCAST_BATCH_SIZE', 500)
+        self.per_chat_interval = config.get('BROADCAST_PER_CHAT_INTERVAL', 1.0)
+        self.progress_interval = config.get('BROADCAST_PROGRESS_INTERVAL', 15)
+        self._chat_last_sent: Dict[int, float] = {}
+        self._jobs: Dict[str, _Job] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._bot = None
+
+    async def start(self, bot):
+        """Attach the bot and resume jobs interrupted by a restart"""
+        self._bot = bot
+        await self._resume_orphans()
+
+        task = asyncio.create_task(self._watch_orphans())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _resume_orphans(self):
+        for row in await db_manager.get_running_broadcast_jobs():
+            if row["id"] not in self._jobs:
+                self._launch(_Job(row))
+
+    async def _watch_orphans(self):
+        """Pick up running jobs left behind by an instance that died"""
+        while True:
+            await asyncio.sleep(config.get('BROADCAST_RESUME_INTERVAL', 60))
+            try:
+                await self._resume_orphans()
+            except Exception as e:
+                logger.error(f"Error resuming broadcast jobs: {e}")
+
+    async def stop(self):
+        """Stop running jobs; their progress is saved and resumed on next start"""
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def submit(self, kind: str, audience: str, messages: Dict[str, str],
+                     created_by: int = None) -> Optional[str]:
+        """Create a broadcast job and start sending in the background"""
+        if audience not in BROADCAST_AUDIENCES:
+            raise ValueError(f"Unknown broadcast audience: {audience}")
+        if self._bot is None:
+            logger.error("Broadcast engine not started")
+            return None
+
+        job_id = await db_manager.create_broadcast_job(kind, audience, messages, created_by)
+        if not job_id:
+            return None
+
+        self._launch(_Job({"id": job_id, "kind": kind, "audience": audience, "messages": messages}))
+        return job_id
+
+    def cancel(self, job_id: str) -> str:
+        """
+        Cancel a running job after the messages in flight. The job is given by
+        its id or by an id prefix of at least JOB_ID_PREFIX_LENGTH characters
+        (as shown in progress reports) that matches exactly one running job.
+        Returns "cancelled", "ambiguous" or "not_found".
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            if len(job_id) < JOB_ID_PREFIX_LENGTH:
+                return "not_found"
+            matches = [job for running_id, job in self._jobs.items() if running_id.startswith(job_id)]
+            if len(matches) > 1:
+                return "ambiguous"
+            if not matches:
+                return "not_found"
+            job = matches[0]
+        job.cancelled = True
+        return "cancelled"
+
+    def _launch(self, job: _Job):
+        self._jobs[job.id] = job
+        task = asyncio.create_task(self._run(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, job: _Job):
+        try:
+            async with db_manager.job_lease(f"broadcast:{job.id}") as owner:
+                if not owner:
+                    # Another instance is sending this job
+                    return
+
+                # Progress may have moved on since the job row was read
+                row = await db_manager.get_broadcast_job(job.id)
+                if row is not None:
+                    if row["status"] != "running":
+                        return
+                    resumed = _Job(row)
+                    job.last_user_id, job.sent = resumed.last_user_id, resumed.sent
+                    job.failed, job.blocked = resumed.failed, resumed.blocked
+                    job.sent_at_start = job.sent
+                if job.last_user_id:
+                    logger.info(f"Resuming broadcast {job.id} after user {job.last_user_id}")
+
+                # If the lease is lost the job stays "running" for the new holder
+                await owner.guard(self._send_job(job))
+        except LeaseLost:
+            logger.error(f"Broadcast {job.id} stopped: its lease was lost")
+        finally:
+            self._jobs.pop(job.id, None)
+
+    async def _send_job(self, job: _Job):
+        status = "running"
+        last_saved = time.monotonic()
+        await self._report(job, "started")
+
+        try:
+            recipients = db_manager.iter_audience(job.audience, job.last_user_id)
+            async with aclosing(recipients):
+                batch = []
+                async for recipient in recipients:
+                    batch.append(recipient)
+                    if len(batch) < self.batch_size:
+                        continue
+
+                    await self._process_batch(job, batch)
+                    batch = []
+                    if job.cancelled:
+                        break
+
+                    if time.monotonic() - last_saved >= self.progress_interval:
+                        await self._save(job, status)
+                        await self._report(job, status)
+                        last_saved = time.monotonic()
+
+                if batch and not job.cancelled:
+                    await self._process_batch(job, batch)
+
+            status = "cancelled" if job.cancelled else "completed"
+        except asyncio.CancelledError:
+            # Shutdown: keep status "running" so the job resumes on restart
+            raise
+        except Exception as e:
+            logger.error(f"Broadcast {job.id} failed: {e}")
+            status = "failed"
+        finally:
+            await self._save(job, status)
+
+        logger.info(f"Broadcast {job.id} {status}: sent {job.sent}, failed {job.failed}, blocked {job.blocked}")
+        await self._report(job, status)
+
+    async def _process_batch(self, job: _Job, batch: List[Dict[str, Any]]):
+        blocked_ids = await self._send_batch(job, batch)
+        await db_manager.mark_users_blocked(blocked_ids)
+
+    async def _send_batch(self, job: _Job, batch: List[Dict[str, Any]]) -> List[int]:
+        """Send one page of recipients concurrently, advancing the resume point in order"""
+        done = [False] * len(batch)
+        prefix = 0
+        blocked_ids: List[int] = []
+        recipients = iter(enumerate(zip(batch, job.render(batch))))
+
+        async def worker():
+            nonlocal prefix
+            for index, (recipient, text) in recipients:
+                if job.cancelled:
+                    return
+                if text:
+                    outcome = await self._deliver(recipient["user_id"], text)
+                    if outcome == "sent":
+                        job.sent += 1
+                    elif outcome == "blocked":
+                        job.blocked += 1
+                        blocked_ids.append(recipient["user_id"])
+                    else:
+                        job.failed += 1
+                    metrics.inc(f"broadcast.{outcome}")
+
+                done[index] = True
+                while prefix < len(batch) and done[prefix]:
+                    prefix += 1
+                if prefix:
+                    job.last_user_id = batch[prefix - 1]["user_id"]
+
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(batch)))))
+        return blocked_ids
+
+    async def _deliver(self, chat_id: int, text: str) -> str:
+        """Send a message respecting rate limits; returns sent, blocked or failed"""
+        for attempt in range(1, MAX_SEND_ATTEMPTS + 1):
+            await self._wait_for_chat(chat_id)
+            await self.bucket.acquire()
+            try:
+                await self._bot.send_message(chat_id, text)
+                return "sent"
+            except TelegramRetryAfter as e:
+                # Flood control applies to the whole bot, so pause every sender
+                metrics.inc("broadcast.retry_after")
+                self.bucket.pause(e.retry_after)
+                await asyncio.sleep(e.retry_after)
+            except TelegramForbiddenError:
+                return "blocked"
+            except TelegramBadRequest as e:
+                if any(error in str(e).lower() for error in UNREACHABLE_ERRORS):
+                    return "blocked"
+                logger.warning(f"Broadcast to {chat_id} rejected: {e}")
+                return "failed"
+            except Exception as e:
+                logger.warning(f"Broadcast to {chat_id} failed (attempt {attempt}): {e}")
+                await asyncio.sleep(attempt)
+        return "failed"
+
+    async def _wait_for_chat(self, chat_id: int):
+        now = time.monotonic()
+        wait = self._chat_last_sent.get(chat_id, 0) + self.per_chat_interval - now
+        if wait > 0:
+            await asyncio.sleep(wait)
+            now = time.monotonic()
+        self._chat_last_sent[chat_id] = now
+
+        if len(self._chat_last_sent) > 10000:
+            cutoff = now - self.per_chat_interval
+            self._chat_last_sent = {
+                chat: sent_at for chat, sent_at in self._chat_last_sent.items() if sent_at > cutoff
+            }
+
+    async def _save(self, job: _Job, status: str):
+        await db_manager.update_broadcast_job(job.id, job.last_user_id, job.sent, job.failed, job.blocked, status)
+
+    async def _report(self, job: _Job, status: str):
+        """Post or update the job's progress message in the admin chat"""
+        admin_chat_id = config.get('ADMIN_CHAT_ID')
+        if not admin_chat_id:
+            return
+
+        text = (
+            f"📢 Broadcast <b>{job.kind}</b> <code>{job.id[:JOB_ID_PREFIX_LENGTH]}</code>: {status}\n"
+            f"• Sent: {job.sent}\n"
+            f"• Failed: {job.failed}\n"
+            f"• Blocked: {job.blocked}\n"
+            f"• Rate: {job.rate():.1f} msg/s"
+        )
+        try:
+            if job.report_message_id:
+                await self._bot.edit_message_text(text, chat_id=admin_chat_id, message_id=job.report_message_id)
+            else:
+                report = await self._bot.send_message(admin_chat_id, text)
+                job.report_message_id = report.message_id
+        except Exception as e:
+            logger.warning(f"Failed to report broadcast progress: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get running broadcast jobs"""
+        return {
+            "jobs": {
+                job_id: {
+                    "kind": job.kind,
+                    "sent": job.sent,
+                    "failed": job.failed,
+                    "blocked": job.blocked,
+                    "rate": round(job.rate(), 1)
+                }
+                for job_id, job in self._jobs.items()
+            }
+        }
+
+
+# Global broadcast engine
+broadcast_engine = BroadcastEngine()
+metrics.register_collector("broadcast", broadcast_engine.get_stats)
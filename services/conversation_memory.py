@@ -0,0 +1,181 @@
+import logging
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from config import config
+from database.db_manager import db_manager
+
+logger = logging.getLogger(__name__)
+
+# Rough chars-per-token ratio; good enough for budgeting Ukrainian/English text
+CHARS_PER_TOKEN = 4
+SUMMARY_LINE_CHARS = 160
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used for prompt budgeting"""
+    if not text:
+        return 0
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+class _Session:
+    """Per-user conversation state kept in memory"""
+    __slots__ = ("turns", "summary_lines", "summary_cache")
+
+    def __init__(self, max_turns: int, max_summary_lines: int):
+        self.turns: Deque[Tuple[str, str]] = deque(maxlen=max_turns)
+        self.summary_lines: Deque[str] = deque(maxlen=max_summary_lines)
+        self.summary_cache: Optional[str] = None
+
+
+class ConversationMemory:
+    """
+    Keeps recent AI chat turns per user in a bounded ring buffer.
+    History is loaded from ai_chats (turns after the user's last reset) once
+    per user; afterwards the context is assembled from memory only. Turns
+    pushed out of the ring are rolled into a compact summary that is
+    rebuilt only when it changes.
+    """
+
+    def __init__(self, max_turns: int = None, token_budget: int = None,
+                 max_users: int = None, max_summary_lines: int = 20):
+        self.max_turns = max_turns or config.get('AI_MEMORY_TURNS', 12)
+        self.token_budget = token_budget or config.get('AI_CONTEXT_TOKEN_BUDGET', 1200)
+        self.max_users = max_users or config.get('AI_MEMORY_MAX_USERS', 5000)
+        self.max_summary_lines = max_summary_lines
+        self._sessions: "OrderedDict[int, _Session]" = OrderedDict()
+
+    def _new_session(self) -> _Session:
+        return _Session(self.max_turns, self.max_summary_lines)
+
+    def _touch(self, user_id: int, session: _Session):
+        """Mark session as recently used and evict the least recent ones"""
+        self._sessions[user_id] = session
+        self._sessions.move_to_end(user_id)
+        while len(self._sessions) > self.max_users:
+            self._sessions.popitem(last=False)
+
+    async def _get_session(self, user_id: int) -> _Session:
+        """Get session, loading it from the database on first access"""
+        session = self._sessions.get(user_id)
+        if session is not None:
+            self._sessions.move_to_end(user_id)
+            return session
+
+        session = self._new_session()
+        # Load a few extra turns so the summary survives restarts
+        rows = await db_manager.get_recent_ai_chats(
+            user_id, self.max_turns + self.max_summary_lines
+        )
+        for row in rows:
+            self._append(session, row['message'], row['response'])
+
+        # Another update for this user may have loaded it while we awaited
+        existing = self._sessions.get(user_id)
+        if existing is not None:
+            return existing
+
+        self._touch(user_id, session)
+        return session
+
+    def _append(self, session: _Session, message: str, response: str):
+        if len(session.turns) == session.turns.maxlen:
+            old_message, old_response = session.turns[0]
+            session.summary_lines.append(self._summarize_turn(old_message, old_response))
+            session.summary_cache = None
+        session.turns.append((message or "", response or ""))
+
+    @staticmethod
+    def _first_sentence(text: str, limit: int) -> str:
+        text = " ".join(text.split())
+        for separator in (". ", "! ", "? ", "\n"):
+            index = text.find(separator)
+            if 0 < index < limit:
+                text = text[:index + 1]
+                break
+        if len(text) > limit:
+            text = text[:limit - 1].rstrip() + "…"
+        return text
+
+    def _summarize_turn(self, message: str, response: str) -> str:
+        """Condense an old turn into a single summary line"""
+        half = SUMMARY_LINE_CHARS // 2
+        return f"- {self._first_sentence(message, half)} → {self._first_sentence(response, half)}"
+
+    def _get_summary(self, session: _Session) -> Optional[str]:
+        if not session.summary_lines:
+            return None
+        if session.summary_cache is None:
+            session.summary_cache = "\n".join(session.summary_lines)
+        return session.summary_cache
+
+    def add_turn(self, user_id: int, message: str, response: str):
+        """
+        Record a completed user/assistant exchange.
+        Sessions that are not loaded yet are skipped: the turn is already in
+        ai_chats and will be picked up on the next load.
+        """
+        session = self._sessions.get(user_id)
+        if session is not None:
+            self._append(session, message, response)
+
+    async def build_context(self, user_id: int, message: str = "") -> Dict:
+        """
+        Assemble conversation context that fits into the token budget.
+        Returns {"summary": str | None, "turns": [(message, response), ...]}
+        """
+        try:
+            session = await self._get_session(user_id)
+        except Exception as e:
+            logger.error(f"Error loading conversation memory for user {user_id}: {e}")
+            return {"summary": None, "turns": []}
+
+        budget = self.token_budget - estimate_tokens(message)
+
+        summary = self._get_summary(session)
+        if summary:
+            # Summary gets at most a quarter of the budget, newest lines first
+            summary_budget = budget // 4
+            if estimate_tokens(summary) > summary_budget:
+                lines: List[str] = []
+                used = 0
+                for line in reversed(session.summary_lines):
+                    cost = estimate_tokens(line)
+                    if used + cost > summary_budget:
+                        break
+                    lines.append(line)
+                    used += cost
+                summary = "\n".join(reversed(lines)) or None
+            budget -= estimate_tokens(summary) if summary else 0
+
+        turns: List[Tuple[str, str]] = []
+        for turn_message, turn_response in reversed(session.turns):
+            cost = estimate_tokens(turn_message) + estimate_tokens(turn_response)
+            if cost > budget:
+                break
+            turns.append((turn_message, turn_response))
+            budget -= cost
+        turns.reverse()
+
+        return {"summary": summary, "turns": turns}
+
+    async def reset(self, user_id: int):
+        """
+        Start a fresh conversation for the user. The reset time is stored
+        with the user, so earlier turns stay out of the context after a
+        restart or eviction too.
+        """
+        self._touch(user_id, self._new_session())
+        await db_manager.reset_ai_context(user_id)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get memory usage statistics"""
+        return {
+            "users": len(self._sessions),
+            "turns": sum(len(s.turns) for s in self._sessions.values())
+        }
+
+
+# Global conversation memory instance
+conversation_memory = ConversationMemory()
@@ -0,0 +1,259 @@
+import asyncio
+import itertools
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from aiogram.exceptions import TelegramRetryAfter
+
+from config import config
+from database.db_manager import db_manager
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Lower value is delivered first
+PRIORITY_IMMEDIATE = 0   # crisis requiring immediate attention
+PRIORITY_CRISIS = 1      # crisis indicators detected
+PRIORITY_LOW_MOOD = 2    # mood check-in at 3 or below
+
+MAX_RETRY_DELAY = 300
+
+
+def crisis_priority(crisis_check: Dict[str, Any]) -> int:
+    """Map crisis detector result to alert priority"""
+    if crisis_check.get("requires_immediate_attention"):
+        return PRIORITY_IMMEDIATE
+    return PRIORITY_CRISIS
+
+
+class CrisisAlertQueue:
+    """
+    Delivers crisis alerts to the admin chat.
+
+    submit() never waits: the alert is written to the crisis_alert_outbox
+    table in a background task and then queued in memory by priority. A single
+    worker sends alerts with a rate limit and marks them delivered.
+
+    Every outbox row is claimed by one bot instance for a lease, so several
+    instances never send the same alert. A new alert is claimed by the
+    instance that raised it; a poller renews this instance's leases and claims
+    alerts nobody holds: those left by an instance that stopped, and those
+    released after a failed attempt once their retry delay has passed.
+    """
+
+    def __init__(self, dedup_window: int = None, alerts_per_minute: int = None,
+                 lease_seconds: float = None, poll_interval: float = None):
+        self.dedup_window = dedup_window or config.get('CRISIS_ALERT_DEDUP_SECONDS', 900)
+        alerts_per_minute = alerts_per_minute or config.get('CRISIS_ALERTS_PER_MINUTE', 20)
+        self.min_interval = 60.0 / alerts_per_minute
+        self.lease_seconds = lease_seconds or config.get('CRISIS_ALERT_LEASE_SECONDS', 120)
+        self.poll_interval = poll_interval or config.get('CRISIS_ALERT_POLL_SECONDS', 10)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._sequence = itertools.count()
+        self._recent: Dict[int, Tuple[float, int]] = {}
+        self._background: Set[asyncio.Task] = set()
+        # Outbox ids queued or being sent by this instance
+        self._held: Set[str] = set()
+        self._worker: Optional[asyncio.Task] = None
+        self._poller: Optional[asyncio.Task] = None
+        self._bot = None
+        self._sender: Optional[Callable[..., Awaitable[Any]]] = None
+        self._last_sent = 0.0
+        self.stats = {"submitted": 0, "deduplicated": 0, "sent": 0, "failed_attempts": 0}
+
+    async def start(self, bot, sender: Callable[..., Awaitable[Any]]):
+        """Start delivery worker and claim undelivered alerts"""
+        self._bot = bot
+        self._sender = sender
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+
+        await self.poll()
+        self._worker = asyncio.create_task(self._run())
+        self._poller = asyncio.create_task(self._poll_forever())
+        logger.info(f"Crisis alert queue started as {self.owner} ({self._queue.qsize()} pending)")
+
+    async def stop(self):
+        """Stop delivery and hand undelivered alerts back to other instances"""
+        for task in (self._poller, self._worker):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._poller = self._worker = None
+        await db_manager.release_crisis_alert_claims(self.owner)
+        self._held.clear()
+
+    async def poll(self) -> int:
+        """Renew this instance's leases and claim free alerts; returns number claimed"""
+        claimed = 0
+        for row in await db_manager.claim_crisis_alerts(self.owner, self.lease_seconds):
+            alert_id = str(row["id"])
+            # Already queued here (its lease lapsed while the database was unreachable)
+            if alert_id in self._held:
+                continue
+            self._held.add(alert_id)
+            self._put({
+                "id": alert_id,
+                "user_id": row["user_id"],
+                "source": row["source"],
+                "priority": row["priority"],
+                "message": row["message"] or "",
+                "indicators": list(row["indicators"] or []),
+                "confidence": row["confidence"] or 0.0,
+                "created_at": row["created_at"].timestamp(),
+                "attempts": row["attempts"] or 0
+            })
+            claimed += 1
+        return claimed
+
+    async def _poll_forever(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.poll()
+            except Exception as e:
+                logger.error(f"Error polling crisis alert outbox: {e}")
+
+    def submit(self, user_id: int, source: str, message: str,
+               crisis_check: Dict[str, Any] = None, priority: int = None) -> bool:
+        """
+        Queue an alert without blocking the caller.
+        Returns False if alerts are disabled or the alert was deduplicated.
+        """
+        if not config.get('ADMIN_CHAT_ID'):
+            return False
+
+        crisis_check = crisis_check or {}
+        if priority is None:
+            priority = crisis_priority(crisis_check)
+
+        now = time.time()
+        self._prune_recent(now)
+        recent = self._recent.get(user_id)
+        # Same user within the window: only escalate if priority is higher
+        if recent and now - recent[0] < self.dedup_window and priority >= recent[1]:
+            self.stats["deduplicated"] += 1
+            metrics.inc("crisis_alerts.deduplicated")
+            return False
+        self._recent[user_id] = (now, priority)
+
+        alert = {
+            "id": None,
+            "user_id": user_id,
+            "source": source,
+            "priority": priority,
+            "message": (message or "")[:1000],
+            "indicators": list(crisis_check.get("indicators", [])),
+            "confidence": float(crisis_check.get("confidence", 0.0)),
+            "created_at": now
+        }
+        self.stats["submitted"] += 1
+        metrics.inc(f"crisis_alerts.submitted.{source}")
+
+        task = asyncio.create_task(self._persist_and_enqueue(alert))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return True
+
+    def _prune_recent(self, now: float):
+        if len(self._recent) < 1000:
+            return
+        expired = [user_id for user_id, (ts, _) in self._recent.items()
+                   if now - ts >= self.dedup_window]
+        for user_id in expired:
+            del self._recent[user_id]
+
+    async def _persist_and_enqueue(self, alert: Dict[str, Any]):
+        alert["id"] = await db_manager.create_crisis_alert(
+            alert["user_id"], alert["source"], alert["priority"],
+            alert["message"], alert["indicators"], alert["confidence"],
+            owner=self.owner, lease_seconds=self.lease_seconds
+        )
+        if alert["id"] is None:
+            logger.warning(f"Crisis alert for user {alert['user_id']} not persisted, delivering from memory")
+        else:
+            self._held.add(alert["id"])
+        self._put(alert)
+
+    def _put(self, alert: Dict[str, Any]):
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+        self._queue.put_nowait((alert["priority"], next(self._sequence), alert))
+
+    async def _run(self):
+        while True:
+            _, _, alert = await self._queue.get()
+
+            # Rate limit admin notifications
+            wait = self._last_sent + self.min_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            try:
+                await self._sender(
+                    self._bot, alert["user_id"], alert["message"],
+                    {"confidence": alert["confidence"], "indicators": alert["indicators"]},
+                    source=alert["source"], priority=alert["priority"]
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await self._handle_failure(alert, e)
+                continue
+            finally:
+                self._last_sent = time.monotonic()
+
+            latency = time.time() - alert["created_at"]
+            metrics.observe("crisis_alerts.latency", latency)
+            self.stats["sent"] += 1
+            if alert["id"]:
+                await db_manager.mark_crisis_alert_delivered(alert["id"])
+                self._held.discard(alert["id"])
+
+    async def _handle_failure(self, alert: Dict[str, Any], error: Exception):
+        self.stats["failed_attempts"] += 1
+        metrics.inc("crisis_alerts.failed_attempts")
+        alert["attempts"] = alert.get("attempts", 0) + 1
+
+        if isinstance(error, TelegramRetryAfter):
+            delay = error.retry_after
+        else:
+            delay = min(MAX_RETRY_DELAY, 2 ** alert["attempts"])
+        logger.error(f"Crisis alert delivery failed (attempt {alert['attempts']}), retrying in {delay}s: {error}")
+
+        if alert["id"]:
+            # Released with a retry delay; whichever instance polls first after it retries
+            await db_manager.release_crisis_alert(alert["id"], str(error), delay)
+            self._held.discard(alert["id"])
+            return
+
+        task = asyncio.create_task(self._requeue_later(alert, delay))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _requeue_later(self, alert: Dict[str, Any], delay: float):
+        await asyncio.sleep(delay)
+        self._put(alert)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get alert pipeline statistics"""
+        return dict(
+            self.stats,
+            pending=self._queue.qsize() if self._queue else 0,
+            held=len(self._held),
+            latency=metrics.timings["crisis_alerts.latency"].snapshot()
+            if "crisis_alerts.latency" in metrics.timings else None
+        )
+
+
+# Global crisis alert queue
+crisis_alert_queue = CrisisAlertQueue()
+metrics.register_collector("crisis_alerts", crisis_alert_queue.get_stats)
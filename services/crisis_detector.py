@@ -0,0 +1,250 @@
+import re
+from collections import deque
+from typing import Any, Dict, List, Tuple
+
+# Severity weights combine into the confidence score. Immediate attention
+# needs at least two distinct indicators, whatever their severity
+HIGH = 0.9
+MEDIUM = 0.4
+
+# A trailing "*" makes the last word a prefix: "суїцид*" also matches
+# "суїцидальні" and "hopeless*" matches "hopelessness"
+CRISIS_PHRASES: Dict[str, List[Tuple[str, float]]] = {
+    "uk": [
+        ("самогубств*", HIGH),
+        ("суїцид*", HIGH),
+        ("покінчити з життям", HIGH),
+        ("покінчити з собою", HIGH),
+        ("накласти на себе руки", HIGH),
+        ("вбити себе", HIGH),
+        ("вб'ю себе", HIGH),
+        ("не хочу жити", HIGH),
+        ("не хочеться жити", HIGH),
+        ("хочу померти", HIGH),
+        ("хочу вмерти", HIGH),
+        ("хочеться померти", HIGH),
+        ("краще б помер", HIGH),
+        ("краще б я помер", HIGH),
+        ("немає сенсу жити", HIGH),
+        ("не бачу сенсу жити", HIGH),
+        ("немає сенсу", MEDIUM),
+        ("все безнадійн*", MEDIUM),
+        ("нікому не потрібен", MEDIUM),
+        ("нікому не потрібна", MEDIUM),
+    ],
+    "ru": [
+        ("самоубийств*", HIGH),
+        ("суицид*", HIGH),
+        ("покончить с собой", HIGH),
+        ("не хочу жить", HIGH),
+        ("хочу умереть", HIGH),
+    ],
+    "en": [
+        ("suicid*", HIGH),
+        ("kill myself", HIGH),
+        ("end my life", HIGH),
+        ("don't want to live", HIGH),
+        ("better off dead", HIGH),
+        ("want to die", HIGH),
+        ("no point", MEDIUM),
+        ("hopeless*", MEDIUM),
+        ("nobody cares", MEDIUM),
+    ],
+}
+
+APOSTROPHES = "’ʼ`‘´′ʹ"
+
+# Latin and digit lookalikes of Cyrillic letters, applied to Cyrillic words
+LATIN_TO_CYRILLIC = str.maketrans({
+    "a": "а", "c": "с", "e": "е", "i": "і", "o": "о", "p": "р",
+    "x": "х", "y": "у", "k": "к", "m": "м", "t": "т", "h": "н",
+    "b": "в", "0": "о", "3": "з", "6": "б",
+})
+
+# Cyrillic lookalikes of Latin letters, applied to Latin words
+CYRILLIC_TO_LATIN = str.maketrans({
+    "а": "a", "с": "c", "е": "e", "і": "i", "о": "o", "р": "p",
+    "х": "x", "у": "y", "к": "k", "м": "m", "т": "t", "н": "h",
+    "в": "b",
+})
+
+LATIN_LOOKALIKES = frozenset("aceiopxykmthb03")
+
+# Filler words dropped from both phrases and text, so that
+# "не хочеться вже жити" still matches "не хочеться жити"
+FILLER_WORDS = frozenset({
+    "я", "б", "би", "ж", "же", "ну", "от", "вже", "уже", "більше", "просто",
+    "зовсім", "взагалі", "дуже", "так", "i", "just", "really", "so", "even",
+    "anymore", "honestly",
+})
+
+TOKEN_RE = re.compile(r"[^\W_]+")
+CYRILLIC_RE = re.compile(r"[а-яіїєґё]")
+LATIN_RE = re.compile(r"[a-z]")
+
+# One reflexive and then one inflectional suffix (longest first) are stripped
+UK_REFLEXIVE = ("ся", "сь")
+UK_SUFFIXES = frozenset({
+    "ами", "ями", "ові", "еві", "ого", "ому", "ими", "іми", "ться",
+    "уть", "ють", "ать", "ять", "ите", "іть", "ити", "ати", "яти",
+    "ої", "ою", "ею", "ій", "ий", "ім", "их", "іх", "ам", "ям", "ах", "ях",
+    "ом", "ем", "ти", "ть", "ла", "ли", "ло", "ну", "єш", "еш", "иш",
+    "а", "я", "о", "е", "у", "ю", "і", "и", "ь", "й", "є",
+})
+UK_SUFFIX_LENGTHS = sorted({len(suffix) for suffix in UK_SUFFIXES}, reverse=True)
+EN_SUFFIXES = ("ing", "ed", "es", "s")
+MIN_STEM = 3
+
+
+def _fix_homoglyphs(token: str, cyrillic_text: bool) -> str:
+    """Map lookalike characters to the script the word is mostly written in"""
+    if token.isascii():
+        if cyrillic_text and LATIN_LOOKALIKES.issuperset(token):
+            # e.g. "HE" written in Latin letters inside Ukrainian text
+            return token.translate(LATIN_TO_CYRILLIC)
+        return token
+
+    latin = len(LATIN_RE.findall(token))
+    if latin or any(ch.isdigit() for ch in token):
+        if len(CYRILLIC_RE.findall(token)) >= latin:
+            return token.translate(LATIN_TO_CYRILLIC)
+        return token.translate(CYRILLIC_TO_LATIN)
+    return token
+
+
+def stem(token: str) -> str:
+    """Very small suffix-stripping stemmer for Ukrainian and English"""
+    if not token.isascii():
+        if token.endswith(UK_REFLEXIVE) and len(token) - 2 >= MIN_STEM:
+            token = token[:-2]
+        for length in UK_SUFFIX_LENGTHS:
+            if len(token) - length >= MIN_STEM and token[-length:] in UK_SUFFIXES:
+                return token[:-length]
+        return token
+
+    for suffix in EN_SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= MIN_STEM + 1:
+            return token[:-len(suffix)]
+    return token
+
+
+def normalize(text: str) -> List[str]:
+    """
+    Normalize text into a list of stems: case folding, apostrophe
+    unification (apostrophes are dropped), homoglyph mapping and stemming
+    """
+    text = text.casefold()
+    for apostrophe in APOSTROPHES + "'":
+        text = text.replace(apostrophe, "")
+    cyrillic_text = len(CYRILLIC_RE.findall(text)) > len(LATIN_RE.findall(text))
+
+    stems = []
+    for token in TOKEN_RE.findall(text):
+        token = _fix_homoglyphs(token, cyrillic_text)
+        if token not in FILLER_WORDS:
+            stems.append(stem(token))
+    return stems
+
+
+class AhoCorasick:
+    """Multi-pattern string matcher that scans the text in a single pass"""
+
+    def __init__(self, patterns: List[str]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[int]] = [[]]
+
+        for index, pattern in enumerate(patterns):
+            state = 0
+            for char in pattern:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                state = next_state
+            self.output[state].append(index)
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[next_state] = target if target != next_state else 0
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def search(self, text: str) -> List[int]:
+        """Return indexes of all patterns found in text"""
+        goto, fail, output = self.goto, self.fail, self.output
+        found = []
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.extend(output[state])
+        return found
+
+
+class CrisisDetector:
+    """
+    Detects crisis phrases in user text.
+    Phrases and text go through the same normalization, and the stemmed
+    words are joined with single spaces, so a pattern " stem stem " only
+    matches on whole-word boundaries. Prefix phrases leave out the trailing
+    space, so their last stem also matches longer derived words.
+    """
+
+    def __init__(self, phrases: Dict[str, List[Tuple[str, float]]] = None):
+        phrases = phrases or CRISIS_PHRASES
+        self.indicators: List[str] = []
+        self.weights: List[float] = []
+        patterns: List[str] = []
+        seen = set()
+
+        for items in phrases.values():
+            for phrase, weight in items:
+                pattern = f" {' '.join(normalize(phrase))}" + ("" if phrase.endswith("*") else " ")
+                if pattern in seen:
+                    continue
+                seen.add(pattern)
+                patterns.append(pattern)
+                self.indicators.append(phrase.rstrip("*"))
+                self.weights.append(weight)
+
+        self.automaton = AhoCorasick(patterns)
+
+    def scan(self, text: str) -> Dict[str, Any]:
+        """Scan text for crisis indicators"""
+        if not text:
+            return {
+                "crisis_detected": False,
+                "confidence": 0.0,
+                "indicators": [],
+                "requires_immediate_attention": False
+            }
+
+        stream = f" {' '.join(normalize(text))} "
+        matched = sorted(set(self.automaton.search(stream)))
+
+        no_risk = 1.0
+        for index in matched:
+            no_risk *= 1.0 - self.weights[index]
+
+        return {
+            "crisis_detected": bool(matched),
+            "confidence": round(1.0 - no_risk, 3),
+            "indicators": [self.indicators[index] for index in matched],
+            "requires_immediate_attention": len(matched) >= 2
+        }
+
+
+# Global crisis detector, compiled once at import
+crisis_detector = CrisisDetector()
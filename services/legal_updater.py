@@ -1,11 +1,11 @@
 import asyncio
-import aiohttp
 import json
 import logging
 from datetime import datetime
 from typing import Dict, List, Any
 
 from config import config
+from utils.http_client import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -171,17 +171,16 @@ class LegalUpdater:
                 "Content-Type": "application/json"
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{self.government_api_url}/{endpoint}",
-                    headers=headers
-                ) as response:
-                    if response.status == 200:
-                        return await response.json()
-                    else:
-                        logger.error(f"Government API error: {response.status}")
-                        return {}
-                        
+            async with http_client.session.get(
+                f"{self.government_api_url}/{endpoint}",
+                headers=headers
+            ) as response:
+                if response.status == 200:
+                    return await response.json()
+                else:
+                    logger.error(f"Government API error: {response.status}")
+                    return {}
+            
         except Exception as e:
             logger.error(f"Error fetching from government API: {e}")
             return {}
@@ -0,0 +1,116 @@
+import hashlib
+import logging
+import random
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import config
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    """Cached response variants for one prompt key"""
+    __slots__ = ("variants",)
+
+    def __init__(self):
+        self.variants: List[Tuple[str, float]] = []
+
+
+class ResponseCache:
+    """
+    Cache for AI responses to prompts that do not depend on the conversation,
+    e.g. general advice and coping strategies.
+
+    Each key keeps up to `variants_per_key` different responses so users do not
+    all get the identical text; until that many are collected, lookups miss and
+    the caller asks the provider again. Expired variants are still kept around
+    (until the key is evicted) to serve as a fallback when providers fail.
+    """
+
+    def __init__(self, ttl: int = None, max_keys: int = None, variants_per_key: int = None):
+        self.ttl = ttl or config.get('AI_CACHE_TTL', 21600)
+        self.max_keys = max_keys or config.get('AI_CACHE_MAX_KEYS', 512)
+        self.variants_per_key = variants_per_key or config.get('AI_CACHE_VARIANTS', 3)
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def make_key(prompt_type: str, prompt: str, language: str, bucket: Tuple = ()) -> str:
+        """Build cache key from normalized prompt and context bucket"""
+        normalized = " ".join(prompt.lower().split())
+        raw = "|".join([prompt_type, language, repr(bucket), normalized])
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _count(self, prompt_type: str, outcome: str):
+        stats = self._stats.setdefault(
+            prompt_type, {"hits": 0, "misses": 0, "stale_hits": 0, "stores": 0}
+        )
+        stats[outcome] += 1
+        metrics.inc(f"ai_cache.{outcome}.{prompt_type}")
+
+    def get(self, prompt_type: str, key: str) -> Optional[str]:
+        """Get a fresh cached response, or None if the key needs more variants"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            now = time.time()
+            fresh = [text for text, created in entry.variants if now - created < self.ttl]
+            if len(fresh) >= self.variants_per_key:
+                self._entries.move_to_end(key)
+                self._count(prompt_type, "hits")
+                return random.choice(fresh)
+
+        self._count(prompt_type, "misses")
+        return None
+
+    def get_stale(self, prompt_type: str, key: str) -> Optional[str]:
+        """Get any cached response regardless of age (provider fallback)"""
+        entry = self._entries.get(key)
+        if entry is None or not entry.variants:
+            return None
+
+        self._count(prompt_type, "stale_hits")
+        # Prefer the newest variant
+        return max(entry.variants, key=lambda variant: variant[1])[0]
+
+    def put(self, prompt_type: str, key: str, text: str):
+        """Store a response variant"""
+        if not text:
+            return
+
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = _Entry()
+        self._entries.move_to_end(key)
+
+        now = time.time()
+        variants = [(t, created) for t, created in entry.variants
+                    if now - created < self.ttl and t != text]
+        variants.append((text, now))
+        entry.variants = variants[-self.variants_per_key:]
+        self._count(prompt_type, "stores")
+
+        while len(self._entries) > self.max_keys:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all cached responses"""
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit rate per prompt type"""
+        prompt_types = {}
+        for prompt_type, stats in self._stats.items():
+            lookups = stats["hits"] + stats["misses"]
+            prompt_types[prompt_type] = dict(
+                stats,
+                hit_rate=round(stats["hits"] / lookups, 3) if lookups else 0.0
+            )
+        return {"keys": len(self._entries), "prompt_types": prompt_types}
+
+
+# Global response cache instance
+response_cache = ResponseCache()
+metrics.register_collector("ai_response_cache", response_cache.get_stats)
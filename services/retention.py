@@ -0,0 +1,136 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from config import config
+from database.db_manager import db_manager
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+ArchiveHook = Callable[[str, List[Dict[str, Any]]], Awaitable[None]]
+
+
+def jsonl_archive(directory: str) -> ArchiveHook:
+    """Archive hook appending deleted rows to gzipped JSON lines, one file per table and day"""
+
+    def write(path: str, rows: List[Dict[str, Any]]):
+        with gzip.open(path, "at", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row, default=str, ensure_ascii=False) + "\n")
+
+    async def archive(table: str, rows: List[Dict[str, Any]]):
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{table}-{datetime.now():%Y%m%d}.jsonl.gz")
+        await asyncio.get_running_loop().run_in_executor(None, write, path, rows)
+
+    return archive
+
+
+class RetentionCleaner:
+    """
+    Deletes rows past their retention period.
+
+    Partitioned tables lose whole monthly partitions once their entire range
+    is past the cutoff (a cheap DETACH + DROP instead of row deletes), so
+    retention there is month-granular. Rows below the oldest monthly
+    partition (the pre-partitioning legacy table) are deleted in batches.
+
+    Each batch is its own short transaction (oldest rows first) followed by a
+    pause, so cleanup does not hold locks or generate a burst of WAL. The
+    timestamp of the last deleted row is stored as a watermark: the next batch
+    and the next run start there instead of walking the index over rows that
+    were already removed.
+    """
+
+    def __init__(self, archive: Optional[ArchiveHook] = None):
+        self.batch_size = config.get('RETENTION_BATCH_SIZE', 5000)
+        self.batch_pause = config.get('RETENTION_BATCH_PAUSE', 0.5)
+        self.policies = {
+            "ai_chats": timedelta(days=config.get('RETENTION_AI_CHATS_DAYS', 90)),
+            "mood_checkins": timedelta(days=config.get('RETENTION_MOOD_CHECKINS_DAYS', 730)),
+        }
+        if archive is None and config.get('RETENTION_ARCHIVE_DIR'):
+            archive = jsonl_archive(config['RETENTION_ARCHIVE_DIR'])
+        self.archive = archive
+        self.progress: Dict[str, Dict[str, Any]] = {}
+
+    async def cleanup_table(self, table: str, max_batches: int = None) -> int:
+        """Delete expired rows of one table; returns number of deleted rows"""
+        cutoff = datetime.now() - self.policies[table]
+        watermark = await db_manager.get_retention_watermark(table)
+        progress = self.progress[table] = {
+            "cutoff": cutoff.isoformat(),
+            "deleted": 0,
+            "batches": 0,
+            "dropped_partitions": [],
+            "watermark": watermark.isoformat() if watermark else None,
+            "running": True
+        }
+
+        try:
+            dropped = await db_manager.drop_expired_partitions(table, cutoff, self.archive)
+            progress["dropped_partitions"] = dropped
+            metrics.inc(f"retention.{table}.dropped_partitions", len(dropped))
+
+            # Monthly partitions expire as a whole; only older rows need deleting
+            floor = await db_manager.get_partition_floor(table)
+            if floor is not None:
+                cutoff = min(cutoff, floor)
+
+            while max_batches is None or progress["batches"] < max_batches:
+                start = time.monotonic()
+                deleted, last_timestamp = await db_manager.delete_old_rows_batch(
+                    table, watermark, cutoff, self.batch_size, self.archive
+                )
+                if not deleted:
+                    break
+
+                watermark = last_timestamp
+                await db_manager.save_retention_watermark(table, watermark, deleted)
+
+                progress["deleted"] += deleted
+                progress["batches"] += 1
+                progress["watermark"] = watermark.isoformat()
+                metrics.inc(f"retention.{table}.deleted", deleted)
+                metrics.observe(f"retention.{table}.batch", time.monotonic() - start)
+
+                if deleted < self.batch_size:
+                    break
+                await asyncio.sleep(self.batch_pause)
+        finally:
+            progress["running"] = False
+
+        return progress["deleted"]
+
+    async def run(self) -> Dict[str, int]:
+        """
+        Clean up every table with a retention policy. A failing table does not
+        stop the others; the run then raises so the job is recorded as failed.
+        """
+        results = {}
+        failed = []
+        for table in self.policies:
+            try:
+                results[table] = await self.cleanup_table(table)
+            except Exception as e:
+                logger.error(f"Error cleaning up {table}: {e}")
+                results[table] = self.progress.get(table, {}).get("deleted", 0)
+                failed.append(table)
+        if failed:
+            raise RuntimeError(f"Retention cleanup failed for {', '.join(failed)} (deleted {results})")
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get progress of the last cleanup of each table"""
+        return self.progress
+
+
+# Global retention cleaner
+retention_cleaner = RetentionCleaner()
+metrics.register_collector("retention", retention_cleaner.get_stats)
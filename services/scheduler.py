@@ -1,12 +1,19 @@
 import asyncio
-import schedule
 import time
 import logging
-from datetime import datetime, timedelta
-from typing import List, Optional
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from zoneinfo import ZoneInfo
 
-from database.db_manager import db_manager
+from config import config
+from database.db_manager import JobLease, LeaseLost, db_manager
+from services.broadcast import broadcast_engine
 from services.legal_updater import LegalUpdater
+from services.retention import retention_cleaner
+from services.sentiment_backfill import sentiment_backfill
+from services.user_stats import user_stats_recomputer
+from utils.cron import CronExpression
+from utils.metrics import metrics
 
 # Try to import MarketingManager with error handling
 try:
@@ -19,6 +26,34 @@ except ImportError as e:
 
 logger = logging.getLogger(__name__)
 
+# Longest single sleep, so wall clock jumps (suspend, NTP) are noticed
+MAX_SLEEP = 300
+# First retry delay after a scheduler loop error; doubled up to MAX_SLEEP
+ERROR_BACKOFF = 15
+
+
+def _utc_naive(moment: datetime) -> datetime:
+    """Convert an aware datetime to naive UTC for TIMESTAMP columns"""
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class ScheduledJob:
+    """A coroutine function run on a cron schedule"""
+
+    def __init__(self, name: str, cron: str, func: Callable[[], Awaitable[Any]],
+                 timeout: float, catch_up: timedelta):
+        self.name = name
+        self.cron = CronExpression(cron)
+        self.func = func
+        self.timeout = timeout
+        # Missed runs older than this are skipped instead of caught up
+        self.catch_up = catch_up
+        self.last_scheduled_at: Optional[datetime] = None
+        self.next_run_at: Optional[datetime] = None
+        self.last_status: Optional[str] = None
+        self.last_duration: Optional[float] = None
+
+
 class BotScheduler:
     def __init__(self):
         # Initialize MarketingManager with error handling
@@ -40,45 +75,171 @@ class BotScheduler:
             logger.warning(f"Warning: Legal updater disabled: {e}")
             self.legal_updater = None
         
+        self.timezone = ZoneInfo(config.get('SCHEDULER_TIMEZONE', 'UTC'))
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self._tasks: List[asyncio.Task] = []
         self.running = False
     
+    def add_job(self, name: str, cron: str, func: Callable[[], Awaitable[Any]],
+                timeout: float = 600, catch_up: timedelta = timedelta(hours=1)):
+        """Register a job; cron is evaluated in SCHEDULER_TIMEZONE"""
+        self.jobs[name] = ScheduledJob(name, cron, func, timeout, catch_up)
+    
     def setup_jobs(self):
         """Setup scheduled jobs"""
         try:
             # Daily tasks
-            schedule.every().day.at("09:00").do(self._run_async_job, self.send_daily_tips)
-            schedule.every().day.at("20:00").do(self._run_async_job, self.send_mood_reminders)
-            schedule.every().day.at("02:00").do(self._run_async_job, self.cleanup_old_data)
+            self.add_job("daily_tips", "0 9 * * *", self.send_daily_tips,
+                         timeout=300, catch_up=timedelta(hours=6))
+            self.add_job("mood_reminders", "0 20 * * *", self.send_mood_reminders,
+                         timeout=300, catch_up=timedelta(hours=2))
+            self.add_job("cleanup_old_data", "0 2 * * *", self.cleanup_old_data,
+                         timeout=3600, catch_up=timedelta(hours=20))
+            self.add_job("partition_maintenance", "30 1 * * *", self.partition_maintenance,
+                         timeout=600, catch_up=timedelta(hours=20))
+            self.add_job("sentiment_backfill", "30 2 * * *", self.backfill_sentiment,
+                         timeout=3600, catch_up=timedelta(hours=20))
             
             # Weekly tasks
-            schedule.every().monday.at("10:00").do(self._run_async_job, self.send_weekly_reports)
-            schedule.every().sunday.at("18:00").do(self._run_async_job, self.update_legal_content)
+            self.add_job("weekly_reports", "0 10 * * 1", self.send_weekly_reports,
+                         timeout=300, catch_up=timedelta(days=1))
+            self.add_job("update_legal_content", "0 18 * * 0", self.update_legal_content,
+                         timeout=1800, catch_up=timedelta(days=6))
             
             # Monthly tasks
-            schedule.every().day.at("03:00").do(self._run_async_job, self.monthly_maintenance)
+            self.add_job("monthly_maintenance", "0 3 1 * *", self.monthly_maintenance,
+                         timeout=3600, catch_up=timedelta(days=25))
             
             logger.info("Scheduled jobs configured successfully")
         except Exception as e:
             logger.error(f"Error setting up scheduled jobs: {e}")
             raise
     
-    def _run_async_job(self, coroutine_func):
-        """Helper method to run async functions in scheduled jobs"""
-        try:
-            # Get current event loop or create new one
+    def _now(self) -> datetime:
+        return datetime.now(self.timezone)
+    
+    def _first_run(self, job: ScheduledJob, state: Optional[Dict[str, Any]]) -> datetime:
+        """Next deadline for a job, or a missed one that is still worth catching up"""
+        now = self._now()
+        if state and state.get('last_scheduled_at'):
+            last = state['last_scheduled_at'].replace(tzinfo=timezone.utc).astimezone(self.timezone)
+            job.last_scheduled_at = last
+            job.last_status = state.get('last_status')
+            
+            missed = job.cron.next_after(last)
+            if missed <= now:
+                # Run the most recent missed deadline once; older ones are coalesced
+                latest = missed
+                while True:
+                    following = job.cron.next_after(latest)
+                    if following > now:
+                        break
+                    latest = following
+                if now - latest <= job.catch_up:
+                    logger.info(f"Catching up missed run of {job.name} scheduled at {latest}")
+                    return latest
+                logger.info(f"Skipping missed run of {job.name} scheduled at {latest}: too old")
+        
+        return job.cron.next_after(now)
+    
+    async def _run_job_loop(self, job: ScheduledJob, state: Optional[Dict[str, Any]]):
+        """
+        Sleep until each deadline and run the job; runs never overlap.
+        Errors outside the job itself (lease or state queries, clock) are
+        logged and the same deadline is retried with a growing backoff,
+        until it is older than the job's catch-up window.
+        """
+        backoff = ERROR_BACKOFF
+        while self.running:
             try:
-                loop = asyncio.get_event_loop()
-                if loop.is_running():
-                    # If loop is running, create a task
-                    asyncio.create_task(coroutine_func())
-                else:
-                    # If loop is not running, run until complete
-                    loop.run_until_complete(coroutine_func())
-            except RuntimeError:
-                # No event loop in current thread, create new one
-                asyncio.run(coroutine_func())
+                if job.next_run_at is None:
+                    job.next_run_at = self._first_run(job, state)
+                
+                delay = (job.next_run_at - self._now()).total_seconds()
+                if delay > 0:
+                    await asyncio.sleep(min(delay, MAX_SLEEP))
+                    continue
+                
+                await self._run_as_leader(job, job.next_run_at)
+                # Deadlines that passed while the job was running are skipped
+                job.next_run_at = job.cron.next_after(max(job.next_run_at, self._now()))
+                backoff = ERROR_BACKOFF
+            except Exception as e:
+                logger.error(f"Error in scheduler loop of {job.name}, retrying in {backoff}s: {e}")
+                metrics.inc(f"scheduler.{job.name}.loop_error")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, MAX_SLEEP)
+                try:
+                    if job.next_run_at is not None and self._now() - job.next_run_at > job.catch_up:
+                        logger.warning(f"Scheduled job {job.name} at {job.next_run_at} skipped after errors")
+                        job.next_run_at = job.cron.next_after(self._now())
+                except Exception as e:
+                    logger.error(f"Error rescheduling {job.name}: {e}")
+    
+    async def _run_as_leader(self, job: ScheduledJob, scheduled_at: datetime):
+        """
+        Run the job only on the instance holding its lease, and only if no
+        instance has completed this deadline yet. Instances that lose the
+        race keep polling the lease, so if the leader dies mid-run another one
+        takes over once the lease expires (within JOB_LEASE_SECONDS plus
+        SCHEDULER_LOCK_POLL_INTERVAL).
+        """
+        poll_interval = config.get('SCHEDULER_LOCK_POLL_INTERVAL', 15)
+        give_up_at = scheduled_at + job.catch_up
+        
+        while self.running:
+            async with db_manager.job_lease(f"scheduler:{job.name}") as leader:
+                if leader:
+                    state = await db_manager.get_job_state(job.name)
+                    if state and state['last_scheduled_at'] and state['last_scheduled_at'] >= _utc_naive(scheduled_at):
+                        logger.info(f"Scheduled job {job.name} at {scheduled_at} already ran on another instance")
+                        job.last_scheduled_at = scheduled_at
+                        job.last_status = state['last_status']
+                        return
+                    
+                    await self._execute(job, scheduled_at, leader)
+                    return
+            
+            if self._now() >= give_up_at:
+                logger.warning(f"Scheduled job {job.name} at {scheduled_at} skipped: lock held too long")
+                return
+            metrics.inc(f"scheduler.{job.name}.lock_wait")
+            await asyncio.sleep(poll_interval)
+    
+    async def _execute(self, job: ScheduledJob, scheduled_at: datetime, lease: JobLease):
+        """
+        Run the job and record its outcome; job methods log and re-raise their
+        errors. A run whose lease is lost is stopped and not recorded, so the
+        instance that took the lease over runs the deadline instead.
+        """
+        started_at = datetime.now(timezone.utc)
+        start = time.monotonic()
+        status, error = "ok", None
+        
+        try:
+            await asyncio.wait_for(lease.guard(job.func()), timeout=job.timeout)
+        except LeaseLost:
+            logger.error(f"Scheduled job {job.name} at {scheduled_at} stopped: its lease was lost")
+            metrics.inc(f"scheduler.{job.name}.lease_lost")
+            return
+        except asyncio.TimeoutError:
+            status, error = "timeout", f"Timed out after {job.timeout}s"
+            logger.error(f"Scheduled job {job.name} timed out after {job.timeout}s")
         except Exception as e:
-            logger.error(f"Error running async job {coroutine_func.__name__}: {e}")
+            status, error = "error", str(e)
+            logger.error(f"Error running scheduled job {job.name}: {e}")
+        
+        duration = time.monotonic() - start
+        job.last_scheduled_at = scheduled_at
+        job.last_status = status
+        job.last_duration = round(duration, 2)
+        metrics.observe(f"scheduler.{job.name}", duration)
+        metrics.inc(f"scheduler.{job.name}.{status}")
+        
+        await db_manager.record_job_run(
+            job.name, _utc_naive(scheduled_at), started_at.replace(tzinfo=None),
+            duration, status, error
+        )
     
     async def send_daily_tips(self):
         """Send daily mental health tips to active users"""
@@ -97,163 +258,91 @@ class BotScheduler:
             
             # Check if database connection is available
             if not db_manager or not db_manager.pool:
-                logger.error("Database connection not available")
-                return
-            
-            # Get active users
-            async with db_manager.pool.acquire() as conn:
-                active_users = await conn.fetch('''
-                    SELECT user_id FROM users 
-                    WHERE last_activity >= NOW() - INTERVAL '7 days'
-                    AND subscription_status != 'inactive'
-                ''')
+                raise RuntimeError("Database connection not available")
             
-            # Send tips using marketing manager if available
-            if self.marketing_manager:
-                try:
-                    await self.marketing_manager.send_bulk_message(
-                        [user['user_id'] for user in active_users],
-                        today_tip
-                    )
-                    logger.info(f"Daily tip sent to {len(active_users)} users via marketing manager")
-                except Exception as e:
-                    logger.error(f"Error sending tips via marketing manager: {e}")
-            else:
-                logger.info(f"Would send daily tip to {len(active_users)} users: {today_tip}")
+            job_id = await broadcast_engine.submit("daily_tip", "active_7d", {"uk": today_tip})
+            logger.info(f"Daily tip broadcast {job_id} started")
             
         except Exception as e:
             logger.error(f"Error sending daily tips: {e}")
+            raise
     
     async def send_mood_reminders(self):
         """Send mood check-in reminders to users who haven't checked in today"""
         try:
             if not db_manager or not db_manager.pool:
-                logger.error("Database connection not available")
-                return
+                raise RuntimeError("Database connection not available")
                 
-            async with db_manager.pool.acquire() as conn:
-                users_without_checkin = await conn.fetch('''
-                    SELECT u.user_id, u.first_name, u.language
-                    FROM users u
-                    LEFT JOIN mood_checkins m ON u.user_id = m.user_id 
-                        AND m.timestamp >= CURRENT_DATE
-                    WHERE u.last_activity >= NOW() - INTERVAL '3 days'
-                    AND m.user_id IS NULL
-                    AND u.subscription_status != 'inactive'
-                ''')
-            
             reminder_text_uk = "🧠 Нагадування: Як ваш настрій сьогодні? Відстежування настрою допомагає краще розуміти себе."
             reminder_text_en = "🧠 Reminder: How is your mood today? Mood tracking helps you understand yourself better."
             
-            if self.marketing_manager:
-                try:
-                    for user in users_without_checkin:
-                        text = reminder_text_uk if user['language'] == 'uk' else reminder_text_en
-                        await self.marketing_manager.send_message(user['user_id'], text)
-                    logger.info(f"Mood reminders sent to {len(users_without_checkin)} users")
-                except Exception as e:
-                    logger.error(f"Error sending mood reminders via marketing manager: {e}")
-            else:
-                logger.info(f"Would send mood reminders to {len(users_without_checkin)} users")
+            job_id = await broadcast_engine.submit(
+                "mood_reminder", "no_checkin_today",
+                {"uk": reminder_text_uk, "en": reminder_text_en}
+            )
+            logger.info(f"Mood reminder broadcast {job_id} started")
             
         except Exception as e:
             logger.error(f"Error sending mood reminders: {e}")
+            raise
     
     async def send_weekly_reports(self):
         """Send weekly mood reports to users"""
         try:
             if not db_manager or not db_manager.pool:
-                logger.error("Database connection not available")
-                return
+                raise RuntimeError("Database connection not available")
                 
-            async with db_manager.pool.acquire() as conn:
-                users_with_data = await conn.fetch('''
-                    SELECT DISTINCT u.user_id, u.first_name, u.language
-                    FROM users u
-                    JOIN mood_checkins m ON u.user_id = m.user_id
-                    WHERE m.timestamp >= NOW() - INTERVAL '7 days'
-                    AND u.subscription_status != 'inactive'
-                ''')
-            
-            if self.marketing_manager:
-                try:
-                    for user in users_with_data:
-                        # Generate weekly report for user
-                        report = await self._generate_weekly_report(user['user_id'])
-                        if report:
-                            await self.marketing_manager.send_message(user['user_id'], report)
-                    logger.info(f"Weekly reports sent to {len(users_with_data)} users")
-                except Exception as e:
-                    logger.error(f"Error sending weekly reports via marketing manager: {e}")
-            else:
-                logger.info(f"Would send weekly reports to {len(users_with_data)} users")
+            # Aggregates for all users come from one grouped query and the
+            # reports are rendered per batch by the broadcast engine
+            job_id = await broadcast_engine.submit("weekly_report", "weekly_report", {})
+            logger.info(f"Weekly report broadcast {job_id} started")
             
         except Exception as e:
             logger.error(f"Error sending weekly reports: {e}")
+            raise
     
-    async def _generate_weekly_report(self, user_id: int) -> Optional[str]:
-        """Generate weekly mood report for a user"""
+    async def cleanup_old_data(self):
+        """Clean up old data to maintain database performance"""
         try:
             if not db_manager or not db_manager.pool:
-                return None
+                raise RuntimeError("Database connection not available")
                 
-            async with db_manager.pool.acquire() as conn:
-                mood_data = await conn.fetch('''
-                    SELECT mood_level, timestamp
-                    FROM mood_checkins
-                    WHERE user_id = $1 AND timestamp >= NOW() - INTERVAL '7 days'
-                    ORDER BY timestamp
-                ''', user_id)
-            
-            if not mood_data:
-                return None
-            
-            avg_mood = sum(record['mood_level'] for record in mood_data) / len(mood_data)
-            check_ins = len(mood_data)
-            
-            report = f"""
-📊 Ваш тижневий звіт настрою:
-• Середній рівень настрою: {avg_mood:.1f}/5
-• Кількість відміток: {check_ins}
-• Тенденція: {'📈 Покращується' if mood_data[-1]['mood_level'] > mood_data[0]['mood_level'] else '📉 Знижується' if mood_data[-1]['mood_level'] < mood_data[0]['mood_level'] else '➡️ Стабільно'}
-
-Продовжуйте відстежувати свій настрій для кращого розуміння себе! 💪
-            """
+            # Batched deletes; an interrupted run resumes from the saved watermark
+            deleted = await retention_cleaner.run()
+            logger.info(
+                f"Cleaned up old data: {deleted.get('ai_chats', 0)} chats, "
+                f"{deleted.get('mood_checkins', 0)} mood entries"
+            )
+                
+        except Exception as e:
+            logger.error(f"Error cleaning up old data: {e}")
+            raise
+    
+    async def partition_maintenance(self):
+        """Create monthly partitions ahead of time"""
+        try:
+            if not db_manager or not db_manager.pool:
+                raise RuntimeError("Database connection not available")
             
-            return report.strip()
+            created = await db_manager.ensure_partitions()
+            logger.info(f"Partition maintenance done, {created} partitions created")
             
         except Exception as e:
-            logger.error(f"Error generating weekly report for user {user_id}: {e}")
-            return None
+            logger.error(f"Error in partition maintenance: {e}")
+            raise
     
-    async def cleanup_old_data(self):
-        """Clean up old data to maintain database performance"""
+    async def backfill_sentiment(self):
+        """Score AI chats saved without a sentiment score"""
         try:
             if not db_manager or not db_manager.pool:
-                logger.error("Database connection not available")
-                return
-                
-            async with db_manager.pool.acquire() as conn:
-                # Clean up old AI chats (keep last 3 months)
-                result1 = await conn.execute('''
-                    DELETE FROM ai_chats 
-                    WHERE timestamp < NOW() - INTERVAL '3 months'
-                ''')
-                
-                # Clean up old mood check-ins (keep last 2 years)
-                result2 = await conn.execute('''
-                    DELETE FROM mood_checkins 
-                    WHERE timestamp < NOW() - INTERVAL '2 years'
-                ''')
-                
-                # Parse result strings to get affected rows count
-                deleted_chats = result1.split()[1] if result1.startswith('DELETE') else '0'
-                deleted_moods = result2.split()[1] if result2.startswith('DELETE') else '0'
-                
-                logger.info(f"Cleaned up old data: {deleted_chats} chats, {deleted_moods} mood entries")
-                
+                raise RuntimeError("Database connection not available")
+            
+            result = await sentiment_backfill.run()
+            logger.info(f"Sentiment backfill done, {result['scored']} chats scored")
+            
         except Exception as e:
-            logger.error(f"Error cleaning up old data: {e}")
+            logger.error(f"Error in sentiment backfill: {e}")
+            raise
     
     async def update_legal_content(self):
         """Update legal content from external sources"""
@@ -266,36 +355,19 @@ class BotScheduler:
                 
         except Exception as e:
             logger.error(f"Error updating legal content: {e}")
+            raise
     
     async def monthly_maintenance(self):
         """Perform monthly maintenance tasks"""
         try:
-            # Only run on the 1st of each month
-            if datetime.now().day != 1:
-                return
-            
             if not db_manager or not db_manager.pool:
-                logger.error("Database connection not available")
-                return
+                raise RuntimeError("Database connection not available")
+            
+            # Update user statistics of users active since the last run
+            report = await user_stats_recomputer.run()
+            logger.info(f"User stats corrected for {report['users_drifted']} of {report['users_checked']} users")
             
             async with db_manager.pool.acquire() as conn:
-                # Update user statistics
-                await conn.execute('''
-                    UPDATE user_stats SET
-                        total_check_ins = (
-                            SELECT COUNT(*) FROM mood_checkins 
-                            WHERE user_id = user_stats.user_id
-                        ),
-                        average_mood = (
-                            SELECT AVG(mood_level) FROM mood_checkins 
-                            WHERE user_id = user_stats.user_id
-                        ),
-                        ai_chats_count = (
-                            SELECT COUNT(*) FROM ai_chats 
-                            WHERE user_id = user_stats.user_id
-                        )
-                ''')
-                
                 # Archive old consultations
                 await conn.execute('''
                     UPDATE consultations SET status = 'archived'
@@ -307,28 +379,45 @@ class BotScheduler:
                 
         except Exception as e:
             logger.error(f"Error in monthly maintenance: {e}")
+            raise
     
     async def run_scheduler(self):
-        """Run the scheduler in background"""
+        """Load job state and run every job in its own task"""
         self.running = True
-        logger.info("Scheduler started")
+        state = await db_manager.get_scheduler_state()
         
-        try:
-            while self.running:
-                schedule.run_pending()
-                await asyncio.sleep(60)  # Check every minute
-        except Exception as e:
-            logger.error(f"Error in scheduler main loop: {e}")
-        finally:
-            logger.info("Scheduler loop ended")
+        for job in self.jobs.values():
+            job.next_run_at = None
+            task = asyncio.create_task(self._run_job_loop(job, state.get(job.name)))
+            self._tasks.append(task)
+        
+        logger.info(f"Scheduler started with {len(self.jobs)} jobs")
     
-    def stop_scheduler(self):
-        """Stop the scheduler"""
+    async def stop_scheduler(self):
+        """Stop the scheduler, cancelling runs in progress"""
         self.running = False
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
         logger.info("Scheduler stopped")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get next and last run of every job"""
+        return {
+            job.name: {
+                "cron": job.cron.expression,
+                "next_run_at": job.next_run_at.isoformat() if job.next_run_at else None,
+                "last_scheduled_at": job.last_scheduled_at.isoformat() if job.last_scheduled_at else None,
+                "last_status": job.last_status,
+                "last_duration": job.last_duration
+            }
+            for job in self.jobs.values()
+        }
 
 # Global scheduler instance
 scheduler = BotScheduler()
+metrics.register_collector("scheduler", scheduler.get_stats)
 
 def start_scheduler():
     """Start the background scheduler"""
@@ -341,10 +430,10 @@ def start_scheduler():
         logger.error(f"Error starting scheduler: {e}")
         raise
 
-def stop_scheduler():
+async def stop_scheduler():
     """Stop the background scheduler"""
     try:
-        scheduler.stop_scheduler()
+        await scheduler.stop_scheduler()
         logger.info("Background scheduler stopped successfully")
     except Exception as e:
         logger.error(f"Error stopping scheduler: {e}")
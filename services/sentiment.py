@@ -0,0 +1,160 @@
+import math
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from services.crisis_detector import normalize
+
+STRONG = 1.0
+MILD = 0.5
+
+# Surface words; they go through the crisis detector's normalization, so
+# inflected forms share one stem
+SENTIMENT_WORDS: Dict[str, Dict[str, float]] = {
+    "uk": {
+        "добре": MILD, "добрий": MILD, "гарно": MILD, "гарний": MILD, "краще": MILD,
+        "легше": MILD, "спокійно": MILD, "спокій": MILD, "надія": MILD, "приємно": MILD,
+        "підтримка": MILD, "впевнений": MILD, "сильний": MILD, "сила": MILD,
+        "задоволений": MILD, "відпочив": MILD, "дякую": MILD, "вдячний": MILD,
+        "подобається": MILD, "енергія": MILD, "натхнення": MILD, "весело": MILD,
+        "чудово": STRONG, "чудовий": STRONG, "прекрасно": STRONG, "прекрасний": STRONG,
+        "відмінно": STRONG, "радий": STRONG, "радість": STRONG, "щасливий": STRONG,
+        "щастя": STRONG, "люблю": STRONG, "любов": STRONG, "супер": STRONG, "класно": STRONG,
+        "погано": -MILD, "поганий": -MILD, "сумно": -MILD, "сум": -MILD, "сумний": -MILD,
+        "важко": -MILD, "важкий": -MILD, "втома": -MILD, "втомився": -MILD, "втомлений": -MILD,
+        "тривога": -MILD, "тривожно": -MILD, "тривожний": -MILD, "нервую": -MILD,
+        "нервовий": -MILD, "страшно": -MILD, "страх": -MILD, "боюся": -MILD, "гірше": -MILD,
+        "злість": -MILD, "злий": -MILD, "роздратований": -MILD, "біль": -MILD,
+        "болить": -MILD, "безсоння": -MILD, "самотньо": -MILD, "самотній": -MILD,
+        "розчарований": -MILD, "сором": -MILD, "провина": -MILD, "винен": -MILD,
+        "жахливо": -STRONG, "жахливий": -STRONG, "жах": -STRONG, "депресія": -STRONG,
+        "пригнічений": -STRONG, "самотність": -STRONG, "безнадійно": -STRONG,
+        "безсилля": -STRONG, "відчай": -STRONG, "паніка": -STRONG, "кошмар": -STRONG,
+        "плачу": -STRONG, "сльози": -STRONG, "ненавиджу": -STRONG, "нестерпно": -STRONG,
+        "виснажений": -STRONG, "травма": -STRONG, "флешбеки": -STRONG,
+    },
+    "en": {
+        "good": MILD, "fine": MILD, "better": MILD, "calm": MILD, "hope": MILD,
+        "hopeful": MILD, "nice": MILD, "okay": MILD, "relaxed": MILD, "rested": MILD,
+        "safe": MILD, "strong": MILD, "confident": MILD, "support": MILD,
+        "supported": MILD, "thanks": MILD, "relief": MILD, "motivated": MILD,
+        "enjoy": MILD, "smile": MILD, "laugh": MILD, "peaceful": MILD,
+        "great": STRONG, "happy": STRONG, "glad": STRONG, "love": STRONG, "grateful": STRONG,
+        "thankful": STRONG, "proud": STRONG, "excited": STRONG, "joy": STRONG,
+        "wonderful": STRONG, "amazing": STRONG, "excellent": STRONG,
+        "bad": -MILD, "sad": -MILD, "tired": -MILD, "worse": -MILD, "worried": -MILD,
+        "worry": -MILD, "stress": -MILD, "stressed": -MILD, "upset": -MILD, "afraid": -MILD,
+        "scared": -MILD, "fear": -MILD, "alone": -MILD, "angry": -MILD, "anger": -MILD,
+        "mad": -MILD, "pain": -MILD, "hurt": -MILD, "guilt": -MILD, "guilty": -MILD,
+        "ashamed": -MILD, "shame": -MILD, "insomnia": -MILD, "frustrated": -MILD,
+        "anxious": -MILD, "numb": -MILD, "empty": -MILD,
+        "terrible": -STRONG, "awful": -STRONG, "horrible": -STRONG, "depressed": -STRONG,
+        "depression": -STRONG, "anxiety": -STRONG, "panic": -STRONG, "lonely": -STRONG,
+        "exhausted": -STRONG, "hate": -STRONG, "worst": -STRONG, "cry": -STRONG,
+        "crying": -STRONG, "hopeless": -STRONG, "helpless": -STRONG, "miserable": -STRONG,
+        "nightmare": -STRONG, "broken": -STRONG, "trauma": -STRONG, "flashbacks": -STRONG,
+    },
+}
+
+NEGATORS = (
+    "не", "ні", "без", "ніколи", "немає", "нема", "жодного",
+    "not", "no", "never", "dont", "cant", "wont", "didnt", "doesnt", "isnt",
+    "arent", "wasnt", "without", "nobody", "nothing", "hardly",
+)
+
+# A sentiment word this many tokens after a negator is reversed and damped
+NEGATION_WINDOW = 2
+NEGATION_FACTOR = -0.7
+# Squashes the summed weights into (-1, 1): one strong word scores about 0.58
+NORMALIZATION_ALPHA = 2.0
+
+
+class SentimentScorer:
+    """
+    Lexicon sentiment for Ukrainian and English text, in (-1, 1).
+
+    Each stem maps to an index into a weight array, so a batch of messages is
+    scored with a handful of NumPy operations over one concatenated token
+    array: weight lookup, negation by shifted negator masks (kept within a
+    message), and a per-message sum with bincount. A single message (the
+    save path) is cheaper to score with a plain loop than to hand to NumPy;
+    both give the same score. Texts without sentiment words score 0.
+    """
+
+    def __init__(self, words: Dict[str, Dict[str, float]] = None, negators: Sequence[str] = NEGATORS):
+        words = words or SENTIMENT_WORDS
+        # Index 0 stands for every word outside the lexicon
+        self.vocabulary: Dict[str, int] = {}
+        weights = [0.0]
+        negator_flags = [False]
+
+        for language_words in words.values():
+            for word, weight in language_words.items():
+                for token in normalize(word):
+                    if token not in self.vocabulary:
+                        self.vocabulary[token] = len(weights)
+                        weights.append(weight)
+                        negator_flags.append(False)
+
+        for word in negators:
+            for token in normalize(word):
+                index = self.vocabulary.get(token)
+                if index is None:
+                    self.vocabulary[token] = len(weights)
+                    weights.append(0.0)
+                    negator_flags.append(True)
+                else:
+                    negator_flags[index] = True
+
+        self._weight_list = weights
+        self._negator_list = negator_flags
+        self.weights = np.array(weights, dtype=np.float64)
+        self.negators = np.array(negator_flags, dtype=bool)
+
+    def token_ids(self, text: str) -> List[int]:
+        vocabulary = self.vocabulary
+        return [vocabulary.get(token, 0) for token in normalize(text)] if text else []
+
+    def score_batch(self, texts: List[str]) -> np.ndarray:
+        """Scores of many texts at once"""
+        if not texts:
+            return np.zeros(0)
+
+        flat: List[int] = []
+        lengths = []
+        for text in texts:
+            token_ids = self.token_ids(text)
+            flat.extend(token_ids)
+            lengths.append(len(token_ids))
+        if not flat:
+            return np.zeros(len(texts))
+
+        ids = np.array(flat, dtype=np.int32)
+        owner = np.repeat(np.arange(len(texts)), lengths)
+        values = self.weights[ids]
+
+        is_negator = self.negators[ids]
+        negated = np.zeros(len(ids), dtype=bool)
+        for shift in range(1, NEGATION_WINDOW + 1):
+            negated[shift:] |= is_negator[:-shift] & (owner[shift:] == owner[:-shift])
+        values = np.where(negated, values * NEGATION_FACTOR, values)
+
+        totals = np.bincount(owner, weights=values, minlength=len(texts))
+        return totals / np.sqrt(totals * totals + NORMALIZATION_ALPHA)
+
+    def score(self, text: str) -> float:
+        """Score of one text"""
+        weights, negators = self._weight_list, self._negator_list
+        total = 0.0
+        since_negator = NEGATION_WINDOW + 1
+        for index in self.token_ids(text):
+            weight = weights[index]
+            if since_negator <= NEGATION_WINDOW:
+                weight *= NEGATION_FACTOR
+            total += weight
+            since_negator = 1 if negators[index] else since_negator + 1
+        return total / math.sqrt(total * total + NORMALIZATION_ALPHA)
+
+
+# Global sentiment scorer
+sentiment_scorer = SentimentScorer()
@@ -0,0 +1,75 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict
+
+from config import config
+from database.db_manager import db_manager
+from services.sentiment import sentiment_scorer
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class SentimentBackfill:
+    """
+    Scores ai_chats rows saved without a sentiment score (everything from
+    before scoring was added, or rows saved while it failed).
+
+    Walks the partial index of unscored rows in (timestamp, id) order; each
+    batch is scored with one vectorized call and written with one UPDATE,
+    with a pause between batches to leave room for live traffic.
+    """
+
+    def __init__(self):
+        self.batch_size = config.get('SENTIMENT_BATCH_SIZE', 2000)
+        self.batch_pause = config.get('SENTIMENT_BATCH_PAUSE', 0.1)
+        self.last_run: Dict[str, Any] = {}
+
+    async def run(self) -> Dict[str, Any]:
+        """Score all unscored AI chats; returns a summary"""
+        start = time.monotonic()
+        after = None
+        scored = 0
+        batches = 0
+
+        while True:
+            rows = await db_manager.get_unscored_ai_chats(after, self.batch_size)
+            if not rows:
+                break
+
+            batch_start = time.monotonic()
+            scores = sentiment_scorer.score_batch([row["message"] for row in rows])
+            scored += await db_manager.update_sentiment_scores(
+                [row["id"] for row in rows],
+                [row["timestamp"] for row in rows],
+                scores.tolist()
+            )
+            batches += 1
+            metrics.observe("sentiment.backfill_batch", time.monotonic() - batch_start)
+
+            after = (rows[-1]["timestamp"], rows[-1]["id"])
+            if len(rows) < self.batch_size:
+                break
+            await asyncio.sleep(self.batch_pause)
+
+        metrics.inc("sentiment.backfilled", scored)
+        self.last_run = {
+            "scored": scored,
+            "batches": batches,
+            "duration": round(time.monotonic() - start, 3),
+            "finished_at": datetime.now().isoformat()
+        }
+        if scored:
+            logger.info(f"Sentiment backfill scored {scored} AI chats in {batches} batches")
+        return self.last_run
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get summary of the last run"""
+        return self.last_run
+
+
+# Global sentiment backfill
+sentiment_backfill = SentimentBackfill()
+metrics.register_collector("sentiment_backfill", sentiment_backfill.get_stats)
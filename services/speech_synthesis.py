@@ -0,0 +1,66 @@
+import asyncio
+import io
+import re
+from concurrent.futures import Executor
+from typing import List
+
+from gtts import gTTS
+
+SENTENCE_END_RE = re.compile(r"(?<=[.!?…])\s+")
+CLAUSE_END_RE = re.compile(r"(?<=[,;:—])\s+")
+
+
+def _pack(parts: List[str], max_chars: int) -> List[str]:
+    """Greedily join consecutive parts into chunks of at most max_chars"""
+    chunks: List[str] = []
+    current = ""
+    for part in parts:
+        if current and len(current) + 1 + len(part) > max_chars:
+            chunks.append(current)
+            current = part
+        else:
+            current = f"{current} {part}" if current else part
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def split_sentences(text: str, max_chars: int = 200) -> List[str]:
+    """
+    Split text into chunks of whole sentences up to max_chars each. Longer
+    sentences are split at clause punctuation, then at spaces.
+    """
+    parts: List[str] = []
+    for sentence in SENTENCE_END_RE.split(text.strip()):
+        if len(sentence) <= max_chars:
+            parts.append(sentence)
+            continue
+        for clause in CLAUSE_END_RE.split(sentence):
+            if len(clause) <= max_chars:
+                parts.append(clause)
+            else:
+                parts.extend(_pack(clause.split(), max_chars))
+    return _pack([part for part in parts if part], max_chars)
+
+
+def gtts_synthesize(text: str, language: str) -> bytes:
+    """Blocking gTTS synthesis of one chunk to MP3 bytes"""
+    buffer = io.BytesIO()
+    gTTS(text=text, lang=language, slow=False).write_to_fp(buffer)
+    return buffer.getvalue()
+
+
+async def synthesize_chunked(text: str, language: str, executor: Executor,
+                             max_chars: int = 200) -> bytes:
+    """
+    Synthesize sentence chunks in parallel on the executor and join them.
+    MP3 streams are sequences of independent frames, so chunks concatenate
+    into one playable file (gTTS joins its own requests the same way).
+    """
+    loop = asyncio.get_running_loop()
+    chunks = split_sentences(text, max_chars)
+    parts = await asyncio.gather(*(
+        loop.run_in_executor(executor, gtts_synthesize, chunk, language)
+        for chunk in chunks
+    ))
+    return b"".join(parts)
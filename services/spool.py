@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Set
+
+from config import config
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Files written this recently may still be in use by a worker and are never
+# removed to meet the size cap; files handed out by file() are never removed
+SWEEP_GRACE_SECONDS = 60
+
+
+def use_spool_for_temp_files(path: str):
+    """
+    Initializer of audio worker processes: make the tempfile module (and so
+    pydub/ffmpeg scratch files) use the spool directory. Only for processes
+    that run nothing but audio jobs; the bot process passes dir= instead.
+    """
+    os.makedirs(path, exist_ok=True)
+    tempfile.tempdir = path
+
+
+class SpoolDirectory:
+    """
+    Directory for the bot's temporary audio files.
+
+    Code that needs a named file (e.g. for ffmpeg) takes a handle from
+    file(), which deletes it when the block exits, errors included; other
+    audio buffers pass dir=ensure_path(). Scratch files of the audio worker
+    processes, including those pydub creates with delete=False, are placed
+    here too, so anything left behind by a crash or a killed worker is
+    removed by a background sweeper: files older than SPOOL_MAX_AGE first,
+    then oldest files while the directory is over SPOOL_MAX_MB. Files
+    still open through file() are skipped by both.
+    """
+
+    def __init__(self, path: str = None, max_age: float = None, max_bytes: int = None,
+                 interval: float = None):
+        self.path = path or config.get('SPOOL_DIR') or os.path.join(tempfile.gettempdir(), "vetsupport_spool")
+        self.max_age = max_age or config.get('SPOOL_MAX_AGE', 3600)
+        self.max_bytes = max_bytes or config.get('SPOOL_MAX_MB', 256) * 1024 * 1024
+        self.interval = interval or config.get('SPOOL_SWEEP_INTERVAL', 300)
+        self._task: Optional[asyncio.Task] = None
+        # Paths handed out by file() and not yet released; the sweep runs in a thread
+        self._in_use: Set[str] = set()
+        self._in_use_lock = threading.Lock()
+        self.size_bytes = 0
+        self.file_count = 0
+        self.stats = {"sweeps": 0, "removed_expired": 0, "removed_over_size": 0, "removed_bytes": 0}
+
+    def ensure_path(self) -> str:
+        """Create the spool directory if needed and return its path"""
+        os.makedirs(self.path, exist_ok=True)
+        return self.path
+
+    @contextmanager
+    def file(self, suffix: str = "") -> Iterator[BinaryIO]:
+        """Named temporary file in the spool, deleted when the block exits"""
+        with tempfile.NamedTemporaryFile(dir=self.ensure_path(), suffix=suffix) as handle:
+            with self._in_use_lock:
+                self._in_use.add(handle.name)
+            try:
+                yield handle
+            finally:
+                with self._in_use_lock:
+                    self._in_use.discard(handle.name)
+
+    def _scan(self):
+        files = []
+        with os.scandir(self.path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file(follow_symlinks=False):
+                        stat = entry.stat(follow_symlinks=False)
+                        files.append((stat.st_mtime, stat.st_size, entry.path))
+                except FileNotFoundError:
+                    pass
+        return files
+
+    def _remove(self, path: str, size: int, reason: str) -> bool:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            return False
+        self.stats[reason] += 1
+        self.stats["removed_bytes"] += size
+        return True
+
+    def sweep(self) -> int:
+        """Remove expired files, then the oldest ones while over the size cap; returns files removed"""
+        if not os.path.isdir(self.path):
+            return 0
+
+        now = time.time()
+        with self._in_use_lock:
+            in_use = frozenset(self._in_use)
+        kept = []
+        removed = 0
+        for mtime, size, path in self._scan():
+            if now - mtime > self.max_age and path not in in_use:
+                removed += self._remove(path, size, "removed_expired")
+            else:
+                kept.append((mtime, size, path))
+
+        total = sum(size for _, size, _ in kept)
+        count = len(kept)
+        for mtime, size, path in sorted(kept):
+            if total <= self.max_bytes or now - mtime < SWEEP_GRACE_SECONDS:
+                break
+            if path in in_use:
+                continue
+            if self._remove(path, size, "removed_over_size"):
+                removed += 1
+            total -= size
+            count -= 1
+        if total > self.max_bytes:
+            logger.warning(f"Spool {self.path} is {total} bytes, over its {self.max_bytes} byte cap")
+
+        self.size_bytes = total
+        self.file_count = count
+        self.stats["sweeps"] += 1
+        metrics.set_gauge("spool.bytes", self.size_bytes)
+        metrics.set_gauge("spool.files", self.file_count)
+        return removed
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                removed = await loop.run_in_executor(None, self.sweep)
+                if removed:
+                    logger.info(f"Spool sweeper removed {removed} files")
+            except Exception as e:
+                logger.error(f"Error sweeping spool: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Create the spool directory and start the sweeper"""
+        self.ensure_path()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the sweeper"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get spool statistics"""
+        return {
+            **self.stats,
+            "path": self.path,
+            "bytes": self.size_bytes,
+            "files": self.file_count,
+            "max_bytes": self.max_bytes
+        }
+
+
+# Global spool directory
+audio_spool = SpoolDirectory()
+metrics.register_collector("spool", audio_spool.get_stats)
@@ -0,0 +1,194 @@
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor
+from typing import Any, BinaryIO, Callable, Dict, Optional, Union
+
+import aiohttp
+from pydub import AudioSegment
+
+try:
+    from vosk import KaldiRecognizer, Model, SetLogLevel
+    VOSK_AVAILABLE = True
+except ImportError:
+    VOSK_AVAILABLE = False
+    KaldiRecognizer = Model = SetLogLevel = None
+
+logger = logging.getLogger(__name__)
+
+STT_SAMPLE_RATE = 16000
+# 0.25 s of 16-bit mono PCM per recognizer call
+VOSK_CHUNK_BYTES = STT_SAMPLE_RATE // 2 * 2
+
+
+def read_audio(audio: Union[bytes, BinaryIO]) -> bytes:
+    return audio if isinstance(audio, bytes) else audio.read()
+
+
+def audio_fingerprint(audio: bytes) -> str:
+    return hashlib.sha256(audio).hexdigest()
+
+
+def decode_to_pcm(audio: bytes) -> bytes:
+    """Decode any ffmpeg-readable audio to 16 kHz mono 16-bit PCM"""
+    segment = AudioSegment.from_file(io.BytesIO(audio))
+    return segment.set_channels(1).set_frame_rate(STT_SAMPLE_RATE).set_sample_width(2).raw_data
+
+
+def stt_failure(error: str) -> Dict[str, Any]:
+    return {"success": False, "error": error, "text": ""}
+
+
+class STTBackend(ABC):
+    """
+    Speech-to-text engine. transcribe() takes audio as bytes or a binary
+    file object positioned at the start and returns
+    {"success", "text", "language"} or {"success": False, "error", "text": ""}.
+    """
+    name = "base"
+
+    def available(self) -> bool:
+        return True
+
+    @abstractmethod
+    async def transcribe(self, audio: Union[bytes, BinaryIO], language: str,
+                         filename: str = "audio.ogg") -> Dict[str, Any]:
+        """Transcribe one clip"""
+
+
+class WhisperBackend(STTBackend):
+    """OpenAI Whisper API"""
+    name = "whisper"
+    url = "https://api.openai.com/v1/audio/transcriptions"
+
+    def __init__(self, api_key: str, session: Callable[[], aiohttp.ClientSession]):
+        self.api_key = api_key
+        self.session = session
+
+    def available(self) -> bool:
+        return bool(self.api_key)
+
+    async def transcribe(self, audio: Union[bytes, BinaryIO], language: str,
+                         filename: str = "audio.ogg") -> Dict[str, Any]:
+        headers = {
+            "Authorization": f"Bearer {self.api_key}"
+        }
+
+        # Map language codes for Whisper
+        whisper_lang = "uk" if language == "uk" else "en"
+
+        try:
+            # The buffer is streamed into the multipart body as is
+            data = aiohttp.FormData()
+            data.add_field('file', audio, filename=filename)
+            data.add_field('model', 'whisper-1')
+            data.add_field('language', whisper_lang)
+
+            async with self.session().post(self.url, headers=headers, data=data) as response:
+                if response.status == 200:
+                    result = await response.json()
+                    return {
+                        "success": True,
+                        "text": result.get("text", ""),
+                        "language": language
+                    }
+                else:
+                    error_text = await response.text()
+                    logger.error(f"Whisper API error: {error_text}")
+                    return stt_failure(f"API error: {response.status}")
+
+        except Exception as e:
+            logger.error(f"Whisper transcription error: {e}")
+            return stt_failure(str(e))
+
+
+class VoskBackend(STTBackend):
+    """
+    Local CPU recognition with Vosk (Kaldi) models, one model directory per
+    language. Models are loaded on first use and shared by all recognitions;
+    decoding runs on the given executor (Kaldi releases the GIL).
+    Requires the optional vosk package and ffmpeg for compressed input.
+    """
+    name = "vosk"
+
+    def __init__(self, model_dirs: Dict[str, str], executor: Executor):
+        self.model_dirs = {language: path for language, path in model_dirs.items() if path}
+        self.executor = executor
+        self._models: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        if VOSK_AVAILABLE:
+            SetLogLevel(-1)
+
+    def available(self) -> bool:
+        return VOSK_AVAILABLE and bool(self.model_dirs)
+
+    def _model(self, language: str):
+        with self._lock:
+            model = self._models.get(language)
+            if model is None:
+                model = Model(self.model_dirs[language])
+                self._models[language] = model
+                logger.info(f"Loaded Vosk model for {language}")
+            return model
+
+    def recognize(self, audio: bytes, language: str) -> str:
+        """Blocking recognition of a whole clip"""
+        recognizer = KaldiRecognizer(self._model(language), STT_SAMPLE_RATE)
+        pcm = decode_to_pcm(audio)
+        for offset in range(0, len(pcm), VOSK_CHUNK_BYTES):
+            recognizer.AcceptWaveform(pcm[offset:offset + VOSK_CHUNK_BYTES])
+        return json.loads(recognizer.FinalResult()).get("text", "")
+
+    async def transcribe(self, audio: Union[bytes, BinaryIO], language: str,
+                         filename: str = "audio.ogg") -> Dict[str, Any]:
+        if not VOSK_AVAILABLE:
+            return stt_failure("vosk is not installed")
+        if language not in self.model_dirs:
+            return stt_failure(f"No Vosk model for language: {language}")
+
+        try:
+            text = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self.recognize, read_audio(audio), language
+            )
+            return {"success": True, "text": text, "language": language}
+        except Exception as e:
+            logger.error(f"Vosk transcription error: {e}")
+            return stt_failure(str(e))
+
+
+class RecordedBackend(STTBackend):
+    """
+    Replays transcriptions recorded from a real backend, keyed by the
+    audio's sha256. Used for offline runs and benchmarks: behaves like an
+    engine with a fixed latency and no network or model.
+    """
+    name = "recorded"
+
+    def __init__(self, responses: Dict[str, str] = None, latency: float = 0.0):
+        self.responses = dict(responses or {})
+        self.latency = latency
+
+    @classmethod
+    def load(cls, path: str, latency: float = 0.0) -> "RecordedBackend":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f), latency)
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.responses, f, ensure_ascii=False, indent=2)
+
+    def record(self, audio: bytes, text: str):
+        self.responses[audio_fingerprint(audio)] = text
+
+    async def transcribe(self, audio: Union[bytes, BinaryIO], language: str,
+                         filename: str = "audio.ogg") -> Dict[str, Any]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        text: Optional[str] = self.responses.get(audio_fingerprint(read_audio(audio)))
+        if text is None:
+            return stt_failure("No recorded transcription for this audio")
+        return {"success": True, "text": text, "language": language}
@@ -0,0 +1,182 @@
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from config import config
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def tts_cache_key(text: str, language: str, voice: str, engine: str) -> str:
+    """Content address of synthesized audio"""
+    payload = "\0".join((engine, voice, language, text))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """
+    Two-tier cache of synthesized speech keyed by tts_cache_key.
+
+    The memory tier is an LRU bounded by total audio bytes. The disk tier
+    keeps one file per key under TTS_CACHE_DIR, survives restarts and is
+    trimmed oldest-first (by access time kept in mtime) when over its byte
+    budget. Disk I/O runs in the default executor. Texts longer than
+    TTS_CACHE_MAX_TEXT are not cached: long AI replies rarely repeat.
+    put(..., persist=False) keeps audio in memory only; everything except
+    stock phrases is stored that way, so user and AI text never reaches disk.
+    """
+
+    def __init__(self, directory: str = None, memory_bytes: int = None,
+                 disk_bytes: int = None, max_text: int = None):
+        self.directory = directory if directory is not None else config.get('TTS_CACHE_DIR', 'tts_cache')
+        self.memory_limit = memory_bytes or config.get('TTS_CACHE_MEMORY_MB', 16) * 1024 * 1024
+        self.disk_limit = disk_bytes or config.get('TTS_CACHE_DISK_MB', 200) * 1024 * 1024
+        self.max_text = max_text or config.get('TTS_CACHE_MAX_TEXT', 600)
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes: Optional[int] = None
+        # Writes run on executor threads; the byte count and trimming are shared
+        self._disk_lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0}
+
+    def cacheable(self, text: str) -> bool:
+        return bool(text) and len(text) <= self.max_text
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.audio")
+
+    def _remember(self, key: str, audio: bytes):
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        if len(audio) > self.memory_limit:
+            return
+        self._memory[key] = audio
+        self._memory_bytes += len(audio)
+        while self._memory_bytes > self.memory_limit:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _read_file(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+            os.utime(path)
+            return audio
+        except FileNotFoundError:
+            return None
+
+    def _disk_usage(self) -> int:
+        total = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    pass
+        return total
+
+    def _write_file(self, key: str, audio: bytes):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write then rename so readers never see a partial file
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(audio)
+
+        with self._disk_lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self._disk_usage()
+            try:
+                replaced = os.path.getsize(path)
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(temp_path, path)
+            self._disk_bytes += len(audio) - replaced
+
+            if self._disk_bytes > self.disk_limit:
+                self._trim_disk()
+
+    def _trim_disk(self):
+        """Delete least recently used files until under 90% of the disk budget; called with the disk lock held"""
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(".tmp"):
+                    # Being written by another thread
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.disk_limit * 0.9:
+                break
+            try:
+                os.unlink(path)
+                total -= size
+            except OSError:
+                pass
+        self._disk_bytes = total
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Cached audio for a key, from memory or disk"""
+        audio = self._memory.get(key)
+        if audio is not None:
+            self._memory.move_to_end(key)
+            self.stats["memory_hits"] += 1
+            metrics.inc("tts_cache.hits")
+            return audio
+
+        if self.directory:
+            try:
+                audio = await asyncio.get_running_loop().run_in_executor(None, self._read_file, key)
+            except Exception as e:
+                logger.error(f"Error reading TTS cache: {e}")
+                audio = None
+            if audio is not None:
+                self._remember(key, audio)
+                self.stats["disk_hits"] += 1
+                metrics.inc("tts_cache.hits")
+                return audio
+
+        self.stats["misses"] += 1
+        metrics.inc("tts_cache.misses")
+        return None
+
+    async def put(self, key: str, audio: bytes, persist: bool = True):
+        """Store audio in memory and, if persist, on disk"""
+        self._remember(key, audio)
+        self.stats["stores"] += 1
+        if self.directory and persist:
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self._write_file, key, audio)
+            except Exception as e:
+                logger.error(f"Error writing TTS cache: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        return {
+            **self.stats,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "disk_bytes": self._disk_bytes
+        }
+
+
+# Global TTS cache
+tts_cache = TTSCache()
+metrics.register_collector("tts_cache", tts_cache.get_stats)
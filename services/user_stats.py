@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from config import config
+from database.db_manager import db_manager, USER_STATS_FIELDS
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_NAME = "user_stats"
+
+
+class DriftReport:
+    """Aggregates how far stored user_stats counters were from the source tables"""
+
+    def __init__(self, sample_size: int = 10):
+        self.sample_size = sample_size
+        self.users_checked = 0
+        self.users_drifted = 0
+        self.fields = {
+            field: {"drifted": 0, "max_abs": 0.0, "total_abs": 0.0}
+            for field in USER_STATS_FIELDS
+        }
+        self.worst: List[Dict[str, Any]] = []
+
+    def add(self, checked: int, rows: List[Dict[str, Any]]):
+        self.users_checked += checked
+        self.users_drifted += len(rows)
+
+        for row in rows:
+            score = 0.0
+            for field, totals in self.fields.items():
+                diff = abs((row[field] or 0) - (row[f"old_{field}"] or 0))
+                if diff:
+                    totals["drifted"] += 1
+                    totals["max_abs"] = max(totals["max_abs"], diff)
+                    totals["total_abs"] += diff
+                    score += diff
+            self.worst.append({**row, "score": score})
+
+        self.worst.sort(key=lambda row: row["score"], reverse=True)
+        del self.worst[self.sample_size:]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "users_checked": self.users_checked,
+            "users_drifted": self.users_drifted,
+            "fields": self.fields,
+            "worst": [
+                {key: value for key, value in row.items() if key != "score"}
+                for row in self.worst
+            ]
+        }
+
+
+class UserStatsRecomputer:
+    """
+    Recomputes user_stats counters from mood_checkins and ai_chats.
+
+    Only users with activity since the last run's watermark are recomputed,
+    in batches of one grouped query per source table, and only rows whose
+    counters drifted are updated. A dry run computes the same drift report
+    without writing anything or moving the watermark.
+    """
+
+    def __init__(self):
+        self.batch_size = config.get('USER_STATS_BATCH_SIZE', 1000)
+        self.batch_pause = config.get('USER_STATS_BATCH_PAUSE', 0.2)
+        self.last_run: Dict[str, Any] = {}
+
+    async def run(self, dry_run: bool = False, full: bool = False) -> Dict[str, Any]:
+        """Recompute stats of recently active users (all users with full=True)"""
+        start = time.monotonic()
+        since = None if full else await db_manager.get_maintenance_watermark(WATERMARK_NAME)
+        user_ids, taken_at = await db_manager.get_users_active_since(since)
+        report = DriftReport()
+
+        for offset in range(0, len(user_ids), self.batch_size):
+            batch = user_ids[offset:offset + self.batch_size]
+            batch_start = time.monotonic()
+            rows = await db_manager.recompute_user_stats_batch(batch, dry_run=dry_run)
+            report.add(len(batch), rows)
+            metrics.observe("user_stats.batch", time.monotonic() - batch_start)
+
+            if offset + self.batch_size < len(user_ids):
+                await asyncio.sleep(self.batch_pause)
+
+        if not dry_run:
+            # Activity that arrives during the run is picked up again next time
+            await db_manager.save_maintenance_watermark(WATERMARK_NAME, taken_at, len(user_ids))
+            metrics.inc("user_stats.corrected", report.users_drifted)
+
+        result = report.to_dict()
+        result.update({
+            "dry_run": dry_run,
+            "since": since.isoformat() if since else None,
+            "duration": round(time.monotonic() - start, 3),
+            "finished_at": datetime.now().isoformat()
+        })
+        self.last_run = {key: value for key, value in result.items() if key != "worst"}
+        logger.info(
+            f"User stats {'drift check' if dry_run else 'recompute'}: "
+            f"{report.users_drifted}/{report.users_checked} users drifted"
+        )
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get summary of the last run"""
+        return self.last_run
+
+
+# Global user stats recomputer
+user_stats_recomputer = UserStatsRecomputer()
+metrics.register_collector("user_stats", user_stats_recomputer.get_stats)
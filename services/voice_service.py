@@ -1,30 +1,118 @@
 import asyncio
-import os
+import inspect
 import logging
-from typing import Optional, Dict, Any
-import aiohttp
-import tempfile
-from gtts import gTTS
-import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, BinaryIO, Callable, Optional, Dict, Any, List, Union
 
 from config import config
+from services.crisis_detector import crisis_detector
+from services.speech_synthesis import synthesize_chunked
+from services.stt_backends import RecordedBackend, STTBackend, VoskBackend, WhisperBackend
+from services.tts_cache import tts_cache, tts_cache_key
+from utils.http_client import http_client
+from utils.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
+# gTTS is blocking network I/O; it runs on a bounded pool of threads shared by all replies
+tts_executor = ThreadPoolExecutor(
+    max_workers=config.get('TTS_MAX_WORKERS', 4), thread_name_prefix="tts"
+)
+
+# Local speech recognition (Vosk) decodes on its own bounded pool of threads
+stt_executor = ThreadPoolExecutor(
+    max_workers=config.get('STT_MAX_WORKERS', 2), thread_name_prefix="stt"
+)
+
+# Backends tried in order for STT_BACKEND=auto
+STT_AUTO_CHAIN = ("whisper", "vosk")
+
+def create_stt_backend(name: str) -> STTBackend:
+    """Speech-to-text backend by name: whisper, vosk or recorded"""
+    if name == "recorded":
+        return RecordedBackend.load(config.get('STT_RECORDED_PATH', 'stt_recorded.json'))
+    if name == "whisper":
+        return WhisperBackend(config.get('OPENAI_API_KEY', ''), lambda: http_client.session)
+    if name == "vosk":
+        return VoskBackend(
+            {"uk": config.get('VOSK_MODEL_UK', ''), "en": config.get('VOSK_MODEL_EN', '')},
+            stt_executor
+        )
+    raise ValueError(f"Unknown speech-to-text backend: {name}")
+
+def create_stt_backends(spec: str = None) -> List[STTBackend]:
+    """
+    Speech-to-text backends selected by STT_BACKEND, in the order they are
+    tried: a comma-separated list of whisper, vosk and recorded (e.g.
+    "recorded,whisper" replays recordings and asks Whisper about the rest),
+    or auto (Whisper when OPENAI_API_KEY is set, otherwise local Vosk models)
+    """
+    spec = spec or config.get('STT_BACKEND', 'auto')
+    names = STT_AUTO_CHAIN if spec == "auto" else [name.strip() for name in spec.split(",") if name.strip()]
+    return [create_stt_backend(name) for name in names]
+
+# Created on first use so a missing model or recording only fails transcription
+stt_backends: Optional[List[STTBackend]] = None
+
+def get_stt_backends() -> List[STTBackend]:
+    global stt_backends
+    if stt_backends is None:
+        stt_backends = create_stt_backends()
+        logger.info(f"Speech-to-text backends: {', '.join(backend.name for backend in stt_backends)}")
+    return stt_backends
+
+# Spoken replies to a mood check-in: low (1-3), medium (4-6) and high (7-10) mood
+MOOD_AUDIO_TEXTS = {
+    "uk": (
+        "Дякую, що поділилися своїм настроєм. Помічаю, що зараз вам важко. Пам'ятайте - ви не самі, і я тут, щоб підтримати вас. Можливо, варто спробувати глибоко подихати або звернутися до близької людини.",
+        "Дякую за відкритість. Ваш настрій у середньому діапазоні, є можливості для покращення. Спробуйте зробити щось приємне для себе - прогуляйтесь або послухайте улюблену музику.",
+        "Чудово, що ваш настрій гарний! Це дуже важливо. Намагайтесь зберігати це відчуття та ділитесь позитивом з оточуючими."
+    ),
+    "en": (
+        "Thank you for sharing your mood with me. I can see you're having a difficult time right now. Remember - you're not alone, and I'm here to support you. Maybe try taking deep breaths or reaching out to someone close.",
+        "Thank you for being open. Your mood is in the middle range, there are opportunities for improvement. Try doing something nice for yourself - take a walk or listen to your favorite music.",
+        "Wonderful that your mood is good! This is very important. Try to maintain this feeling and share positivity with those around you."
+    )
+}
+
 class VoiceService:
     def __init__(self):
-        self.whisper_url = "https://api.openai.com/v1/audio/transcriptions"
         self.elevenlabs_url = "https://api.elevenlabs.io/v1/text-to-speech"
         
-    async def speech_to_text(self, audio_file_path: str, language: str = "uk") -> Dict[str, Any]:
+    async def speech_to_text(self, audio: Union[bytes, BinaryIO], language: str = "uk",
+                             filename: str = "audio.ogg") -> Dict[str, Any]:
         """
-        Convert speech to text using Whisper API
+        Convert speech to text with the configured backends (see create_stt_backends).
+        Audio is bytes or a binary file object positioned at the start.
+        Backends are tried in order until one returns a non-empty transcript;
+        a clip in which no backend recognized any speech is a failure.
         """
         try:
-            if config.OPENAI_API_KEY:
-                return await self._whisper_transcribe(audio_file_path, language)
-            else:
-                return await self._google_speech_to_text(audio_file_path, language)
+            backends = [backend for backend in get_stt_backends() if backend.available()]
+            if not backends:
+                return {
+                    "success": False,
+                    "error": "Speech-to-text is not configured",
+                    "text": ""
+                }
+            
+            result = None
+            for backend in backends:
+                if not isinstance(audio, bytes):
+                    # An earlier backend may have read the file
+                    audio.seek(0)
+                start = time.monotonic()
+                result = await backend.transcribe(audio, language, filename)
+                metrics.observe(f"stt.{backend.name}", time.monotonic() - start)
+                if not result["success"]:
+                    metrics.inc(f"stt.{backend.name}.errors")
+                elif result["text"].strip():
+                    return result
+                else:
+                    metrics.inc(f"stt.{backend.name}.empty")
+                    result = {"success": False, "error": "No speech recognized", "text": ""}
+            return result
                 
         except Exception as e:
             logger.error(f"Speech to text error: {e}")
@@ -34,79 +122,46 @@ class VoiceService:
                 "text": ""
             }
     
-    async def _whisper_transcribe(self, audio_file_path: str, language: str) -> Dict[str, Any]:
-        """Transcribe using OpenAI Whisper"""
-        headers = {
-            "Authorization": f"Bearer {config['OPENAI_API_KEY']}"
-        }
-        
-        # Map language codes for Whisper
-        whisper_lang = "uk" if language == "uk" else "en"
-        
-        try:
-            async with aiohttp.ClientSession() as session:
-                with open(audio_file_path, "rb") as audio_file:
-                    data = aiohttp.FormData()
-                    data.add_field('file', audio_file, filename='audio.ogg')
-                    data.add_field('model', 'whisper-1')
-                    data.add_field('language', whisper_lang)
-                    
-                    async with session.post(
-                        self.whisper_url,
-                        headers=headers,
-                        data=data
-                    ) as response:
-                        if response.status == 200:
-                            result = await response.json()
-                            return {
-                                "success": True,
-                                "text": result.get("text", ""),
-                                "language": language
-                            }
-                        else:
-                            error_text = await response.text()
-                            logger.error(f"Whisper API error: {error_text}")
-                            return {
-                                "success": False,
-                                "error": f"API error: {response.status}",
-                                "text": ""
-                            }
-                            
-        except Exception as e:
-            logger.error(f"Whisper transcription error: {e}")
-            return {
-                "success": False,
-                "error": str(e),
-                "text": ""
-            }
-    
-    async def _google_speech_to_text(self, audio_file_path: str, language: str) -> Dict[str, Any]:
-        """Fallback to Google Speech-to-Text (simplified implementation)"""
-        # This would require Google Cloud Speech-to-Text API setup
-        # For now, return a placeholder
-        return {
-            "success": False,
-            "error": "Google Speech-to-Text not implemented yet",
-            "text": ""
-        }
-    
     async def text_to_speech(self, text: str, language: str = "uk", 
-                           voice: str = "default") -> Dict[str, Any]:
+                           voice: str = "default", stock_phrase: bool = False) -> Dict[str, Any]:
         """
-        Convert text to speech
+        Convert text to speech; the audio is returned as bytes under "audio".
+        Short texts are served from the TTS cache when already synthesized.
+        Only fixed phrases of the bot (stock_phrase) are written to the disk
+        cache; AI replies and user-typed text stay in memory.
         """
         try:
-            if config.ELEVENLABS_API_KEY and voice != "default":
-                return await self._elevenlabs_tts(text, voice)
+            use_elevenlabs = bool(config.get('ELEVENLABS_API_KEY')) and voice != "default"
+            engine = "elevenlabs" if use_elevenlabs else "gtts"
+            
+            cache_key = None
+            if tts_cache.cacheable(text):
+                cache_key = tts_cache_key(text, language, voice, engine)
+                audio = await tts_cache.get(cache_key)
+                if audio is not None:
+                    return {
+                        "success": True,
+                        "audio": audio,
+                        "format": "mp3",
+                        "language": language,
+                        "cached": True
+                    }
+            
+            if use_elevenlabs:
+                result = await self._elevenlabs_tts(text, voice)
             else:
-                return await self._google_tts(text, language)
+                result = await self._google_tts(text, language)
+            
+            if cache_key and result["success"]:
+                await tts_cache.put(cache_key, result["audio"], persist=stock_phrase)
+            return result
                 
         except Exception as e:
             logger.error(f"Text to speech error: {e}")
             return {
                 "success": False,
                 "error": str(e),
-                "audio_file": None
+                "audio": None
             }
     
     async def _google_tts(self, text: str, language: str) -> Dict[str, Any]:
@@ -115,26 +170,26 @@ class VoiceService:
             # Map language codes for gTTS
             gtts_lang = "uk" if language == "uk" else "en"
             
-            # Create TTS object
-            tts = gTTS(text=text, lang=gtts_lang, slow=False)
+            # Sentence chunks are synthesized in parallel off the event loop
+            start = time.monotonic()
+            audio = await synthesize_chunked(
+                text, gtts_lang, tts_executor, config.get('TTS_CHUNK_CHARS', 200)
+            )
+            metrics.observe("tts.gtts", time.monotonic() - start)
             
-            # Create temporary file
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_file:
-                tts.save(temp_file.name)
-                
-                return {
-                    "success": True,
-                    "audio_file": temp_file.name,
-                    "format": "mp3",
-                    "language": language
-                }
+            return {
+                "success": True,
+                "audio": audio,
+                "format": "mp3",
+                "language": language
+            }
                 
         except Exception as e:
             logger.error(f"Google TTS error: {e}")
             return {
                 "success": False,
                 "error": str(e),
-                "audio_file": None
+                "audio": None
             }
     
     async def _elevenlabs_tts(self, text: str, voice_id: str) -> Dict[str, Any]:
@@ -155,62 +210,67 @@ class VoiceService:
                 }
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.elevenlabs_url}/{voice_id}",
-                    json=data,
-                    headers=headers
-                ) as response:
-                    if response.status == 200:
-                        audio_content = await response.read()
-                        
-                        # Create temporary file
-                        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_file:
-                            temp_file.write(audio_content)
-                            
-                            return {
-                                "success": True,
-                                "audio_file": temp_file.name,
-                                "format": "mp3",
-                                "voice": voice_id
-                            }
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"ElevenLabs API error: {error_text}")
-                        return {
-                            "success": False,
-                            "error": f"API error: {response.status}",
-                            "audio_file": None
-                        }
-                        
+            async with http_client.session.post(
+                f"{self.elevenlabs_url}/{voice_id}",
+                json=data,
+                headers=headers
+            ) as response:
+                if response.status == 200:
+                    return {
+                        "success": True,
+                        "audio": await response.read(),
+                        "format": "mp3",
+                        "voice": voice_id
+                    }
+                else:
+                    error_text = await response.text()
+                    logger.error(f"ElevenLabs API error: {error_text}")
+                    return {
+                        "success": False,
+                        "error": f"API error: {response.status}",
+                        "audio": None
+                    }
+            
         except Exception as e:
             logger.error(f"ElevenLabs TTS error: {e}")
             return {
                 "success": False,
                 "error": str(e),
-                "audio_file": None
+                "audio": None
             }
-    
-    def cleanup_temp_file(self, file_path: str):
-        """Clean up temporary audio files"""
-        try:
-            if os.path.exists(file_path):
-                os.unlink(file_path)
-        except Exception as e:
-            logger.error(f"Error cleaning up temp file {file_path}: {e}")
+
+def _observe_stage(stage: str, started: float):
+    metrics.observe(f"voice.pipeline.{stage}", time.monotonic() - started)
 
 class VoiceAssistant:
     def __init__(self):
         self.voice_service = VoiceService()
         
-    async def process_voice_message(self, audio_file_path: str, user_context: Dict = None, 
-                                   language: str = "uk") -> Dict[str, Any]:
+    async def process_voice_message(self, audio: Union[bytes, BinaryIO],
+                                    user_context: Union[Dict, Awaitable[Dict], None] = None,
+                                    language: str = "uk",
+                                    on_transcription: Callable[[str, Dict], Awaitable[Any]] = None,
+                                    on_reply: Callable[[str], Awaitable[Any]] = None) -> Dict[str, Any]:
         """
-        Process voice message: speech-to-text -> AI response -> text-to-speech
+        Process voice message as a staged pipeline:
+        speech-to-text -> AI response -> text-to-speech.
+        
+        user_context may be an awaitable (e.g. a task loading it from the
+        database) so it is fetched while speech-to-text runs. on_transcription
+        and on_reply are called as soon as their stage finishes, so the user
+        sees the transcription and the text reply while the later stages run.
         """
+        start = time.monotonic()
+        delivery: List[asyncio.Task] = []
         try:
-            # Step 1: Convert speech to text
-            transcription_result = await self.voice_service.speech_to_text(audio_file_path, language)
+            # Stage 1: speech to text (the user context loads meanwhile)
+            transcription_result = await self.voice_service.speech_to_text(audio, language)
+            _observe_stage("stt", start)
+            
+            if inspect.isawaitable(user_context):
+                context_start = time.monotonic()
+                user_context = await user_context
+                _observe_stage("context_wait", context_start)
             
             if not transcription_result["success"]:
                 return {
@@ -222,31 +282,51 @@ class VoiceAssistant:
                 }
             
             transcribed_text = transcription_result["text"]
+            crisis_check = crisis_detector.scan(transcribed_text)
+            if on_transcription:
+                delivery.append(asyncio.create_task(on_transcription(transcribed_text, crisis_check)))
             
-            # Step 2: Get AI response
+            # Stage 2: AI response
             from services.ai_service import AIService
             ai_service = AIService()
+            llm_start = time.monotonic()
             ai_result = await ai_service.chat_with_ai(
                 message=transcribed_text,
                 user_context=user_context,
                 language=language
             )
+            _observe_stage("llm", llm_start)
             
             ai_response_text = ai_result["response"]
+            if on_reply:
+                delivery.append(asyncio.create_task(on_reply(ai_response_text)))
             
-            # Step 3: Convert AI response to speech
+            # Stage 3: AI response to speech
+            tts_start = time.monotonic()
             tts_result = await self.voice_service.text_to_speech(ai_response_text, language)
+            _observe_stage("tts", tts_start)
+            
+            # Earlier messages go out before the voice reply
+            for outcome in await asyncio.gather(*delivery, return_exceptions=True):
+                if isinstance(outcome, Exception):
+                    logger.error(f"Error delivering voice pipeline message: {outcome}")
+            _observe_stage("total", start)
             
             return {
                 "success": True,
                 "transcription": transcribed_text,
                 "ai_response": ai_response_text,
-                "audio_response": tts_result.get("audio_file"),
-                "model_used": ai_result.get("model_used", "unknown")
+                "audio_response": tts_result.get("audio"),
+                "model_used": ai_result.get("model_used", "unknown"),
+                "crisis": crisis_check
             }
             
         except Exception as e:
             logger.error(f"Voice message processing error: {e}")
+            for task in delivery:
+                task.cancel()
+            if isinstance(user_context, asyncio.Future):
+                user_context.cancel()
             return {
                 "success": False,
                 "error": str(e),
@@ -256,36 +336,50 @@ class VoiceAssistant:
             }
     
     async def generate_mood_audio_response(self, mood_level: int, note: str = None, 
-                                         language: str = "uk") -> Optional[str]:
+                                         language: str = "uk") -> Optional[bytes]:
         """
         Generate audio response for mood check-in
         """
         try:
             # Generate appropriate text response based on mood
-            if language == "uk":
-                if mood_level <= 3:
-                    text = f"Дякую, що поділилися своїм настроєм. Помічаю, що зараз вам важко. Пам'ятайте - ви не самі, і я тут, щоб підтримати вас. Можливо, варто спробувати глибоко подихати або звернутися до близької людини."
-                elif mood_level <= 6:
-                    text = f"Дякую за відкритість. Ваш настрій у середньому діапазоні, є можливості для покращення. Спробуйте зробити щось приємне для себе - прогуляйтесь або послухайте улюблену музику."
-                else:
-                    text = f"Чудово, що ваш настрій гарний! Це дуже важливо. Намагайтесь зберігати це відчуття та ділитесь позитивом з оточуючими."
+            texts = MOOD_AUDIO_TEXTS["uk" if language == "uk" else "en"]
+            if mood_level <= 3:
+                text = texts[0]
+            elif mood_level <= 6:
+                text = texts[1]
             else:
-                if mood_level <= 3:
-                    text = f"Thank you for sharing your mood with me. I can see you're having a difficult time right now. Remember - you're not alone, and I'm here to support you. Maybe try taking deep breaths or reaching out to someone close."
-                elif mood_level <= 6:
-                    text = f"Thank you for being open. Your mood is in the middle range, there are opportunities for improvement. Try doing something nice for yourself - take a walk or listen to your favorite music."
-                else:
-                    text = f"Wonderful that your mood is good! This is very important. Try to maintain this feeling and share positivity with those around you."
+                text = texts[2]
             
-            # Convert to speech
-            tts_result = await self.voice_service.text_to_speech(text, language)
+            # Convert to speech (served from the prewarmed cache)
+            tts_result = await self.voice_service.text_to_speech(text, language, stock_phrase=True)
             
             if tts_result["success"]:
-                return tts_result["audio_file"]
+                return tts_result["audio"]
             else:
                 logger.error(f"Failed to generate mood audio response: {tts_result.get('error')}")
                 return None
                 
         except Exception as e:
             logger.error(f"Error generating mood audio response: {e}")
-            return None
\ No newline at end of file
+            return None
+
+async def prewarm_tts_cache():
+    """Synthesize the fixed phrases (mood replies, AI fallback and error replies) into the TTS cache"""
+    from services.ai_service import AIService
+    ai_service = AIService()
+    voice_service = VoiceService()
+    
+    phrases = []
+    for language, texts in MOOD_AUDIO_TEXTS.items():
+        phrases.extend((text, language) for text in texts)
+        phrases.append((await ai_service._get_fallback_response("", language), language))
+        phrases.append((ai_service._get_error_response(language), language))
+    
+    warmed = 0
+    for text, language in phrases:
+        if not tts_cache.cacheable(text):
+            logger.warning(f"Phrase too long for TTS cache ({len(text)} chars), not prewarmed")
+            continue
+        result = await voice_service.text_to_speech(text, language, stock_phrase=True)
+        warmed += bool(result["success"])
+    logger.info(f"TTS cache prewarmed: {warmed}/{len(phrases)} phrases")
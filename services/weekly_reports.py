@@ -0,0 +1,52 @@
+from typing import Any, Dict, List, Optional
+
+# Check-ins are on the 1-10 scale of the mood keyboard; the pre-batching
+# report printed the average as "/5", which overstated low moods
+WEEKLY_REPORT_TEMPLATES = {
+    "uk": (
+        "📊 Ваш тижневий звіт настрою:\n"
+        "• Середній рівень настрою: {avg_mood:.1f}/10\n"
+        "• Кількість відміток: {check_ins}\n"
+        "• Тенденція: {trend}\n\n"
+        "Продовжуйте відстежувати свій настрій для кращого розуміння себе! 💪"
+    ),
+    "en": (
+        "📊 Your weekly mood report:\n"
+        "• Average mood: {avg_mood:.1f}/10\n"
+        "• Check-ins: {check_ins}\n"
+        "• Trend: {trend}\n\n"
+        "Keep tracking your mood to understand yourself better! 💪"
+    ),
+}
+
+TREND_LABELS = {
+    "uk": {1: "📈 Покращується", -1: "📉 Знижується", 0: "➡️ Стабільно"},
+    "en": {1: "📈 Improving", -1: "📉 Declining", 0: "➡️ Stable"},
+}
+
+
+def mood_trend(first_mood: int, last_mood: int) -> int:
+    """Compare the first and last check-in of the week: 1 up, -1 down, 0 stable"""
+    return (last_mood > first_mood) - (last_mood < first_mood)
+
+
+def render_weekly_reports(rows: List[Dict[str, Any]],
+                          messages: Dict[str, str] = None) -> List[Optional[str]]:
+    """
+    Render weekly reports for a batch of audience rows carrying
+    avg_mood, check_ins, first_mood and last_mood
+    """
+    reports: List[Optional[str]] = []
+    for row in rows:
+        if not row.get("check_ins"):
+            reports.append(None)
+            continue
+
+        language = row.get("language") if row.get("language") in WEEKLY_REPORT_TEMPLATES else "uk"
+        trend = mood_trend(row["first_mood"], row["last_mood"])
+        reports.append(WEEKLY_REPORT_TEMPLATES[language].format(
+            avg_mood=float(row["avg_mood"]),
+            check_ins=row["check_ins"],
+            trend=TREND_LABELS[language][trend]
+        ))
+    return reports
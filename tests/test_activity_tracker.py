@@ -0,0 +1,88 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from services import activity_tracker as activity_module
+from services.activity_tracker import ActivityTracker
+
+NOW = datetime(2024, 5, 6, 12, 0)
+
+
+class FakeDatabase:
+    """Records every update_last_activity call"""
+
+    def __init__(self):
+        self.writes = []
+        self.failures = 0
+
+    async def update_last_activity(self, user_ids, timestamps):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("database unreachable")
+        self.writes.append(dict(zip(user_ids, timestamps)))
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = FakeDatabase()
+    monkeypatch.setattr(activity_module, "db_manager", db)
+    return db
+
+
+def test_touches_are_coalesced_into_one_write_per_flush(db):
+    tracker = ActivityTracker(interval=60)
+    for minute in range(5):
+        tracker.touch(1, NOW + timedelta(minutes=minute))
+    tracker.touch(2, NOW)
+
+    assert asyncio.run(tracker.flush()) == 2
+    assert db.writes == [{1: NOW + timedelta(minutes=4), 2: NOW}]
+    assert tracker.get_stats()["touched"] == 6
+    assert tracker.get_stats()["pending"] == 0
+
+
+def test_older_touch_does_not_move_activity_back(db):
+    tracker = ActivityTracker(interval=60)
+    tracker.touch(1, NOW)
+    tracker.touch(1, NOW - timedelta(hours=1))
+
+    asyncio.run(tracker.flush())
+
+    assert db.writes == [{1: NOW}]
+
+
+def test_empty_flush_does_not_write(db):
+    tracker = ActivityTracker(interval=60)
+
+    assert asyncio.run(tracker.flush()) == 0
+    assert db.writes == []
+
+
+def test_failed_flush_keeps_activity_for_next_attempt(db):
+    tracker = ActivityTracker(interval=60)
+    tracker.touch(1, NOW)
+    tracker.touch(2, NOW)
+    db.failures = 1
+
+    assert asyncio.run(tracker.flush()) == 0
+    assert db.writes == []
+    # Newer activity recorded meanwhile wins over the retained value
+    tracker.touch(1, NOW + timedelta(minutes=1))
+
+    assert asyncio.run(tracker.flush()) == 2
+    assert db.writes == [{1: NOW + timedelta(minutes=1), 2: NOW}]
+    assert tracker.get_stats()["failed_flushes"] == 1
+    assert tracker.get_stats()["flushes"] == 1
+
+
+def test_stop_writes_remaining_activity(db):
+    async def run():
+        tracker = ActivityTracker(interval=3600)
+        tracker.start()
+        tracker.touch(1, NOW)
+        await tracker.stop()
+
+    asyncio.run(run())
+
+    assert db.writes == [{1: NOW}]
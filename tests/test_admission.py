@@ -0,0 +1,157 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from database.models import SubscriptionStatus
+from services.admission import AdmissionController, AdmissionRejected, Priority, request_priority
+
+
+async def settle():
+    """Let queued tasks reach their wait"""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_admits_immediately_while_slots_are_free():
+    async def scenario():
+        controller = AdmissionController(max_active=2, max_queue=2, max_wait=1)
+        await controller.acquire()
+        await controller.acquire(Priority.PREMIUM)
+        return controller
+
+    controller = asyncio.run(scenario())
+    assert controller.active == 2
+    assert controller.queued == 0
+    assert controller.stats["normal"]["admitted"] == 1
+    assert controller.stats["premium"]["admitted"] == 1
+
+
+def test_release_serves_crisis_then_premium_then_normal():
+    async def scenario():
+        controller = AdmissionController(max_active=1, max_queue=10, max_wait=1)
+        await controller.acquire()
+        order = []
+
+        async def wait(name, priority):
+            await controller.acquire(priority)
+            order.append(name)
+
+        tasks = [
+            asyncio.create_task(wait("normal-1", Priority.NORMAL)),
+            asyncio.create_task(wait("premium", Priority.PREMIUM)),
+            asyncio.create_task(wait("normal-2", Priority.NORMAL)),
+            asyncio.create_task(wait("crisis", Priority.CRISIS)),
+        ]
+        await settle()
+        for _ in tasks:
+            controller.release()
+            await settle()
+        await asyncio.gather(*tasks)
+        return order, controller
+
+    order, controller = asyncio.run(scenario())
+    assert order == ["crisis", "premium", "normal-1", "normal-2"]
+    assert controller.active == 1
+    assert controller.queued == 0
+
+
+def test_full_queue_sheds_lowest_lane_for_higher_priority():
+    async def scenario():
+        controller = AdmissionController(max_active=1, max_queue=2, max_wait=1)
+        await controller.acquire()
+        first = asyncio.create_task(controller.acquire(Priority.NORMAL))
+        second = asyncio.create_task(controller.acquire(Priority.NORMAL))
+        await settle()
+
+        crisis = asyncio.create_task(controller.acquire(Priority.CRISIS))
+        await settle()
+        with pytest.raises(AdmissionRejected) as rejected:
+            await second
+        controller.release()
+        await crisis
+        controller.release()
+        await first
+        return controller, rejected.value.reason
+
+    controller, reason = asyncio.run(scenario())
+    assert reason == "shed"
+    assert controller.stats["normal"]["shed"] == 1
+    assert controller.stats["crisis"]["admitted"] == 1
+
+
+def test_full_queue_rejects_request_that_outranks_nobody():
+    async def scenario():
+        controller = AdmissionController(max_active=1, max_queue=1, max_wait=1)
+        await controller.acquire()
+        waiting = asyncio.create_task(controller.acquire(Priority.PREMIUM))
+        await settle()
+        try:
+            with pytest.raises(AdmissionRejected) as rejected:
+                await controller.acquire(Priority.PREMIUM)
+        finally:
+            waiting.cancel()
+        return controller, rejected.value.reason
+
+    controller, reason = asyncio.run(scenario())
+    assert reason == "queue_full"
+    assert controller.stats["premium"]["rejected"] == 1
+
+
+def test_wait_times_out():
+    async def scenario():
+        controller = AdmissionController(max_active=1, max_queue=1, max_wait=0.01)
+        await controller.acquire()
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire()
+        return controller, rejected.value.reason
+
+    controller, reason = asyncio.run(scenario())
+    assert reason == "timeout"
+    assert controller.queued == 0
+    assert controller.stats["normal"]["timed_out"] == 1
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        controller = AdmissionController(max_active=1, max_queue=1, max_wait=1)
+        await controller.acquire()
+        waiting = asyncio.create_task(controller.acquire())
+        await settle()
+        waiting.cancel()
+        await settle()
+        queued = controller.queued
+        controller.release()
+        return queued, controller.active
+
+    assert asyncio.run(scenario()) == (0, 0)
+
+
+def test_slot_releases_on_exit():
+    async def scenario():
+        controller = AdmissionController(max_active=1, max_queue=1, max_wait=1)
+        with pytest.raises(RuntimeError):
+            async with controller.slot("test"):
+                raise RuntimeError("boom")
+        async with controller.slot("test"):
+            pass
+        return controller.active
+
+    assert asyncio.run(scenario()) == 0
+
+
+@pytest.mark.parametrize("status, crisis, expected", [
+    (SubscriptionStatus.FREE, True, Priority.CRISIS),
+    (SubscriptionStatus.PREMIUM, True, Priority.CRISIS),
+    (SubscriptionStatus.PREMIUM, False, Priority.PREMIUM),
+    (SubscriptionStatus.TRIAL, False, Priority.PREMIUM),
+    (SubscriptionStatus.FREE, False, Priority.NORMAL),
+])
+def test_request_priority(status, crisis, expected):
+    user = SimpleNamespace(subscription_status=status)
+
+    assert request_priority(user, crisis) == expected
+
+
+def test_request_priority_without_user():
+    assert request_priority(None) == Priority.NORMAL
@@ -0,0 +1,79 @@
+import asyncio
+
+from database.audiences import build_audience_query
+from database.db_manager import DatabaseManager
+
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def fetch(self, query, after_user_id, limit):
+        self.pool.queries.append((after_user_id, limit))
+        return [{"user_id": user_id} for user_id in self.pool.user_ids if user_id > after_user_id][:limit]
+
+
+class FakePool:
+    def __init__(self, user_ids):
+        self.user_ids = user_ids
+        self.queries = []
+        self.held = 0
+
+    def acquire(self):
+        pool = self
+
+        class Acquire:
+            async def __aenter__(self):
+                pool.held += 1
+                return FakeConnection(pool)
+
+            async def __aexit__(self, *exc):
+                pool.held -= 1
+
+        return Acquire()
+
+
+def collect(manager, after_user_id=0, page_size=2):
+    async def scenario():
+        seen = []
+        async for row in manager.iter_audience("active_30d", after_user_id, page_size=page_size):
+            # No connection is held while the caller works on the page
+            seen.append((row["user_id"], manager.pool.held))
+        return seen
+
+    return asyncio.run(scenario())
+
+
+def manager_with(user_ids):
+    manager = DatabaseManager()
+    manager.pool = FakePool(user_ids)
+    return manager
+
+
+def test_pages_follow_last_user_id():
+    manager = manager_with([3, 5, 8, 13, 21])
+
+    assert collect(manager) == [(3, 0), (5, 0), (8, 0), (13, 0), (21, 0)]
+    assert manager.pool.queries == [(0, 2), (5, 2), (13, 2)]
+
+
+def test_resume_after_user_id():
+    manager = manager_with([3, 5, 8, 13])
+
+    assert [user_id for user_id, _ in collect(manager, after_user_id=5)] == [8, 13]
+    # A full last page needs one more query to see the end
+    assert manager.pool.queries == [(5, 2), (13, 2)]
+
+
+def test_empty_audience():
+    manager = manager_with([])
+
+    assert collect(manager) == []
+    assert manager.pool.queries == [(0, 2)]
+
+
+def test_query_is_keyset_ordered():
+    query = build_audience_query("weekly_report")
+
+    assert "u.user_id > $1" in query
+    assert query.rstrip().endswith("ORDER BY u.user_id")
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from config import config
+from services.audio_buffer import AudioTooLarge, audio_buffer, buffer_size, download_audio
+from services.spool import audio_spool
+
+SPILL_BYTES = 100
+
+
+class FakeBot:
+    """Serves one file and records get_file calls"""
+
+    def __init__(self, data):
+        self.data = data
+        self.requested = []
+
+    async def get_file(self, file_id):
+        self.requested.append(file_id)
+        return type("File", (), {"file_path": f"voice/{file_id}.ogg"})()
+
+    async def download_file(self, file_path, destination):
+        destination.write(self.data)
+
+
+@pytest.fixture(autouse=True)
+def spill_config(monkeypatch, tmp_path):
+    monkeypatch.setitem(config, "VOICE_SPILL_BYTES", SPILL_BYTES)
+    monkeypatch.setitem(config, "VOICE_MAX_BYTES", 1000)
+    monkeypatch.setattr(audio_spool, "path", str(tmp_path))
+
+
+def test_buffer_stays_in_memory_up_to_spill_threshold(tmp_path):
+    with audio_buffer() as buffer:
+        buffer.write(b"x" * SPILL_BYTES)
+        assert not buffer._rolled
+        assert buffer_size(buffer) == SPILL_BYTES
+
+
+def test_buffer_spills_to_spool_beyond_threshold(tmp_path):
+    with audio_buffer() as buffer:
+        buffer.write(b"x" * (SPILL_BYTES + 1))
+        assert buffer._rolled
+        assert buffer_size(buffer) == SPILL_BYTES + 1
+    # The spilled file is anonymous and gone once the buffer is closed
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_buffer_size_keeps_position():
+    with audio_buffer() as buffer:
+        buffer.write(b"abcdef")
+        buffer.seek(2)
+        assert buffer_size(buffer) == 6
+        assert buffer.tell() == 2
+
+
+def test_download_returns_buffer_at_start():
+    bot = FakeBot(b"y" * (SPILL_BYTES * 2))
+
+    buffer = asyncio.run(download_audio(bot, "abc", file_size=SPILL_BYTES * 2))
+    with buffer:
+        assert buffer._rolled
+        assert buffer.read() == bot.data
+
+
+def test_download_rejects_reported_size_without_fetching():
+    bot = FakeBot(b"")
+
+    with pytest.raises(AudioTooLarge) as error:
+        asyncio.run(download_audio(bot, "abc", file_size=1001))
+
+    assert error.value.size == 1001
+    assert bot.requested == []
+
+
+def test_download_rejects_actual_size_and_closes_buffer():
+    bot = FakeBot(b"z" * 1001)
+    with audio_buffer() as buffer:
+        with pytest.raises(AudioTooLarge):
+            asyncio.run(download_audio(bot, "abc", buffer=buffer))
+        assert buffer.closed
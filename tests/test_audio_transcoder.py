@@ -0,0 +1,65 @@
+import asyncio
+import pickle
+
+from pydub import AudioSegment
+from pydub.generators import Sine
+
+from services.audio_buffer import AudioTooLong
+from services.audio_transcoder import AudioTranscoder, trim_silence
+
+
+def tone(ms):
+    return Sine(440).to_audio_segment(duration=ms, volume=-10).set_frame_rate(16000).set_channels(1)
+
+
+def silence(ms):
+    return AudioSegment.silent(duration=ms, frame_rate=16000)
+
+
+def trim(segment):
+    return trim_silence(segment, min_silence_ms=700, silence_offset_db=-16.0, keep_silence_ms=200)
+
+
+def test_leading_and_trailing_silence_is_dropped():
+    trimmed = trim(silence(2000) + tone(1000) + silence(2000))
+
+    # 200 ms of padding is kept on each side of the speech
+    assert 1300 <= len(trimmed) <= 1500
+
+
+def test_long_pauses_are_shortened():
+    trimmed = trim(tone(1000) + silence(3000) + tone(1000))
+
+    assert 2300 <= len(trimmed) <= 2600
+
+
+def test_short_pauses_are_kept():
+    segment = tone(1000) + silence(400) + tone(1000)
+
+    assert len(trim(segment)) == len(segment)
+
+
+def test_digital_silence_is_returned_unchanged():
+    segment = silence(1000)
+
+    assert trim(segment) is segment
+
+
+def test_start_and_stop_worker_pool():
+    transcoder = AudioTranscoder(max_workers=1)
+
+    async def run():
+        await transcoder.start()
+        running = transcoder.get_stats()["running"]
+        await transcoder.stop()
+        return running
+
+    assert asyncio.run(run())
+    assert not transcoder.get_stats()["running"]
+
+
+def test_too_long_error_survives_pickling():
+    error = pickle.loads(pickle.dumps(AudioTooLong(700.0, 600)))
+
+    assert (error.duration, error.limit) == (700.0, 600)
+    assert str(error) == "Audio is 700 seconds, limit is 600"
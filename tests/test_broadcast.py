@@ -0,0 +1,42 @@
+from services.broadcast import BroadcastEngine, _Job
+
+
+def engine_with_jobs(*job_ids):
+    engine = BroadcastEngine()
+    for job_id in job_ids:
+        engine._jobs[job_id] = _Job({"id": job_id, "kind": "admin", "audience": "all", "messages": {"uk": "hi"}})
+    return engine
+
+
+def test_cancel_by_full_id():
+    engine = engine_with_jobs("3f2a9c1e-0000", "3f2a9c1e-1111")
+
+    assert engine.cancel("3f2a9c1e-1111") == "cancelled"
+    assert engine._jobs["3f2a9c1e-1111"].cancelled
+    assert not engine._jobs["3f2a9c1e-0000"].cancelled
+
+
+def test_cancel_by_unique_prefix():
+    engine = engine_with_jobs("3f2a9c1e-0000", "7b00d4aa-0000")
+
+    assert engine.cancel("7b00d4aa") == "cancelled"
+    assert engine._jobs["7b00d4aa-0000"].cancelled
+
+
+def test_short_prefix_cancels_nothing():
+    engine = engine_with_jobs("3f2a9c1e-0000")
+
+    assert engine.cancel("3") == "not_found"
+    assert engine.cancel("") == "not_found"
+    assert not engine._jobs["3f2a9c1e-0000"].cancelled
+
+
+def test_ambiguous_prefix_cancels_nothing():
+    engine = engine_with_jobs("3f2a9c1e-0000", "3f2a9c1e-1111")
+
+    assert engine.cancel("3f2a9c1e") == "ambiguous"
+    assert not any(job.cancelled for job in engine._jobs.values())
+
+
+def test_unknown_id():
+    assert engine_with_jobs("3f2a9c1e-0000").cancel("ffffffff") == "not_found"
@@ -0,0 +1,135 @@
+import asyncio
+import itertools
+
+import pytest
+
+from services import conversation_memory as memory_module
+from services.conversation_memory import SUMMARY_LINE_CHARS, ConversationMemory, estimate_tokens
+
+
+class FakeDatabase:
+    """ai_chats rows and per-user reset marks, filtered like get_recent_ai_chats"""
+
+    def __init__(self):
+        self.clock = itertools.count(1)
+        self.chats = []
+        self.reset_at = {}
+        self.loads = 0
+
+    def save(self, user_id, message, response):
+        self.chats.append({"user_id": user_id, "message": message, "response": response,
+                           "timestamp": next(self.clock)})
+
+    async def get_recent_ai_chats(self, user_id, limit=12):
+        self.loads += 1
+        since = self.reset_at.get(user_id, 0)
+        rows = [row for row in self.chats if row["user_id"] == user_id and row["timestamp"] > since]
+        return rows[-limit:]
+
+    async def reset_ai_context(self, user_id):
+        self.reset_at[user_id] = next(self.clock)
+        return True
+
+
+@pytest.fixture
+def database(monkeypatch):
+    database = FakeDatabase()
+    monkeypatch.setattr(memory_module, "db_manager", database)
+    return database
+
+
+def context(memory, user_id=1, message=""):
+    return asyncio.run(memory.build_context(user_id, message))
+
+
+def test_history_is_loaded_once(database):
+    database.save(1, "hi", "hello")
+    memory = ConversationMemory(max_turns=4, token_budget=1000)
+
+    assert context(memory)["turns"] == [("hi", "hello")]
+    memory.add_turn(1, "how are you", "fine")
+    assert context(memory)["turns"] == [("hi", "hello"), ("how are you", "fine")]
+    assert database.loads == 1
+
+
+def test_turns_pushed_out_of_the_ring_become_summary(database):
+    memory = ConversationMemory(max_turns=2, token_budget=1000)
+    context(memory)
+    for index in range(4):
+        memory.add_turn(1, f"Question {index}. More text", f"Answer {index}! And more")
+
+    result = context(memory)
+    assert result["turns"] == [("Question 2. More text", "Answer 2! And more"),
+                               ("Question 3. More text", "Answer 3! And more")]
+    assert result["summary"] == "- Question 0. → Answer 0!\n- Question 1. → Answer 1!"
+
+
+def test_summary_lines_are_bounded(database):
+    memory = ConversationMemory(max_turns=1, token_budget=10000, max_summary_lines=2)
+    context(memory)
+    for index in range(5):
+        memory.add_turn(1, f"q{index}", f"a{index}")
+
+    assert context(memory)["summary"] == "- q2 → a2\n- q3 → a3"
+
+
+def test_long_turns_are_cut_in_summary(database):
+    memory = ConversationMemory(max_turns=1, token_budget=10000)
+    context(memory)
+    memory.add_turn(1, "word " * 100, "reply " * 100)
+    memory.add_turn(1, "next", "turn")
+
+    line = context(memory)["summary"]
+    message, response = line[2:].split(" → ")
+    assert len(message) <= SUMMARY_LINE_CHARS // 2
+    assert message.endswith("…") and response.endswith("…")
+
+
+def test_context_fits_token_budget(database):
+    memory = ConversationMemory(max_turns=10, token_budget=60)
+    context(memory)
+    for index in range(10):
+        memory.add_turn(1, "m" * 40, f"{index}" * 40)
+
+    turns = context(memory, message="x" * 20)["turns"]
+    used = sum(estimate_tokens(message) + estimate_tokens(response) for message, response in turns)
+    assert 0 < len(turns) < 10
+    assert used <= 60 - estimate_tokens("x" * 20)
+    # The newest turns are kept
+    assert turns[-1][1] == "9" * 40
+
+
+def test_reset_clears_context_and_survives_restart(database):
+    database.save(1, "old question", "old answer")
+    memory = ConversationMemory(max_turns=4, token_budget=1000)
+    assert context(memory)["turns"]
+
+    asyncio.run(memory.reset(1))
+    assert context(memory)["turns"] == []
+
+    database.save(1, "new question", "new answer")
+    memory.add_turn(1, "new question", "new answer")
+    assert context(memory)["turns"] == [("new question", "new answer")]
+
+    # A fresh process loads only turns after the stored reset
+    restarted = ConversationMemory(max_turns=4, token_budget=1000)
+    assert context(restarted)["turns"] == [("new question", "new answer")]
+
+
+def test_least_recent_users_are_evicted(database):
+    memory = ConversationMemory(max_turns=2, token_budget=1000, max_users=2)
+    for user_id in (1, 2, 1, 3):
+        context(memory, user_id)
+
+    assert list(memory._sessions) == [1, 3]
+    assert memory.get_stats()["users"] == 2
+
+
+def test_database_error_gives_empty_context(monkeypatch):
+    class BrokenDatabase:
+        async def get_recent_ai_chats(self, user_id, limit=12):
+            raise ConnectionError("database unreachable")
+
+    monkeypatch.setattr(memory_module, "db_manager", BrokenDatabase())
+
+    assert context(ConversationMemory()) == {"summary": None, "turns": []}
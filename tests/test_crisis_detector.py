@@ -0,0 +1,105 @@
+import pytest
+
+from services.crisis_alerts import PRIORITY_CRISIS, PRIORITY_IMMEDIATE, crisis_priority
+from services.crisis_detector import HIGH, MEDIUM, CrisisDetector, crisis_detector, normalize
+
+
+@pytest.mark.parametrize("text", [
+    "Я не хочу жити",
+    "не хочеться вже жити",
+    "думаю про самогубство",
+    "у мене суїцидальні думки",
+    "I keep thinking about suicide",
+    "I've been feeling suicidal lately",
+    "I want to kill myself",
+    "Я вб’ю себе",
+    "HE XOЧУ ЖИТИ",
+    "не хочу жиtи",
+    "хочу умереть",
+    "Іноді просто хочу вмерти",
+    "Я вже не бачу сенсу жити",
+])
+def test_high_severity_phrases_are_detected(text):
+    result = crisis_detector.scan(text)
+    assert result["crisis_detected"]
+    assert result["confidence"] >= HIGH
+
+
+def test_single_high_phrase_does_not_require_immediate_attention():
+    result = crisis_detector.scan("Я не хочу жити")
+
+    assert result["indicators"] == ["не хочу жити"]
+    assert not result["requires_immediate_attention"]
+    assert crisis_priority(result) == PRIORITY_CRISIS
+
+
+def test_two_high_phrases_require_immediate_attention():
+    result = crisis_detector.scan("не бачу сенсу жити, хочу вмерти")
+
+    assert sorted(result["indicators"]) == ["не бачу сенсу жити", "хочу вмерти"]
+    assert result["requires_immediate_attention"]
+    assert crisis_priority(result) == PRIORITY_IMMEDIATE
+
+
+@pytest.mark.parametrize("text", [
+    "Today was a good day",
+    "the suite is nice",
+    "Я хочу жити далі і радіти",
+    "немає часу на каву",
+    "Дякую, мені краще",
+    "",
+])
+def test_neutral_text_is_not_flagged(text):
+    result = crisis_detector.scan(text)
+    assert not result["crisis_detected"]
+    assert result["indicators"] == []
+    assert result["confidence"] == 0.0
+
+
+def test_hopelessness_matches_prefix_phrase():
+    result = crisis_detector.scan("this hopelessness never ends")
+
+    assert result["crisis_detected"]
+    assert result["indicators"] == ["hopeless"]
+    assert not result["requires_immediate_attention"]
+
+
+def test_prefix_indicator_is_reported_without_asterisk():
+    result = crisis_detector.scan("у мене суїцидальні думки")
+
+    assert result["indicators"] == ["суїцид"]
+
+
+def test_single_medium_phrase_does_not_require_immediate_attention():
+    result = crisis_detector.scan("there is no point")
+
+    assert result["crisis_detected"]
+    assert result["confidence"] == MEDIUM
+    assert not result["requires_immediate_attention"]
+
+
+def test_two_medium_phrases_require_immediate_attention():
+    result = crisis_detector.scan("no point, nobody cares")
+
+    assert sorted(result["indicators"]) == ["no point", "nobody cares"]
+    assert result["confidence"] == round(1 - (1 - MEDIUM) ** 2, 3)
+    assert result["requires_immediate_attention"]
+
+
+def test_phrases_only_match_whole_words():
+    detector = CrisisDetector({"en": [("want to die", HIGH)]})
+
+    assert not detector.scan("I want to diet")["crisis_detected"]
+    assert detector.scan("I want to die")["crisis_detected"]
+
+
+def test_custom_phrase_list_is_used():
+    detector = CrisisDetector({"en": [("help me", MEDIUM)]})
+
+    assert detector.scan("please help me")["indicators"] == ["help me"]
+    assert not detector.scan("I want to kill myself")["crisis_detected"]
+
+
+def test_normalize_unifies_apostrophes_and_homoglyphs():
+    assert normalize("вб’ю") == normalize("вб'ю") == normalize("вбʼю")
+    assert normalize("HE XOЧУ ЖИТИ") == normalize("не хочу жити")
@@ -0,0 +1,104 @@
+from datetime import datetime
+
+import pytest
+
+from utils.cron import CronExpression
+
+# 2024-01-01 is a Monday
+MONDAY = datetime(2024, 1, 1, 10, 30)
+
+
+def test_every_minute_returns_next_minute():
+    assert CronExpression("* * * * *").next_after(MONDAY) == datetime(2024, 1, 1, 10, 31)
+
+
+def test_result_is_strictly_after_matching_moment():
+    cron = CronExpression("30 10 * * *")
+
+    assert cron.next_after(MONDAY) == datetime(2024, 1, 2, 10, 30)
+
+
+def test_seconds_are_dropped():
+    cron = CronExpression("31 10 * * *")
+
+    assert cron.next_after(MONDAY.replace(second=59, microsecond=1)) == datetime(2024, 1, 1, 10, 31)
+
+
+def test_daily_time_later_today():
+    assert CronExpression("0 18 * * *").next_after(MONDAY) == datetime(2024, 1, 1, 18, 0)
+
+
+def test_steps_ranges_and_lists():
+    cron = CronExpression("*/15 9-17 * * *")
+    assert cron.next_after(MONDAY) == datetime(2024, 1, 1, 10, 45)
+    assert cron.next_after(datetime(2024, 1, 1, 17, 45)) == datetime(2024, 1, 2, 9, 0)
+
+    cron = CronExpression("5,50 * * * *")
+    assert cron.next_after(MONDAY) == datetime(2024, 1, 1, 10, 50)
+
+
+def test_single_value_with_step_runs_to_end_of_range():
+    cron = CronExpression("10/20 * * * *")
+
+    assert cron.minutes == frozenset({10, 30, 50})
+
+
+def test_weekday_zero_and_seven_are_sunday():
+    expected = datetime(2024, 1, 7, 9, 0)
+
+    assert CronExpression("0 9 * * 0").next_after(MONDAY) == expected
+    assert CronExpression("0 9 * * 7").next_after(MONDAY) == expected
+
+
+def test_sunday_as_seven_inside_ranges_and_steps():
+    assert CronExpression("0 9 * * 5-7").weekdays == frozenset({5, 6, 0})
+    assert CronExpression("0 9 * * 1-7/3").weekdays == frozenset({1, 4, 0})
+    assert CronExpression("0 9 * * 6-7").next_after(MONDAY) == datetime(2024, 1, 6, 9, 0)
+
+
+def test_weekday_range():
+    cron = CronExpression("0 9 * * 1-5")
+
+    assert cron.next_after(datetime(2024, 1, 5, 10, 0)) == datetime(2024, 1, 8, 9, 0)
+
+
+def test_day_or_weekday_when_both_restricted():
+    # 15th of the month or any Friday, whichever comes first
+    cron = CronExpression("0 0 15 * 5")
+
+    assert cron.next_after(MONDAY) == datetime(2024, 1, 5, 0, 0)
+    assert cron.next_after(datetime(2024, 1, 12, 1, 0)) == datetime(2024, 1, 15, 0, 0)
+
+
+def test_month_rollover_into_next_year():
+    cron = CronExpression("0 3 1 * *")
+
+    assert cron.next_after(datetime(2024, 12, 5)) == datetime(2025, 1, 1, 3, 0)
+
+
+def test_leap_day():
+    cron = CronExpression("0 0 29 2 *")
+
+    assert cron.next_after(datetime(2024, 3, 1)) == datetime(2028, 2, 29, 0, 0)
+
+
+def test_impossible_date_raises():
+    with pytest.raises(ValueError):
+        CronExpression("0 0 31 2 *").next_after(MONDAY)
+
+
+@pytest.mark.parametrize("expression", [
+    "* * * *",
+    "* * * * * *",
+    "60 * * * *",
+    "* 24 * * *",
+    "* * 0 * *",
+    "* * * 13 *",
+    "* * * * 8",
+    "*/0 * * * *",
+    "10-5 * * * *",
+    "a * * * *",
+])
+def test_invalid_expressions_raise(expression):
+    with pytest.raises(ValueError):
+        CronExpression(expression)
@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+
+from config import config
+from database.db_manager import DatabaseManager, JobLease, LeaseLost
+
+
+class FakeConnection:
+    async def execute(self, query, *args):
+        return "DELETE 1"
+
+
+class FakePool:
+    def acquire(self):
+        class Acquire:
+            async def __aenter__(self):
+                return FakeConnection()
+
+            async def __aexit__(self, *exc):
+                pass
+
+        return Acquire()
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setitem(config, "JOB_LEASE_SECONDS", 0.03)
+    manager = DatabaseManager()
+    manager.pool = FakePool()
+    manager.renewals = []
+
+    async def try_lease(name, holder, seconds):
+        return True
+
+    async def renew_lease(name, holder, seconds):
+        manager.renewals.append(name)
+        return manager.renew_result
+
+    manager.renew_result = True
+    monkeypatch.setattr(manager, "_try_lease", try_lease)
+    monkeypatch.setattr(manager, "_renew_lease", renew_lease)
+    return manager
+
+
+def test_guarded_work_finishes_while_lease_is_renewed(manager):
+    async def scenario():
+        async with manager.job_lease("job") as lease:
+            assert lease
+            return await lease.guard(asyncio.sleep(0.05, result="done"))
+
+    assert asyncio.run(scenario()) == "done"
+    assert manager.renewals
+
+
+def test_lost_lease_cancels_guarded_work(manager):
+    manager.renew_result = False
+    cancelled = []
+
+    async def work():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def scenario():
+        async with manager.job_lease("job") as lease:
+            await lease.guard(work())
+
+    with pytest.raises(LeaseLost):
+        asyncio.run(scenario())
+    assert cancelled == [True]
+
+
+def test_lease_expires_when_renewals_keep_failing(manager):
+    async def renew_lease(name, holder, seconds):
+        raise ConnectionError("database unreachable")
+
+    manager._renew_lease = renew_lease
+
+    async def scenario():
+        async with manager.job_lease("job") as lease:
+            await lease.guard(asyncio.sleep(10))
+
+    with pytest.raises(LeaseLost):
+        asyncio.run(scenario())
+
+
+def test_lease_not_acquired(manager):
+    async def try_lease(name, holder, seconds):
+        return False
+
+    manager._try_lease = try_lease
+
+    async def scenario():
+        async with manager.job_lease("job") as lease:
+            return bool(lease)
+
+    assert asyncio.run(scenario()) is False
+
+
+def test_guard_propagates_errors():
+    async def fail():
+        raise ValueError("boom")
+
+    async def scenario():
+        await JobLease("job", True).guard(fail())
+
+    with pytest.raises(ValueError):
+        asyncio.run(scenario())
+
+
+def test_job_state_errors_are_raised():
+    class BrokenPool:
+        def acquire(self):
+            raise ConnectionError("database unreachable")
+
+    manager = DatabaseManager()
+    manager.pool = BrokenPool()
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(manager.get_job_state("job"))
@@ -0,0 +1,72 @@
+import asyncio
+from datetime import datetime
+
+from aiogram.types import CallbackQuery, Chat, Message, User
+
+from utils.middleware import SecurityMiddleware, ThrottlingMiddleware, event_kind
+
+USER = User(id=42, is_bot=False, first_name="Test")
+
+
+def message(text=None, **fields):
+    return Message(
+        message_id=1, date=datetime.now(), chat=Chat(id=42, type="private"),
+        from_user=USER, text=text, **fields
+    )
+
+
+def run_middleware(middleware, event, data=None):
+    handled = []
+
+    async def handler(event, data):
+        handled.append(event)
+
+    asyncio.run(middleware(handler, event, data or {}))
+    return bool(handled)
+
+
+def test_messages_in_ai_chat_are_ai_requests():
+    data = {"raw_state": "AIChatStates:waiting_for_message"}
+
+    assert event_kind(message("hello"), data) == "ai"
+    assert event_kind(message("hello"), {}) == "message"
+
+
+def test_commands_in_ai_chat_are_messages():
+    data = {"raw_state": "AIChatStates:waiting_for_message"}
+
+    for command in ("/end_chat", "/start", "/help"):
+        assert event_kind(message(command), data) == "message"
+
+
+def test_callbacks():
+    callback = CallbackQuery(id="1", from_user=USER, chat_instance="1", data="x")
+
+    assert event_kind(callback, {}) == "callback"
+
+
+def test_exhausted_ai_allowance_still_lets_user_leave_ai_chat():
+    middleware = ThrottlingMiddleware({"message": (1, 5), "callback": (1, 5), "ai": (0.001, 1)})
+    data = {"raw_state": "AIChatStates:waiting_for_message"}
+
+    assert run_middleware(middleware, message("hello"), data)
+    middleware.warnings.try_acquire(USER.id)  # no warning reply without a bot
+    assert not run_middleware(middleware, message("hello again"), data)
+    assert run_middleware(middleware, message("/end_chat"), data)
+
+
+def test_throttling_never_drops_crisis_messages():
+    middleware = ThrottlingMiddleware({"message": (0.001, 1), "callback": (1, 5), "ai": (1, 5)})
+    middleware.warnings.try_acquire(USER.id)
+
+    assert run_middleware(middleware, message("hi"))
+    assert not run_middleware(middleware, message("hi"))
+    assert run_middleware(middleware, message("я не хочу жити"))
+
+
+def test_blocked_user_can_still_send_crisis_messages():
+    middleware = SecurityMiddleware()
+    middleware.blocked_users[USER.id] = float("inf")
+
+    assert not run_middleware(middleware, message("hi"))
+    assert run_middleware(middleware, message("I want to kill myself"))
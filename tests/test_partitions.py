@@ -0,0 +1,59 @@
+from datetime import datetime
+
+import pytest
+
+from database.partitions import (
+    add_months, legacy_name, month_start, parse_partition_bounds, partition_name
+)
+
+
+def test_month_start():
+    assert month_start(datetime(2024, 2, 29, 23, 59, 59, 999)) == datetime(2024, 2, 1)
+
+
+@pytest.mark.parametrize("months, expected", [
+    (0, datetime(2024, 11, 1)),
+    (1, datetime(2024, 12, 1)),
+    (2, datetime(2025, 1, 1)),
+    (14, datetime(2026, 1, 1)),
+    (-11, datetime(2023, 12, 1)),
+    (-12, datetime(2023, 11, 1)),
+])
+def test_add_months_crosses_years(months, expected):
+    assert add_months(datetime(2024, 11, 1), months) == expected
+
+
+def test_partition_names():
+    assert partition_name("ai_chats", datetime(2024, 1, 1)) == "ai_chats_p202401"
+    assert partition_name("mood_checkins", datetime(2024, 12, 1)) == "mood_checkins_p202412"
+    assert legacy_name("ai_chats") == "ai_chats_legacy"
+
+
+def test_parse_range_bounds():
+    expression = "FOR VALUES FROM ('2024-01-01 00:00:00') TO ('2024-02-01 00:00:00')"
+
+    assert parse_partition_bounds(expression) == (datetime(2024, 1, 1), datetime(2024, 2, 1))
+
+
+def test_parse_open_bounds():
+    expression = "FOR VALUES FROM (MINVALUE) TO ('2024-02-01 00:00:00')"
+
+    assert parse_partition_bounds(expression) == (None, datetime(2024, 2, 1))
+
+
+def test_default_partition_has_no_bounds():
+    assert parse_partition_bounds("DEFAULT") is None
+
+
+def test_consecutive_partitions_tile_the_range():
+    month = datetime(2024, 11, 1)
+    ranges = []
+    for _ in range(4):
+        next_month = add_months(month, 1)
+        ranges.append((partition_name("ai_chats", month), month, next_month))
+        month = next_month
+
+    assert [name for name, _, _ in ranges] == [
+        "ai_chats_p202411", "ai_chats_p202412", "ai_chats_p202501", "ai_chats_p202502"
+    ]
+    assert all(ranges[i][2] == ranges[i + 1][1] for i in range(3))
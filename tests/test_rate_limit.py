@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+
+from utils import rate_limit
+from utils.rate_limit import KeyedTokenBuckets, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock)
+    return clock
+
+
+def test_bucket_starts_full_and_allows_burst(clock):
+    bucket = TokenBucket(rate=1, capacity=3)
+
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+
+
+def test_bucket_refills_at_rate(clock):
+    bucket = TokenBucket(rate=2, capacity=2)
+    bucket.try_acquire(2)
+
+    clock.advance(0.25)
+    assert not bucket.try_acquire()
+    clock.advance(0.25)
+    assert bucket.try_acquire()
+
+
+def test_bucket_never_exceeds_capacity(clock):
+    bucket = TokenBucket(rate=10, capacity=2)
+
+    clock.advance(60)
+    assert [bucket.try_acquire() for _ in range(3)] == [True, True, False]
+
+
+def test_capacity_defaults_to_rate(clock):
+    assert TokenBucket(rate=5).capacity == 5
+
+
+def test_pause_blocks_for_given_seconds(clock):
+    bucket = TokenBucket(rate=1, capacity=5)
+    bucket.pause(3)
+
+    clock.advance(3.5)
+    assert not bucket.try_acquire()
+    clock.advance(0.5)
+    assert bucket.try_acquire()
+
+
+def test_acquire_waits_for_tokens(clock, monkeypatch):
+    slept = []
+
+    async def fake_sleep(seconds):
+        slept.append(seconds)
+        clock.advance(seconds)
+
+    monkeypatch.setattr(rate_limit.asyncio, "sleep", fake_sleep)
+    bucket = TokenBucket(rate=4, capacity=1)
+
+    async def scenario():
+        await bucket.acquire()
+        await bucket.acquire()
+
+    asyncio.run(scenario())
+    assert slept == [pytest.approx(0.25)]
+
+
+def test_keyed_buckets_are_independent(clock):
+    buckets = KeyedTokenBuckets(rate=1, capacity=1)
+
+    assert buckets.try_acquire("a")
+    assert not buckets.try_acquire("a")
+    assert buckets.try_acquire("b")
+    assert len(buckets) == 2
+
+
+def test_idle_buckets_are_evicted(clock):
+    buckets = KeyedTokenBuckets(rate=1, capacity=2)
+    buckets.try_acquire("a")
+    clock.advance(1)
+    buckets.try_acquire("b")
+
+    # "a" has been idle for capacity / rate seconds and is full again
+    clock.advance(1)
+    buckets.try_acquire("c")
+    assert len(buckets) == 2
+    assert "a" not in buckets._buckets
+
+
+def test_max_keys_evicts_least_recently_used(clock):
+    buckets = KeyedTokenBuckets(rate=1, capacity=100, max_keys=2)
+    buckets.try_acquire("a")
+    buckets.try_acquire("b")
+    buckets.try_acquire("a")
+
+    buckets.try_acquire("c")
+    assert list(buckets._buckets) == ["a", "c"]
+
+
+def test_evicted_key_starts_with_full_bucket(clock):
+    buckets = KeyedTokenBuckets(rate=1, capacity=1)
+    assert buckets.try_acquire("a")
+    assert not buckets.try_acquire("a")
+
+    clock.advance(1)
+    assert buckets.try_acquire("a")
@@ -0,0 +1,75 @@
+import pytest
+
+from services import response_cache as response_cache_module
+from services.response_cache import ResponseCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(response_cache_module.time, "time", lambda: now[0])
+    return now
+
+
+def test_key_ignores_case_and_whitespace():
+    assert ResponseCache.make_key("advice", "Need  Advice\n", "uk") == ResponseCache.make_key("advice", "need advice", "uk")
+    assert ResponseCache.make_key("advice", "need advice", "uk") != ResponseCache.make_key("advice", "need advice", "en")
+    assert ResponseCache.make_key("advice", "x", "uk", (1,)) != ResponseCache.make_key("advice", "x", "uk", (2,))
+
+
+def test_misses_until_enough_variants(clock):
+    cache = ResponseCache(ttl=60, max_keys=10, variants_per_key=3)
+    cache.put("advice", "k", "one")
+    cache.put("advice", "k", "two")
+    assert cache.get("advice", "k") is None
+
+    cache.put("advice", "k", "three")
+    assert cache.get("advice", "k") in {"one", "two", "three"}
+
+
+def test_duplicate_text_is_not_a_new_variant(clock):
+    cache = ResponseCache(ttl=60, max_keys=10, variants_per_key=2)
+    cache.put("advice", "k", "same")
+    cache.put("advice", "k", "same")
+    assert cache.get("advice", "k") is None
+
+
+def test_only_newest_variants_are_kept(clock):
+    cache = ResponseCache(ttl=60, max_keys=10, variants_per_key=2)
+    for text in ("a", "b", "c"):
+        cache.put("advice", "k", text)
+        clock[0] += 1
+    assert {cache.get("advice", "k") for _ in range(50)} == {"b", "c"}
+
+
+def test_expired_variants_miss_but_serve_as_stale_fallback(clock):
+    cache = ResponseCache(ttl=60, max_keys=10, variants_per_key=2)
+    cache.put("coping", "k", "old")
+    clock[0] += 10
+    cache.put("coping", "k", "newer")
+    clock[0] += 61
+
+    assert cache.get("coping", "k") is None
+    assert cache.get_stale("coping", "k") == "newer"
+    assert cache.get_stale("coping", "missing") is None
+
+
+def test_least_recently_used_key_is_evicted(clock):
+    cache = ResponseCache(ttl=60, max_keys=2, variants_per_key=1)
+    cache.put("advice", "a", "A")
+    cache.put("advice", "b", "B")
+    assert cache.get("advice", "a") == "A"
+    cache.put("advice", "c", "C")
+
+    assert cache.get_stale("advice", "b") is None
+    assert cache.get("advice", "a") == "A"
+    assert cache.get("advice", "c") == "C"
+
+
+def test_stats_report_hit_rate(clock):
+    cache = ResponseCache(ttl=60, max_keys=10, variants_per_key=1)
+    cache.get("advice", "k")
+    cache.put("advice", "k", "text")
+    cache.get("advice", "k")
+    stats = cache.get_stats()["prompt_types"]["advice"]
+    assert stats["hits"] == 1 and stats["misses"] == 1 and stats["hit_rate"] == 0.5
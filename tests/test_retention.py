@@ -0,0 +1,121 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from services import retention as retention_module
+from services.retention import RetentionCleaner
+
+NOW = datetime.now()
+
+
+class FakeDatabase:
+    """Rows of (timestamp, id) per table with the batch semantics of delete_old_rows_batch"""
+
+    def __init__(self, rows):
+        self.rows = {table: sorted(table_rows) for table, table_rows in rows.items()}
+        self.watermarks = {}
+        self.batch_starts = []
+        self.floor = None
+        self.failing = set()
+
+    async def get_retention_watermark(self, table):
+        return self.watermarks.get(table)
+
+    async def save_retention_watermark(self, table, watermark, deleted):
+        self.watermarks[table] = watermark
+
+    async def drop_expired_partitions(self, table, cutoff, archive):
+        if table in self.failing:
+            raise ConnectionError("database unreachable")
+        return []
+
+    async def get_partition_floor(self, table):
+        return self.floor
+
+    async def delete_old_rows_batch(self, table, after, cutoff, limit, archive):
+        self.batch_starts.append(after)
+        batch = [row for row in self.rows[table] if (after is None or row[0] >= after) and row[0] < cutoff][:limit]
+        for row in batch:
+            self.rows[table].remove(row)
+        return len(batch), (batch[-1][0] if batch else None)
+
+
+def days_ago(days, hours=0):
+    return NOW - timedelta(days=days, hours=hours)
+
+
+@pytest.fixture
+def cleaner():
+    cleaner = RetentionCleaner()
+    cleaner.batch_size = 2
+    cleaner.batch_pause = 0
+    cleaner.policies = {"ai_chats": timedelta(days=90)}
+    return cleaner
+
+
+def use_database(monkeypatch, rows):
+    database = FakeDatabase(rows)
+    monkeypatch.setattr(retention_module, "db_manager", database)
+    return database
+
+
+def test_batches_advance_the_watermark(monkeypatch, cleaner):
+    expired = [(days_ago(100, hours), hours) for hours in range(5)]
+    kept = [(days_ago(10), 99)]
+    database = use_database(monkeypatch, {"ai_chats": expired + kept})
+
+    assert asyncio.run(cleaner.cleanup_table("ai_chats")) == 5
+
+    assert database.rows["ai_chats"] == kept
+    newest_expired = max(timestamp for timestamp, _ in expired)
+    assert database.watermarks["ai_chats"] == newest_expired
+    # Each batch starts at the newest row of the previous one
+    assert database.batch_starts[0] is None
+    assert database.batch_starts[1:] == sorted(database.batch_starts[1:])
+    assert cleaner.get_stats()["ai_chats"]["batches"] == 3
+    assert not cleaner.get_stats()["ai_chats"]["running"]
+
+
+def test_next_run_starts_at_saved_watermark(monkeypatch, cleaner):
+    database = use_database(monkeypatch, {"ai_chats": [(days_ago(120), 1), (days_ago(100), 2)]})
+    asyncio.run(cleaner.cleanup_table("ai_chats"))
+    watermark = database.watermarks["ai_chats"]
+
+    database.batch_starts.clear()
+    asyncio.run(cleaner.cleanup_table("ai_chats"))
+    assert database.batch_starts == [watermark]
+
+
+def test_rows_sharing_the_watermark_timestamp_are_not_skipped(monkeypatch, cleaner):
+    same = days_ago(100)
+    database = use_database(monkeypatch, {"ai_chats": [(same, 1), (same, 2), (same, 3)]})
+
+    assert asyncio.run(cleaner.cleanup_table("ai_chats")) == 3
+    assert database.rows["ai_chats"] == []
+
+
+def test_max_batches(monkeypatch, cleaner):
+    database = use_database(monkeypatch, {"ai_chats": [(days_ago(100, hours), hours) for hours in range(5)]})
+
+    assert asyncio.run(cleaner.cleanup_table("ai_chats", max_batches=1)) == 2
+    assert len(database.rows["ai_chats"]) == 3
+
+
+def test_partition_floor_limits_row_deletes(monkeypatch, cleaner):
+    database = use_database(monkeypatch, {"ai_chats": [(days_ago(200), 1), (days_ago(95), 2)]})
+    # Rows from the floor on live in monthly partitions, which expire as a whole
+    database.floor = days_ago(150)
+
+    assert asyncio.run(cleaner.cleanup_table("ai_chats")) == 1
+    assert database.rows["ai_chats"] == [(days_ago(95), 2)]
+
+
+def test_failing_table_does_not_stop_others(monkeypatch, cleaner):
+    cleaner.policies = {"ai_chats": timedelta(days=90), "mood_checkins": timedelta(days=730)}
+    database = use_database(monkeypatch, {"ai_chats": [], "mood_checkins": [(days_ago(800), 1)]})
+    database.failing.add("ai_chats")
+
+    with pytest.raises(RuntimeError, match="ai_chats"):
+        asyncio.run(cleaner.run())
+    assert database.rows["mood_checkins"] == []
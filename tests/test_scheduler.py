@@ -0,0 +1,94 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from services import scheduler as scheduler_module
+from services.scheduler import BotScheduler
+
+
+@pytest.fixture
+def bot_scheduler(monkeypatch):
+    bot_scheduler = BotScheduler()
+    clock = {"now": datetime(2024, 1, 1, 8, 59, 30, tzinfo=timezone.utc)}
+    sleeps = []
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+        clock["now"] += timedelta(seconds=seconds)
+
+    bot_scheduler.timezone = timezone.utc
+    monkeypatch.setattr(bot_scheduler, "_now", lambda: clock["now"])
+    monkeypatch.setattr(scheduler_module.asyncio, "sleep", fake_sleep)
+    bot_scheduler.sleeps = sleeps
+    return bot_scheduler
+
+
+async def noop():
+    pass
+
+
+def run_loop(bot_scheduler, job, runs_before_stop):
+    runs = []
+
+    async def run_as_leader(job, scheduled_at):
+        runs.append(scheduled_at)
+        outcome = runs_before_stop[len(runs) - 1]
+        if len(runs) == len(runs_before_stop):
+            bot_scheduler.running = False
+        if isinstance(outcome, Exception):
+            raise outcome
+
+    bot_scheduler._run_as_leader = run_as_leader
+    bot_scheduler.running = True
+    asyncio.run(bot_scheduler._run_job_loop(job, None))
+    return runs
+
+
+def test_loop_survives_errors_and_retries_same_deadline(bot_scheduler):
+    bot_scheduler.add_job("tips", "0 9 * * *", noop)
+    job = bot_scheduler.jobs["tips"]
+
+    runs = run_loop(bot_scheduler, job, [RuntimeError("db down"), RuntimeError("db down"), None])
+
+    nine = datetime(2024, 1, 1, 9, 0, tzinfo=timezone.utc)
+    assert runs == [nine, nine, nine]
+    assert scheduler_module.ERROR_BACKOFF in bot_scheduler.sleeps
+    assert scheduler_module.ERROR_BACKOFF * 2 in bot_scheduler.sleeps
+    assert job.next_run_at == nine + timedelta(days=1)
+
+
+def test_deadline_is_skipped_once_older_than_catch_up(bot_scheduler):
+    bot_scheduler.add_job("tips", "0 9 * * *", noop, catch_up=timedelta(seconds=10))
+    job = bot_scheduler.jobs["tips"]
+
+    runs = run_loop(bot_scheduler, job, [RuntimeError("db down"), None])
+
+    assert runs == [datetime(2024, 1, 1, 9, 0, tzinfo=timezone.utc), datetime(2024, 1, 2, 9, 0, tzinfo=timezone.utc)]
+
+
+def test_run_with_lost_lease_is_not_recorded(monkeypatch):
+    from database.db_manager import JobLease
+
+    bot_scheduler = BotScheduler()
+    recorded = []
+
+    async def record_job_run(*args):
+        recorded.append(args)
+
+    monkeypatch.setattr(scheduler_module.db_manager, "record_job_run", record_job_run)
+
+    async def slow_job():
+        await asyncio.sleep(10)
+
+    bot_scheduler.add_job("tips", "0 9 * * *", slow_job)
+    job = bot_scheduler.jobs["tips"]
+    lease = JobLease("scheduler:tips", True)
+
+    async def scenario():
+        asyncio.get_running_loop().call_later(0.01, lease.lost.set)
+        await bot_scheduler._execute(job, datetime(2024, 1, 1, 9, tzinfo=timezone.utc), lease)
+
+    asyncio.run(scenario())
+    assert recorded == []
+    assert job.last_scheduled_at is None
@@ -0,0 +1,87 @@
+import math
+
+import pytest
+
+from services.sentiment import MILD, NORMALIZATION_ALPHA, STRONG, SentimentScorer
+
+TEXTS = [
+    "I feel great today",
+    "I am not happy",
+    "Мені дуже погано і сумно",
+    "Не погано, навіть добре",
+    "I am so tired and lonely, but thanks for the support",
+    "the weather",
+    "",
+    "Я не можу спати, безсоння і тривога",
+    "no",
+]
+
+
+@pytest.fixture(scope="module")
+def scorer():
+    return SentimentScorer()
+
+
+def squash(total: float) -> float:
+    return total / math.sqrt(total * total + NORMALIZATION_ALPHA)
+
+
+def test_score_matches_score_batch(scorer):
+    batch = scorer.score_batch(TEXTS)
+
+    assert len(batch) == len(TEXTS)
+    for text, batch_score in zip(TEXTS, batch):
+        assert scorer.score(text) == pytest.approx(batch_score)
+
+
+def test_scores_stay_in_open_interval(scorer):
+    text = " ".join(["wonderful"] * 50)
+
+    assert 0 < scorer.score(text) < 1
+    assert -1 < scorer.score("terrible " * 50) < 0
+
+
+def test_single_words_use_their_weights(scorer):
+    assert scorer.score("great") == pytest.approx(squash(STRONG))
+    assert scorer.score("sad") == pytest.approx(squash(-MILD))
+
+
+def test_negation_reverses_and_damps(scorer):
+    assert scorer.score("not happy") < 0
+    assert scorer.score("not happy") > -scorer.score("happy")
+    assert scorer.score("Мені не погано") > 0
+
+
+def test_negation_window(scorer):
+    # Two tokens after a negator are negated, the third is not
+    assert scorer.score("not very happy") < 0
+    assert scorer.score("not at all happy") > 0
+
+
+def test_negation_does_not_cross_messages_in_batch(scorer):
+    batch = scorer.score_batch(["I did not", "happy"])
+
+    assert batch[1] == pytest.approx(scorer.score("happy"))
+    assert batch[1] > 0
+
+
+def test_inflected_forms_share_a_stem(scorer):
+    assert scorer.score("тривожно") == scorer.score("тривожна")
+
+
+def test_texts_without_sentiment_score_zero(scorer):
+    assert scorer.score("") == 0
+    assert scorer.score("the table is brown") == 0
+    assert list(scorer.score_batch(["", "the table"])) == [0, 0]
+
+
+def test_empty_batch(scorer):
+    assert len(scorer.score_batch([])) == 0
+
+
+def test_custom_lexicon():
+    scorer = SentimentScorer({"en": {"sunny": STRONG}}, negators=("not",))
+
+    assert scorer.score("sunny") > 0
+    assert scorer.score("great") == 0
+    assert scorer.score("not sunny") < 0
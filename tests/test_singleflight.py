@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+
+from utils.singleflight import SingleFlight
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_concurrent_calls_with_same_key_share_one_execution():
+    async def scenario():
+        flight = SingleFlight("test")
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(*(flight.do("k", fetch) for _ in range(5)))
+        return calls, results, flight.in_flight()
+
+    calls, results, in_flight = run(scenario())
+    assert calls == 1
+    assert results == ["result"] * 5
+    assert in_flight == 0
+
+
+def test_different_keys_run_separately():
+    async def scenario():
+        flight = SingleFlight("test")
+        seen = []
+
+        def fetch(value):
+            async def call():
+                seen.append(value)
+                await asyncio.sleep(0)
+                return value
+            return call
+
+        results = await asyncio.gather(flight.do("a", fetch("a")), flight.do("b", fetch("b")))
+        return results, seen
+
+    results, seen = run(scenario())
+    assert results == ["a", "b"]
+    assert sorted(seen) == ["a", "b"]
+
+
+def test_sequential_calls_are_not_coalesced():
+    async def scenario():
+        flight = SingleFlight("test")
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            return calls
+
+        return [await flight.do("k", fetch) for _ in range(3)]
+
+    assert run(scenario()) == [1, 2, 3]
+
+
+def test_exception_reaches_every_waiter():
+    async def scenario():
+        flight = SingleFlight("test")
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("provider down")
+
+        return await asyncio.gather(*(flight.do("k", fail) for _ in range(3)), return_exceptions=True)
+
+    results = run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_waiter_timeout_does_not_cancel_call_for_others():
+    async def scenario():
+        flight = SingleFlight("test")
+
+        async def slow():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        impatient = asyncio.create_task(flight.do("k", slow, timeout=0.01))
+        patient = asyncio.create_task(flight.do("k", slow))
+        with pytest.raises(asyncio.TimeoutError):
+            await impatient
+        return await patient
+
+    assert run(scenario()) == "done"
+
+
+def test_call_is_cancelled_when_last_waiter_gives_up():
+    async def scenario():
+        flight = SingleFlight("test")
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def slow():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        waiter = asyncio.create_task(flight.do("k", slow))
+        await started.wait()
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await asyncio.wait_for(cancelled.wait(), 1)
+        await asyncio.sleep(0)
+        return flight.in_flight()
+
+    assert run(scenario()) == 0
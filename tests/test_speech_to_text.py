@@ -0,0 +1,143 @@
+import asyncio
+import io
+
+import pytest
+
+from services import voice_service as voice_module
+from services.ai_service import AIService
+from services.stt_backends import RecordedBackend
+from services.voice_service import VoiceAssistant, VoiceService
+
+CLIP = b"OggS fake clip"
+OTHER_CLIP = b"OggS another clip"
+
+
+@pytest.fixture
+def backends(monkeypatch):
+    """Replace the configured backends with two recorded ones"""
+    first = RecordedBackend({})
+    second = RecordedBackend({})
+    first.name, second.name = "first", "second"
+    monkeypatch.setattr(voice_module, "stt_backends", [first, second])
+    return first, second
+
+
+def transcribe(audio, language="uk"):
+    return asyncio.run(VoiceService().speech_to_text(audio, language))
+
+
+def test_hit_is_returned_by_first_backend(backends):
+    first, second = backends
+    first.record(CLIP, "добрий день")
+    second.record(CLIP, "not used")
+
+    result = transcribe(CLIP)
+
+    assert result == {"success": True, "text": "добрий день", "language": "uk"}
+
+
+def test_miss_falls_back_to_next_backend(backends):
+    first, second = backends
+    second.record(CLIP, "hello")
+
+    assert transcribe(CLIP, "en")["text"] == "hello"
+
+
+def test_file_object_is_rewound_for_next_backend(backends):
+    first, second = backends
+    second.record(CLIP, "hello")
+
+    assert transcribe(io.BytesIO(CLIP))["text"] == "hello"
+
+
+def test_miss_everywhere_fails(backends):
+    result = transcribe(OTHER_CLIP)
+
+    assert not result["success"]
+    assert result["text"] == ""
+
+
+def test_empty_transcript_is_not_speech(backends):
+    first, second = backends
+    first.record(CLIP, "  ")
+    second.record(CLIP, "")
+
+    result = transcribe(CLIP)
+
+    assert not result["success"]
+    assert result["error"] == "No speech recognized"
+
+
+def test_empty_transcript_falls_back(backends):
+    first, second = backends
+    first.record(CLIP, "")
+    second.record(CLIP, "hello")
+
+    assert transcribe(CLIP)["text"] == "hello"
+
+
+def test_no_backends_configured(monkeypatch):
+    monkeypatch.setattr(voice_module, "stt_backends", [])
+
+    assert transcribe(CLIP)["error"] == "Speech-to-text is not configured"
+
+
+def test_backend_chain_from_config():
+    names = [backend.name for backend in voice_module.create_stt_backends("vosk, whisper")]
+
+    assert names == ["vosk", "whisper"]
+    assert [backend.name for backend in voice_module.create_stt_backends("auto")] == ["whisper", "vosk"]
+    with pytest.raises(ValueError):
+        voice_module.create_stt_backends("google")
+
+
+@pytest.fixture
+def pipeline(monkeypatch, backends):
+    calls = {"ai": [], "tts": []}
+
+    async def chat_with_ai(self, message, user_context=None, language="uk", **kwargs):
+        calls["ai"].append(message)
+        return {"response": "Я поруч.", "model_used": "test"}
+
+    async def text_to_speech(self, text, language="uk", voice="default", stock_phrase=False):
+        calls["tts"].append(text)
+        return {"success": True, "audio": b"mp3"}
+
+    monkeypatch.setattr(AIService, "chat_with_ai", chat_with_ai)
+    monkeypatch.setattr(VoiceService, "text_to_speech", text_to_speech)
+    return backends, calls
+
+
+def run_pipeline(audio):
+    transcriptions = []
+
+    async def on_transcription(text, crisis_check):
+        transcriptions.append((text, crisis_check))
+
+    result = asyncio.run(VoiceAssistant().process_voice_message(
+        audio, {"language": "uk"}, "uk", on_transcription=on_transcription
+    ))
+    return result, transcriptions
+
+
+def test_pipeline_scans_transcript_for_crisis(pipeline):
+    (first, _), calls = pipeline
+    first.record(CLIP, "я не хочу жити")
+
+    result, transcriptions = run_pipeline(CLIP)
+
+    assert result["success"]
+    assert result["crisis"]["crisis_detected"]
+    assert transcriptions[0][1]["crisis_detected"]
+    assert calls["ai"] == ["я не хочу жити"]
+
+
+def test_pipeline_stops_on_empty_transcript(pipeline):
+    (first, _), calls = pipeline
+    first.record(CLIP, "")
+
+    result, transcriptions = run_pipeline(CLIP)
+
+    assert not result["success"]
+    assert transcriptions == []
+    assert calls == {"ai": [], "tts": []}
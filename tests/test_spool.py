@@ -0,0 +1,75 @@
+import asyncio
+import os
+import tempfile
+import time
+
+from services.spool import SWEEP_GRACE_SECONDS, SpoolDirectory
+
+
+def make_file(spool, name, size, age):
+    path = os.path.join(spool.ensure_path(), name)
+    with open(path, "wb") as handle:
+        handle.write(b"x" * size)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_sweep_removes_expired_files(tmp_path):
+    spool = SpoolDirectory(str(tmp_path), max_age=100, max_bytes=10**6)
+    old = make_file(spool, "old", 10, age=200)
+    new = make_file(spool, "new", 10, age=10)
+
+    assert spool.sweep() == 1
+    assert not os.path.exists(old)
+    assert os.path.exists(new)
+    assert spool.stats["removed_expired"] == 1
+
+
+def test_sweep_removes_oldest_files_over_size_cap(tmp_path):
+    spool = SpoolDirectory(str(tmp_path), max_age=10**6, max_bytes=250)
+    oldest = make_file(spool, "a", 100, age=SWEEP_GRACE_SECONDS + 300)
+    older = make_file(spool, "b", 100, age=SWEEP_GRACE_SECONDS + 200)
+    newer = make_file(spool, "c", 100, age=SWEEP_GRACE_SECONDS + 100)
+
+    assert spool.sweep() == 1
+    assert not os.path.exists(oldest)
+    assert os.path.exists(older) and os.path.exists(newer)
+    assert spool.size_bytes == 200
+
+
+def test_recent_files_are_kept_over_size_cap(tmp_path):
+    spool = SpoolDirectory(str(tmp_path), max_age=10**6, max_bytes=50)
+    recent = make_file(spool, "recent", 100, age=1)
+
+    assert spool.sweep() == 0
+    assert os.path.exists(recent)
+
+
+def test_files_in_use_are_never_swept(tmp_path):
+    spool = SpoolDirectory(str(tmp_path), max_age=100, max_bytes=50)
+
+    with spool.file(suffix=".upload") as upload:
+        upload.write(b"x" * 100)
+        upload.flush()
+        old = time.time() - 1000
+        os.utime(upload.name, (old, old))
+
+        assert spool.sweep() == 0
+        assert os.path.exists(upload.name)
+
+    assert not os.path.exists(upload.name)
+    assert spool._in_use == set()
+
+
+def test_start_leaves_process_temp_dir_alone(tmp_path):
+    spool = SpoolDirectory(str(tmp_path / "spool"), interval=3600)
+    before = tempfile.gettempdir()
+
+    async def scenario():
+        spool.start()
+        await spool.stop()
+
+    asyncio.run(scenario())
+    assert tempfile.gettempdir() == before
+    assert os.path.isdir(spool.path)
@@ -0,0 +1,78 @@
+import asyncio
+import os
+
+from services.tts_cache import TTSCache, tts_cache_key
+
+
+def disk_files(directory):
+    return sorted(name for _, _, names in os.walk(directory) for name in names)
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = TTSCache(directory="", memory_bytes=30)
+
+    async def run():
+        await cache.put("a", b"a" * 10)
+        await cache.put("b", b"b" * 10)
+        await cache.put("c", b"c" * 10)
+        # Reading "a" makes "b" the least recently used entry
+        assert await cache.get("a") is not None
+        await cache.put("d", b"d" * 10)
+        return [await cache.get(key) is not None for key in "abcd"]
+
+    assert asyncio.run(run()) == [True, False, True, True]
+    assert cache.get_stats()["memory_bytes"] == 30
+
+
+def test_audio_larger_than_memory_tier_is_not_kept():
+    cache = TTSCache(directory="", memory_bytes=10)
+
+    async def run():
+        await cache.put("small", b"s" * 5)
+        await cache.put("large", b"l" * 11)
+        return await cache.get("small"), await cache.get("large")
+
+    assert asyncio.run(run()) == (b"s" * 5, None)
+
+
+def test_put_without_persist_stays_in_memory(tmp_path):
+    cache = TTSCache(directory=str(tmp_path))
+    key = tts_cache_key("Привіт", "uk", "default", "gtts")
+
+    async def run():
+        await cache.put(key, b"audio", persist=False)
+        return await cache.get(key)
+
+    assert asyncio.run(run()) == b"audio"
+    assert disk_files(tmp_path) == []
+
+    # A new process (empty memory tier) does not find it
+    restarted = TTSCache(directory=str(tmp_path))
+    assert asyncio.run(restarted.get(key)) is None
+
+
+def test_persisted_audio_survives_restart(tmp_path):
+    cache = TTSCache(directory=str(tmp_path))
+    key = tts_cache_key("Доброго ранку", "uk", "default", "gtts")
+
+    asyncio.run(cache.put(key, b"audio"))
+    restarted = TTSCache(directory=str(tmp_path))
+
+    assert asyncio.run(restarted.get(key)) == b"audio"
+    assert restarted.stats["disk_hits"] == 1
+    assert restarted.get_stats()["memory_entries"] == 1
+
+
+def test_disk_tier_trims_oldest_files(tmp_path):
+    cache = TTSCache(directory=str(tmp_path), disk_bytes=25)
+
+    async def run():
+        for index, key in enumerate(("aa1", "bb2", "cc3")):
+            await cache.put(key, b"x" * 10)
+            path = cache._path(key)
+            os.utime(path, (index, index))
+
+    asyncio.run(run())
+
+    assert disk_files(tmp_path) == ["bb2.audio", "cc3.audio"]
+    assert cache.get_stats()["disk_bytes"] == 20
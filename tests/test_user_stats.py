@@ -0,0 +1,102 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from services import user_stats as user_stats_module
+from services.user_stats import WATERMARK_NAME, DriftReport, UserStatsRecomputer
+
+
+def drift_row(user_id, check_ins=(0, 0), mood=(0.0, 0.0), chats=(0, 0)):
+    return {
+        "user_id": user_id,
+        "total_check_ins": check_ins[0], "old_total_check_ins": check_ins[1],
+        "average_mood": mood[0], "old_average_mood": mood[1],
+        "ai_chats_count": chats[0], "old_ai_chats_count": chats[1],
+    }
+
+
+def test_drift_report_totals_per_field():
+    report = DriftReport()
+    report.add(10, [drift_row(1, check_ins=(5, 3)), drift_row(2, check_ins=(2, 1), chats=(4, None))])
+
+    result = report.to_dict()
+    assert result["users_checked"] == 10
+    assert result["users_drifted"] == 2
+    assert result["fields"]["total_check_ins"] == {"drifted": 2, "max_abs": 2, "total_abs": 3}
+    assert result["fields"]["ai_chats_count"]["drifted"] == 1
+    assert result["fields"]["average_mood"]["drifted"] == 0
+
+
+def test_drift_report_keeps_worst_sample():
+    report = DriftReport(sample_size=2)
+    report.add(3, [drift_row(1, chats=(1, 0)), drift_row(2, chats=(9, 0))])
+    report.add(1, [drift_row(3, chats=(5, 0))])
+
+    worst = report.to_dict()["worst"]
+    assert [row["user_id"] for row in worst] == [2, 3]
+    assert "score" not in worst[0]
+
+
+class FakeDatabase:
+    def __init__(self, user_ids):
+        self.user_ids = user_ids
+        self.watermark = datetime(2024, 1, 1)
+        self.saved = None
+        self.batches = []
+
+    async def get_maintenance_watermark(self, name):
+        assert name == WATERMARK_NAME
+        return self.watermark
+
+    async def get_users_active_since(self, since):
+        self.since = since
+        return self.user_ids, datetime(2024, 2, 1)
+
+    async def recompute_user_stats_batch(self, user_ids, dry_run=False):
+        self.batches.append((list(user_ids), dry_run))
+        return [drift_row(user_ids[0], chats=(1, 0))]
+
+    async def save_maintenance_watermark(self, name, taken_at, count):
+        self.saved = (name, taken_at, count)
+
+
+@pytest.fixture
+def recomputer():
+    recomputer = UserStatsRecomputer()
+    recomputer.batch_size = 2
+    recomputer.batch_pause = 0
+    return recomputer
+
+
+def test_recompute_in_batches_and_move_watermark(monkeypatch, recomputer):
+    database = FakeDatabase([1, 2, 3, 4, 5])
+    monkeypatch.setattr(user_stats_module, "db_manager", database)
+
+    result = asyncio.run(recomputer.run())
+
+    assert database.since == datetime(2024, 1, 1)
+    assert [batch for batch, _ in database.batches] == [[1, 2], [3, 4], [5]]
+    assert database.saved == (WATERMARK_NAME, datetime(2024, 2, 1), 5)
+    assert result["users_drifted"] == 3
+    assert recomputer.get_stats()["users_checked"] == 5
+
+
+def test_dry_run_writes_nothing(monkeypatch, recomputer):
+    database = FakeDatabase([1, 2])
+    monkeypatch.setattr(user_stats_module, "db_manager", database)
+
+    result = asyncio.run(recomputer.run(dry_run=True))
+
+    assert database.batches == [([1, 2], True)]
+    assert database.saved is None
+    assert result["dry_run"]
+
+
+def test_full_run_ignores_watermark(monkeypatch, recomputer):
+    database = FakeDatabase([])
+    monkeypatch.setattr(user_stats_module, "db_manager", database)
+
+    asyncio.run(recomputer.run(full=True))
+
+    assert database.since is None
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from services.ai_service import AIService
+from services.voice_service import VoiceAssistant, VoiceService
+
+
+@pytest.fixture
+def events(monkeypatch):
+    """Stub the three stages; each appends to the shared event log"""
+    log = []
+
+    async def speech_to_text(self, audio, language="uk"):
+        log.append("stt")
+        return {"success": True, "text": "добрий вечір", "language": language}
+
+    async def chat_with_ai(self, message, user_context=None, language="uk", **kwargs):
+        log.append(("ai", user_context))
+        return {"response": "Я поруч.", "model_used": "test"}
+
+    async def text_to_speech(self, text, language="uk", voice="default", stock_phrase=False):
+        # Give delivery tasks a chance to run, as a real synthesis would
+        await asyncio.sleep(0)
+        log.append(("tts", stock_phrase))
+        return {"success": True, "audio": b"mp3"}
+
+    monkeypatch.setattr(VoiceService, "speech_to_text", speech_to_text)
+    monkeypatch.setattr(AIService, "chat_with_ai", chat_with_ai)
+    monkeypatch.setattr(VoiceService, "text_to_speech", text_to_speech)
+    return log
+
+
+def test_stages_are_delivered_as_they_finish(events):
+    async def load_context():
+        events.append("context")
+        return {"first_name": "Олена"}
+
+    async def on_transcription(text, crisis_check):
+        events.append(("transcription", text))
+
+    async def on_reply(text):
+        events.append(("reply", text))
+
+    async def run():
+        return await VoiceAssistant().process_voice_message(
+            b"clip", asyncio.ensure_future(load_context()), "uk",
+            on_transcription=on_transcription, on_reply=on_reply
+        )
+
+    result = asyncio.run(run())
+
+    assert result["success"]
+    assert result["audio_response"] == b"mp3"
+    # The context is awaited after speech-to-text and reaches the AI stage
+    assert events[:3] == ["stt", "context", ("ai", {"first_name": "Олена"})]
+    assert events.index(("transcription", "добрий вечір")) < events.index(("reply", "Я поруч."))
+    # The reply is delivered before synthesis of the voice reply finishes, and it is not persisted
+    assert events.index(("reply", "Я поруч.")) < events.index(("tts", False))
+
+
+def test_delivery_errors_do_not_fail_the_pipeline(events):
+    async def on_transcription(text, crisis_check):
+        raise ConnectionError("telegram unreachable")
+
+    async def on_reply(text):
+        raise ConnectionError("telegram unreachable")
+
+    result = asyncio.run(VoiceAssistant().process_voice_message(
+        b"clip", {}, "uk", on_transcription=on_transcription, on_reply=on_reply
+    ))
+
+    assert result["success"]
+    assert result["ai_response"] == "Я поруч."
+
+
+def test_failed_transcription_skips_later_stages(events, monkeypatch):
+    async def speech_to_text(self, audio, language="uk"):
+        return {"success": False, "error": "No speech recognized", "text": ""}
+
+    monkeypatch.setattr(VoiceService, "speech_to_text", speech_to_text)
+
+    async def run():
+        context = asyncio.ensure_future(asyncio.sleep(0, result={}))
+        return await VoiceAssistant().process_voice_message(b"clip", context, "uk")
+
+    result = asyncio.run(run())
+
+    assert not result["success"]
+    assert result["error"] == "Failed to transcribe audio"
+    assert events == []
@@ -0,0 +1,32 @@
+from services.weekly_reports import mood_trend, render_weekly_reports
+
+
+def test_report_shows_average_on_ten_point_scale():
+    rows = [{"language": "en", "avg_mood": 6.25, "check_ins": 4, "first_mood": 5, "last_mood": 8}]
+
+    report = render_weekly_reports(rows)[0]
+
+    assert "• Average mood: 6.2/10" in report
+    assert "• Check-ins: 4" in report
+    assert "📈 Improving" in report
+
+
+def test_users_without_check_ins_get_no_report():
+    rows = [{"language": "uk", "avg_mood": None, "check_ins": 0, "first_mood": None, "last_mood": None}]
+
+    assert render_weekly_reports(rows) == [None]
+
+
+def test_unknown_language_falls_back_to_ukrainian():
+    rows = [{"language": "de", "avg_mood": 3, "check_ins": 1, "first_mood": 3, "last_mood": 3}]
+
+    report = render_weekly_reports(rows)[0]
+
+    assert "Середній рівень настрою: 3.0/10" in report
+    assert "➡️ Стабільно" in report
+
+
+def test_trend_compares_first_and_last_check_in():
+    assert mood_trend(4, 7) == 1
+    assert mood_trend(7, 4) == -1
+    assert mood_trend(5, 5) == 0
@@ -0,0 +1,130 @@
+import logging
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+from config import config
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Requests waiting for response headers, per host (counted by the trace hooks
+# rather than read from the connector's private state)
+in_flight: Dict[str, int] = {}
+
+
+def _request_done(host: str):
+    remaining = in_flight.get(host, 0) - 1
+    if remaining > 0:
+        in_flight[host] = remaining
+    else:
+        in_flight.pop(host, None)
+
+
+async def _on_request_start(session, context: SimpleNamespace, params):
+    context.start = time.monotonic()
+    host = params.url.host
+    in_flight[host] = in_flight.get(host, 0) + 1
+
+
+async def _on_request_end(session, context: SimpleNamespace, params):
+    host = params.url.host
+    _request_done(host)
+    metrics.observe(f"http.{host}", time.monotonic() - context.start)
+    if params.response.status >= 500:
+        metrics.inc(f"http.{host}.server_errors")
+
+
+async def _on_request_exception(session, context: SimpleNamespace, params):
+    _request_done(params.url.host)
+    metrics.inc(f"http.{params.url.host}.exceptions")
+
+
+async def _on_connection_create_end(session, context: SimpleNamespace, params):
+    metrics.inc("http.connections_created")
+
+
+async def _on_connection_reuseconn(session, context: SimpleNamespace, params):
+    metrics.inc("http.connections_reused")
+
+
+def _trace_config() -> aiohttp.TraceConfig:
+    """Per-host request latency, in-flight requests and connection reuse metrics"""
+    trace = aiohttp.TraceConfig()
+    trace.on_request_start.append(_on_request_start)
+    trace.on_request_end.append(_on_request_end)
+    trace.on_request_exception.append(_on_request_exception)
+    trace.on_connection_create_end.append(_on_connection_create_end)
+    trace.on_connection_reuseconn.append(_on_connection_reuseconn)
+    return trace
+
+
+class HttpClientRegistry:
+    """
+    Shared aiohttp session for outbound HTTP calls (Whisper, ElevenLabs,
+    government API). One pooled connector keeps connections alive between
+    requests, caches DNS lookups and limits connections per host.
+    Opened in on_startup and closed in on_shutdown.
+    """
+
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=config.get('HTTP_POOL_LIMIT', 100),
+            limit_per_host=config.get('HTTP_POOL_LIMIT_PER_HOST', 10),
+            keepalive_timeout=config.get('HTTP_KEEPALIVE_TIMEOUT', 30),
+            ttl_dns_cache=config.get('HTTP_DNS_CACHE_TTL', 300),
+            enable_cleanup_closed=True
+        )
+        timeout = aiohttp.ClientTimeout(
+            total=config.get('HTTP_TIMEOUT', 60),
+            connect=config.get('HTTP_CONNECT_TIMEOUT', 10)
+        )
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=timeout,
+            trace_configs=[_trace_config()]
+        )
+
+    async def start(self):
+        """Open the shared session"""
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+            logger.info("HTTP client session opened")
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Shared session; opened on first use if start() was not called"""
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+        return self._session
+
+    async def close(self):
+        """Close the shared session and its connections"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+            logger.info("HTTP client session closed")
+        self._session = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get connection pool statistics"""
+        if self._session is None or self._session.closed:
+            return {"open": False}
+
+        connector = self._session.connector
+        return {
+            "open": True,
+            "limit": connector.limit,
+            "limit_per_host": connector.limit_per_host,
+            "in_flight": sum(in_flight.values()),
+            "in_flight_per_host": dict(in_flight)
+        }
+
+
+# Global HTTP client registry
+http_client = HttpClientRegistry()
+metrics.register_collector("http", http_client.get_stats)
@@ -170,6 +170,18 @@ def get_ai_chat_keyboard(language: str = "uk") -> InlineKeyboardMarkup:
     ])
     return keyboard
 
+def get_ai_chat_session_keyboard(language: str = "uk") -> InlineKeyboardMarkup:
+    """Generate keyboard shown while an AI chat is in progress"""
+    keyboard = InlineKeyboardMarkup(inline_keyboard=[
+        [
+            InlineKeyboardButton(
+                text="🛑 " + get_text("end_chat", language),
+                callback_data="end_ai_chat"
+            )
+        ]
+    ])
+    return keyboard
+
 def get_stats_keyboard(language: str = "uk") -> InlineKeyboardMarkup:
     """Generate statistics options keyboard"""
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
@@ -0,0 +1,88 @@
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict
+
+
+class _Timing:
+    """Latency summary with a small window of recent samples for percentiles"""
+    __slots__ = ("count", "total", "max", "recent")
+
+    def __init__(self, window: int):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent: Deque[float] = deque(maxlen=window)
+
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.recent.append(value)
+
+    def snapshot(self) -> Dict[str, float]:
+        ordered = sorted(self.recent)
+
+        def percentile(p: float) -> float:
+            if not ordered:
+                return 0.0
+            return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+        return {
+            "count": self.count,
+            "avg": round(self.total / self.count, 4) if self.count else 0.0,
+            "p50": round(percentile(0.5), 4),
+            "p95": round(percentile(0.95), 4),
+            "max": round(self.max, 4)
+        }
+
+
+class MetricsRegistry:
+    """In-process counters, gauges and timings exposed via /metrics"""
+
+    def __init__(self, timing_window: int = 500):
+        self.timing_window = timing_window
+        self.started_at = time.time()
+        self.counters: Dict[str, float] = {}
+        self.gauges: Dict[str, float] = {}
+        self.timings: Dict[str, _Timing] = {}
+        self.collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    def inc(self, name: str, amount: float = 1):
+        """Increment a counter"""
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def set_gauge(self, name: str, value: float):
+        """Set a gauge to the current value"""
+        self.gauges[name] = value
+
+    def observe(self, name: str, seconds: float):
+        """Record a duration in seconds"""
+        timing = self.timings.get(name)
+        if timing is None:
+            timing = self.timings[name] = _Timing(self.timing_window)
+        timing.observe(seconds)
+
+    def register_collector(self, name: str, collector: Callable[[], Dict[str, Any]]):
+        """Register a callable that reports a service's own statistics"""
+        self.collectors[name] = collector
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get all metrics as a JSON-serializable dict"""
+        collected = {}
+        for name, collector in self.collectors.items():
+            try:
+                collected[name] = collector()
+            except Exception as e:
+                collected[name] = {"error": str(e)}
+
+        return {
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "counters": dict(self.counters),
+            "gauges": dict(self.gauges),
+            "timings": {name: t.snapshot() for name, t in self.timings.items()},
+            "services": collected
+        }
+
+
+# Global metrics registry
+metrics = MetricsRegistry()
@@ -1,11 +1,16 @@
 import time
 import logging
 from datetime import datetime, timedelta
-from typing import Callable, Dict, Any, Awaitable
+from typing import Callable, Dict, Any, Awaitable, Optional, Tuple
 from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject, Message, CallbackQuery
 
+from config import config
 from database.db_manager import db_manager
+from services.activity_tracker import activity_tracker
+from services.crisis_detector import crisis_detector
+from utils.metrics import metrics
+from utils.rate_limit import KeyedTokenBuckets
 
 logger = logging.getLogger(__name__)
 
@@ -21,12 +26,54 @@ class DatabaseMiddleware(BaseMiddleware):
         data["db"] = db_manager
         return await handler(event, data)
 
+# FSM state groups whose messages go to the AI or voice pipelines
+AI_STATE_PREFIXES = ("AIChatStates:", "VoiceStates:")
+
+def throttle_limits() -> Dict[str, Tuple[float, float]]:
+    """(rate per second, burst) of each throttled event type"""
+    return {
+        "message": (config.get('THROTTLE_MESSAGE_RATE', 1.0), config.get('THROTTLE_MESSAGE_BURST', 5)),
+        "callback": (config.get('THROTTLE_CALLBACK_RATE', 2.0), config.get('THROTTLE_CALLBACK_BURST', 8)),
+        "ai": (config.get('THROTTLE_AI_RATE', 0.1), config.get('THROTTLE_AI_BURST', 3)),
+    }
+
+def event_kind(event: TelegramObject, data: Dict[str, Any]) -> Optional[str]:
+    """
+    Classify an event for throttling: callback, ai (AI chat and voice) or message.
+    Commands are always messages, so /end_chat or /start can leave AI chat
+    after the AI allowance is used up.
+    """
+    if isinstance(event, CallbackQuery):
+        return "callback"
+    if isinstance(event, Message):
+        if event.text and event.text.startswith("/"):
+            return "message"
+        raw_state = data.get("raw_state") or ""
+        if event.voice or event.audio or raw_state.startswith(AI_STATE_PREFIXES):
+            return "ai"
+        return "message"
+    return None
+
+def is_crisis_message(event: TelegramObject) -> bool:
+    """Crisis messages are never throttled or blocked"""
+    text = event.text if isinstance(event, Message) else None
+    return bool(text) and crisis_detector.scan(text)["crisis_detected"]
+
 class ThrottlingMiddleware(BaseMiddleware):
-    """Middleware to prevent spam and rate limiting"""
+    """
+    Per-user token bucket rate limiting, with separate limits for messages,
+    callbacks and AI/voice requests. A throttled user gets at most one
+    warning per THROTTLE_WARNING_INTERVAL; further events are dropped silently.
+    Register one instance for both messages and callbacks.
+    """
     
-    def __init__(self, rate_limit: float = 1.0):
-        self.rate_limit = rate_limit
-        self.user_timestamps: Dict[int, float] = {}
+    def __init__(self, limits: Dict[str, Tuple[float, float]] = None):
+        limits = limits or throttle_limits()
+        self.buckets = {
+            kind: KeyedTokenBuckets(rate, burst) for kind, (rate, burst) in limits.items()
+        }
+        self.warnings = KeyedTokenBuckets(1 / config.get('THROTTLE_WARNING_INTERVAL', 10), 1)
+        metrics.register_collector("throttling", self.get_stats)
     
     async def __call__(
         self,
@@ -34,31 +81,30 @@ class ThrottlingMiddleware(BaseMiddleware):
         event: TelegramObject,
         data: Dict[str, Any]
     ) -> Any:
-        user_id = None
-        
-        if isinstance(event, Message):
-            user_id = event.from_user.id
-        elif isinstance(event, CallbackQuery):
-            user_id = event.from_user.id
+        kind = event_kind(event, data)
+        if kind is None or event.from_user is None:
+            return await handler(event, data)
         
-        if user_id is None:
+        user_id = event.from_user.id
+        if self.buckets[kind].try_acquire(user_id) or is_crisis_message(event):
             return await handler(event, data)
         
-        current_time = time.time()
-        last_request = self.user_timestamps.get(user_id, 0)
+        metrics.inc(f"throttling.{kind}.limited")
+        if not self.warnings.try_acquire(user_id):
+            return
         
-        if current_time - last_request < self.rate_limit:
-            logger.warning(f"Rate limit exceeded for user {user_id}")
-            
+        logger.warning(f"Rate limit exceeded for user {user_id} ({kind})")
+        try:
             if isinstance(event, Message):
                 await event.answer("⚠️ Будь ласка, зачекайте перед наступним повідомленням.")
-            elif isinstance(event, CallbackQuery):
+            else:
                 await event.answer("⚠️ Занадто швидкі дії. Зачекайте трохи.", show_alert=True)
-            
-            return
-        
-        self.user_timestamps[user_id] = current_time
-        return await handler(event, data)
+        except Exception as e:
+            logger.error(f"Error sending throttling warning: {e}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Number of users currently tracked per event type"""
+        return {kind: len(buckets) for kind, buckets in self.buckets.items()}
 
 class LoggingMiddleware(BaseMiddleware):
     """Middleware for logging user activities"""
@@ -149,11 +195,34 @@ class LanguageMiddleware(BaseMiddleware):
         return await handler(event, data)
 
 class SecurityMiddleware(BaseMiddleware):
-    """Middleware for security checks and user validation"""
+    """
+    Middleware for security checks and user validation.
+    Users sending events faster than SECURITY_EVENT_RATE beyond a burst of
+    SECURITY_EVENT_BURST are blocked for SECURITY_BLOCK_SECONDS. The user is
+    told once when the block starts; messages with crisis phrases still get
+    through while blocked.
+    """
     
     def __init__(self):
-        self.blocked_users: set = set()
-        self.suspicious_activity: Dict[int, int] = {}
+        # user_id -> monotonic time the block ends
+        self.blocked_users: Dict[int, float] = {}
+        self.suspicious_activity = KeyedTokenBuckets(
+            config.get('SECURITY_EVENT_RATE', 2.0), config.get('SECURITY_EVENT_BURST', 40)
+        )
+        self.block_seconds = config.get('SECURITY_BLOCK_SECONDS', 300)
+    
+    def _is_blocked(self, user_id: int, now: float) -> bool:
+        if len(self.blocked_users) > 1000:
+            self.blocked_users = {
+                blocked_id: until for blocked_id, until in self.blocked_users.items() if until > now
+            }
+        until = self.blocked_users.get(user_id)
+        if until is None:
+            return False
+        if until <= now:
+            del self.blocked_users[user_id]
+            return False
+        return True
     
     async def __call__(
         self,
@@ -172,29 +241,29 @@ class SecurityMiddleware(BaseMiddleware):
             return await handler(event, data)
         
         # Check if user is blocked
-        if user_id in self.blocked_users:
-            logger.warning(f"Blocked user {user_id} attempted access")
+        now = time.monotonic()
+        if self._is_blocked(user_id, now) and not is_crisis_message(event):
+            metrics.inc("security.blocked_events")
             return
         
-        # Check for suspicious activity
-        if user_id in self.suspicious_activity:
-            self.suspicious_activity[user_id] += 1
-            if self.suspicious_activity[user_id] > 10:  # Too many requests
-                self.blocked_users.add(user_id)
-                logger.warning(f"User {user_id} blocked due to suspicious activity")
-                return
-        else:
-            self.suspicious_activity[user_id] = 1
+        # Check for suspicious activity (the allowance refills over time)
+        if not self.suspicious_activity.try_acquire(user_id) and not is_crisis_message(event):
+            self.blocked_users[user_id] = now + self.block_seconds
+            logger.warning(f"User {user_id} blocked for {self.block_seconds}s due to suspicious activity")
+            metrics.inc("security.blocked_users")
+            try:
+                minutes = max(1, round(self.block_seconds / 60))
+                text = f"⛔ Забагато запитів. Спробуйте знову через {minutes} хв."
+                if isinstance(event, Message):
+                    await event.answer(text)
+                else:
+                    await event.answer(text, show_alert=True)
+            except Exception as e:
+                logger.error(f"Error sending block notice: {e}")
+            return
         
-        # Update user activity
-        try:
-            async with db_manager.pool.acquire() as conn:
-                await conn.execute(
-                    'UPDATE users SET last_activity = NOW() WHERE user_id = $1',
-                    user_id
-                )
-        except Exception as e:
-            logger.error(f"Error updating user activity: {e}")
+        # Update user activity (written in batches by the tracker)
+        activity_tracker.touch(user_id)
         
         return await handler(event, data)
 
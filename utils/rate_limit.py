@@ -0,0 +1,75 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+
+class TokenBucket:
+    """Token bucket refilled at `rate` tokens per second, holding up to `capacity`"""
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """Take tokens if available without waiting"""
+        self._refill(time.monotonic())
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+    async def acquire(self, tokens: float = 1):
+        """Wait until tokens are available and take them"""
+        while not self.try_acquire(tokens):
+            await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        """Drain the bucket so no tokens are handed out for `seconds`"""
+        self._refill(time.monotonic())
+        self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+class KeyedTokenBuckets:
+    """
+    One token bucket per key (e.g. user id) with `rate` and `capacity` shared.
+
+    Buckets are kept in least-recently-used order. A bucket untouched for
+    capacity / rate seconds has refilled completely and is indistinguishable
+    from a new one, so it is evicted; `max_keys` bounds memory on top of that.
+    """
+
+    def __init__(self, rate: float, capacity: float = None, max_keys: int = 100000):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.max_keys = max_keys
+        self.idle_ttl = self.capacity / rate
+        self._buckets: "OrderedDict[Hashable, TokenBucket]" = OrderedDict()
+
+    def _evict(self, now: float):
+        buckets = self._buckets
+        while buckets:
+            key, bucket = next(iter(buckets.items()))
+            if now - bucket.updated < self.idle_ttl and len(buckets) < self.max_keys:
+                break
+            del buckets[key]
+
+    def try_acquire(self, key: Hashable, tokens: float = 1) -> bool:
+        """Take tokens from the bucket of `key` if available"""
+        self._evict(time.monotonic())
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.capacity)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket.try_acquire(tokens)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
@@ -0,0 +1,64 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    """One in-flight call shared by all waiters with the same key"""
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one execution.
+
+    The shared call runs in its own task, so a waiter that is cancelled or
+    times out does not cancel it for the others. The call is cancelled only
+    when the last waiter gives up.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[str, _Call] = {}
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]],
+                 timeout: Optional[float] = None) -> Any:
+        """Run func() or join an identical call already in flight"""
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.get_running_loop().create_task(func()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda task: self._forget(key, task))
+            metrics.inc(f"singleflight.{self.name}.calls")
+        else:
+            metrics.inc(f"singleflight.{self.name}.shared")
+
+        call.waiters += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(call.task), timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            if not call.task.done() and call.waiters == 1:
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+
+    def _forget(self, key: str, task: asyncio.Task):
+        call = self._calls.get(key)
+        if call is not None and call.task is task:
+            del self._calls[key]
+        # Mark exception as retrieved; waiters re-raise it themselves
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Single-flight call {self.name} failed: {task.exception()}")
+
+    def in_flight(self) -> int:
+        """Number of distinct calls currently running"""
+        return len(self._calls)
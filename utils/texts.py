@@ -95,6 +95,7 @@ TEXTS = {
 Пам'ятайте: ви важливі, ваше життя має цінність! 💚
         """,
         "crisis_hotline": "📞 Гаряча лінія",
+        "crisis_support_notice": "Схоже, вам зараз дуже важко. Ви не самі - фахівці готові вислухати та допомогти прямо зараз.",
         "find_psychologist": "👨‍⚕️ Знайти психолога",
         
         # AI Chat
@@ -102,6 +103,9 @@ TEXTS = {
         "ai_chat_welcome": "🤖 Привіт! Я ваш ШІ-асистент для підтримки.\n\nРозкажіть, що вас турбує, або поставте будь-яке питання.",
         "ai_processing": "🤔 Обдумую вашу відповідь...",
         "ai_error": "Вибачте, виникла помилка. Спробуйте пізніше.",
+        "type_your_message": "✍️ Напишіть своє повідомлення. Щоб завершити розмову, натисніть «Завершити чат» або надішліть /end_chat.",
+        "end_chat": "Завершити чат",
+        "ai_chat_ended": "Розмову з ШІ-асистентом завершено. Повертайтеся, коли захочете поговорити.",
         
         # Statistics and tracking
         "mood_stats": "📈 Статистика настрою",
@@ -178,7 +182,14 @@ VetSupport AI - це інформаційний інструмент для пі
 - Швидка допомога: 103
 
 Користуючись ботом, ви погоджуєтесь з цими умовами.
-        """
+        """,
+        
+        # Voice
+        "voice_too_large": "⚠️ Аудіофайл завеликий. Надішліть коротше повідомлення (до {max_mb} МБ).",
+        "voice_too_long": "⚠️ Запис задовгий. Надішліть аудіо тривалістю до {max_minutes} хв.",
+        
+        # Admission
+        "service_busy": "⏳ Зараз дуже багато звернень, і я не встигаю відповісти. Спробуйте, будь ласка, за хвилину.\n\n📞 Якщо потрібна негайна підтримка — Лінія довіри: 7333"
     },
     
     "en": {
@@ -273,6 +284,7 @@ If you're experiencing a crisis or need immediate help:
 Remember: you matter, your life has value! 💚
         """,
         "crisis_hotline": "📞 Crisis Hotline",
+        "crisis_support_notice": "It sounds like things are really hard right now. You are not alone - specialists are ready to listen and help right now.",
         "find_psychologist": "👨‍⚕️ Find Psychologist",
         
         # AI Chat
@@ -280,6 +292,9 @@ Remember: you matter, your life has value! 💚
         "ai_chat_welcome": "🤖 Hi! I'm your AI support assistant.\n\nTell me what's bothering you, or ask any question.",
         "ai_processing": "🤔 Thinking about your message...",
         "ai_error": "Sorry, an error occurred. Please try again later.",
+        "type_your_message": "✍️ Type your message. To finish the conversation, tap \"End chat\" or send /end_chat.",
+        "end_chat": "End chat",
+        "ai_chat_ended": "The conversation with the AI assistant has ended. Come back whenever you want to talk.",
         
         # Statistics and tracking
         "mood_stats": "📈 Mood Statistics",
@@ -356,7 +371,14 @@ This bot does NOT replace professional medical care or diagnosis. For serious he
 - Emergency services: 103
 
 By using the bot, you agree to these terms.
-        """
+        """,
+        
+        # Voice
+        "voice_too_large": "⚠️ The audio file is too large. Please send a shorter message (up to {max_mb} MB).",
+        "voice_too_long": "⚠️ The recording is too long. Please send audio up to {max_minutes} min.",
+        
+        # Admission
+        "service_busy": "⏳ I'm receiving a lot of requests right now and can't answer in time. Please try again in a minute.\n\n📞 If you need immediate support — Crisis line: 7333"
     }
 }
 